@@ -13,14 +13,20 @@ Fecha: Octubre 2025
 """
 
 import os
+import io
 import sys
 import json
+import shutil
+import logging
+import hashlib
 import subprocess
 import time
-import shutil
+import threading
+import importlib.util
+from collections import deque
+from contextlib import contextmanager, nullcontext, redirect_stdout
 from datetime import datetime
 from pathlib import Path
-import requests
 from typing import Dict, Any, List, Optional
 
 # ============================================
@@ -48,6 +54,56 @@ HTML_DIR = BASE_DIR / "html"
 HTML_PEDIDOS_DIR = BASE_DIR / "html_pedidos"
 CSV_DIR = BASE_DIR / "csv"
 STATE_FILE = BASE_DIR / "cerebro_estado.json"
+# Historial de manifiestos (una línea JSON por paso completado, sólo se agrega al final)
+MANIFIESTOS_FILE = BASE_DIR / "cerebro_manifiestos.ndjson"
+# Trazas y reporte de tiempos de cada ejecución
+REPORTES_DIR = BASE_DIR / "reportes"
+
+# Configuración de Ollama
+OLLAMA_URL = "http://localhost:11434"
+KEEP_ALIVE_EJECUCION = "30m"   # Mantiene los modelos cargados mientras dura la ejecución
+KEEP_ALIVE_DEFECTO = "5m"      # Valor por defecto de Ollama, se restaura al terminar
+
+# Línea de estado con el progreso de los parsers (scripts/progreso.py)
+INTERVALO_PROGRESO = 0.5       # segundos entre lecturas del archivo de progreso
+INTERVALO_PROGRESO_LOG = 30    # sin terminal (cron, logs): una línea de progreso cada N segundos
+
+# Líneas finales de la salida de un comando que se muestran si falla
+LINEAS_FINALES_COMANDO = 5
+
+# Módulos de Python que necesitan los parsers (módulo → paquete de pip). Se comprueba que
+# estén instalados sin importarlos; requests se importa recién al hablar con Ollama
+DEPENDENCIAS_PYTHON = {"requests": "requests", "bs4": "beautifulsoup4"}
+
+# Chequeos de salud (scripts/salud.py): un resultado correcto se reutiliza durante este
+# tiempo en segundos (None: toda la ejecución); un fallo se vuelve a comprobar siempre
+TTL_CHEQUEOS = {"directorios": None, "dependencias": None, "ollama": 300, "cookies": 600}
+
+# Modo vigilancia (python cerebro.py --vigilar, ver scripts/vigilancia.py)
+INTERVALO_VIGILANCIA = 1.0     # segundos entre revisiones de html/ y html_pedidos/
+REINTENTO_VIGILANCIA = 30      # segundos de espera antes de reintentar si Ollama no responde
+KEEP_ALIVE_VIGILANCIA = "1h"   # los modelos siguen cargados entre una venta y la siguiente
+
+# Exportación a PostgreSQL (paso 6). Opcional: se activa con CEREBRO_EXPORTAR_BD=1 y la
+# conexión se configura aparte (ver scripts/exportar_postgres.py)
+EXPORTAR_BD = os.environ.get("CEREBRO_EXPORTAR_BD", "0") == "1"
+if EXPORTAR_BD:
+    DEPENDENCIAS_PYTHON["psycopg"] = "psycopg[binary]"
+
+sys.path.insert(0, str(SCRIPTS_DIR))
+from cascada_llm import MODELOS_CASCADA
+import almacen_pedidos
+import respaldo_pedidos
+import archivo_html
+from indice_directorios import indice as indice_directorios, PREFIJO_LISTA
+import trazas
+import metricas
+import consumo_llm
+import perfilado
+import progreso
+import bitacora
+from salud import Salud
+from vigilancia import Vigilante
 
 # ============================================
 # SISTEMA DE ESTADO
@@ -64,7 +120,14 @@ class EstadoSistema:
         if STATE_FILE.exists():
             try:
                 with open(STATE_FILE, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                    estado = json.load(f)
+                # Estados anteriores guardaban la lista completa de archivos
+                archivos = estado.pop("archivos_generados", None)
+                if archivos is not None and not estado.get("manifiestos"):
+                    estado["manifiestos"] = {
+                        str(estado.get("ultimo_paso_completado", 0)): {"archivos": len(archivos)}
+                    }
+                return estado
             except Exception:
                 return self.estado_inicial()
         return self.estado_inicial()
@@ -74,21 +137,44 @@ class EstadoSistema:
         return {
             "ultimo_paso_completado": 0,
             "fecha_inicio": None,
-            "archivos_generados": [],
+            "manifiestos": {},
             "logs": []
         }
     
-    def guardar_estado(self, paso_completado: int, archivos: List[str] = None):
-        """Guarda el estado actual"""
+    def crear_manifiesto(self, paso: int, archivos: List[str], nuevos: Optional[int] = None) -> Dict[str, Any]:
+        """Resumen de los archivos de un paso: cantidad, huella de los nombres y cuántos son nuevos.
+        No consulta el disco ni guarda la lista: `nuevos` lo cuenta el paso que ya recorrió el directorio"""
+        huella = hashlib.sha256()
+        for archivo in sorted(archivos):
+            huella.update(archivo.encode("utf-8") + b"\n")
+        manifiesto = {
+            "paso": paso,
+            "fecha": datetime.now().isoformat(),
+            "archivos": len(archivos),
+            "huella": huella.hexdigest()[:16],
+        }
+        if nuevos is not None:
+            manifiesto["nuevos"] = nuevos
+        return manifiesto
+    
+    def guardar_estado(self, paso_completado: int, archivos: List[str] = None, nuevos: Optional[int] = None):
+        """Guarda el estado actual (tamaño constante) y agrega el manifiesto del paso al historial"""
         self.estado_actual["ultimo_paso_completado"] = paso_completado
         self.estado_actual["fecha_actualizacion"] = datetime.now().isoformat()
         
-        if archivos:
-            self.estado_actual["archivos_generados"] = archivos
-        
         try:
-            with open(STATE_FILE, 'w', encoding='utf-8') as f:
+            if archivos:
+                manifiesto = self.crear_manifiesto(paso_completado, archivos, nuevos)
+                with open(MANIFIESTOS_FILE, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(manifiesto, ensure_ascii=False) + "\n")
+                self.estado_actual.setdefault("manifiestos", {})[str(paso_completado)] = {
+                    clave: manifiesto[clave] for clave in ("archivos", "nuevos", "huella") if clave in manifiesto
+                }
+            
+            temporal = STATE_FILE.with_name(STATE_FILE.name + ".tmp")
+            with open(temporal, 'w', encoding='utf-8') as f:
                 json.dump(self.estado_actual, f, indent=2, ensure_ascii=False)
+            os.replace(temporal, STATE_FILE)
         except Exception as e:
             Logger.error(f"Error guardando estado: {e}")
     
@@ -117,40 +203,139 @@ class EstadoSistema:
 # SISTEMA DE LOGGING
 # ============================================
 
+# Plantillas de consola por estilo de mensaje ({hora} y {mensaje}); el archivo
+# reportes/cerebro.log guarda los mismos mensajes como JSON (scripts/bitacora.py)
+PLANTILLAS_LOG = {
+    "debug": f"{Colors.WHITE}[{{hora}}] 🔎 {{mensaje}}{Colors.END}",
+    "info": f"{Colors.CYAN}[{{hora}}] ℹ️  {{mensaje}}{Colors.END}",
+    "success": f"{Colors.GREEN}[{{hora}}] ✅ {{mensaje}}{Colors.END}",
+    "warning": f"{Colors.YELLOW}[{{hora}}] ⚠️  {{mensaje}}{Colors.END}",
+    "error": f"{Colors.RED}[{{hora}}] ❌ {{mensaje}}{Colors.END}",
+    "step": f"\n{Colors.BOLD}{Colors.PURPLE}{'='*60}\n[{{hora}}] 🎯 {{mensaje}}\n{'='*60}{Colors.END}\n",
+    "substep": f"{Colors.WHITE}[{{hora}}]    ➤ {{mensaje}}{Colors.END}",
+    "salida": f"{Colors.WHITE}   {{mensaje}}{Colors.END}",  # salida de los subprocesos
+    "progreso": f"{Colors.CYAN}   {{mensaje}}{Colors.END}",
+}
+
+
 class Logger:
-    """Sistema de logging con colores y timestamps"""
+    """Sistema de logging con colores y timestamps (consola + JSON en reportes/cerebro.log, ver scripts/bitacora.py)"""
+    
+    _log: Optional[logging.Logger] = None
+    
+    @classmethod
+    def _registrar(cls, nivel: int, estilo: str, mensaje: str, nombre: str = "cerebro", **campos):
+        if cls._log is None:
+            cls._log = bitacora.obtener("cerebro", PLANTILLAS_LOG)
+        if not cls._log.isEnabledFor(nivel):
+            return
+        ruta = trazas.ruta_actual()
+        if ruta:
+            campos["ruta"] = ruta
+        logging.getLogger(nombre).log(nivel, mensaje, extra={"estilo": estilo, **campos})
+    
+    @staticmethod
+    def debug(mensaje: str):
+        Logger._registrar(logging.DEBUG, "debug", mensaje)
     
     @staticmethod
     def info(mensaje: str):
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        print(f"{Colors.CYAN}[{timestamp}] ℹ️  {mensaje}{Colors.END}")
+        Logger._registrar(logging.INFO, "info", mensaje)
     
     @staticmethod
     def success(mensaje: str):
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        print(f"{Colors.GREEN}[{timestamp}] ✅ {mensaje}{Colors.END}")
+        Logger._registrar(logging.INFO, "success", mensaje)
     
     @staticmethod
     def warning(mensaje: str):
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        print(f"{Colors.YELLOW}[{timestamp}] ⚠️  {mensaje}{Colors.END}")
+        Logger._registrar(logging.WARNING, "warning", mensaje)
     
     @staticmethod
     def error(mensaje: str):
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        print(f"{Colors.RED}[{timestamp}] ❌ {mensaje}{Colors.END}")
+        Logger._registrar(logging.ERROR, "error", mensaje)
     
     @staticmethod
     def step(paso: int, titulo: str):
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        print(f"\n{Colors.BOLD}{Colors.PURPLE}{'='*60}")
-        print(f"[{timestamp}] 🎯 PASO {paso}: {titulo}")
-        print(f"{'='*60}{Colors.END}\n")
+        Logger._registrar(logging.INFO, "step", f"PASO {paso}: {titulo}", paso=paso)
     
     @staticmethod
     def substep(mensaje: str):
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        print(f"{Colors.WHITE}[{timestamp}]    ➤ {mensaje}{Colors.END}")
+        Logger._registrar(logging.INFO, "substep", mensaje)
+    
+    @staticmethod
+    def salida(linea: str, script: str):
+        """Línea de salida de un subproceso (logger cerebro.salida)"""
+        Logger._registrar(logging.INFO, "salida", linea, nombre="cerebro.salida", script=script)
+    
+    @staticmethod
+    def progreso(mensaje: str):
+        Logger._registrar(logging.INFO, "progreso", mensaje)
+
+class MonitorProgreso:
+    """Muestra en una sola línea que se actualiza el progreso que publican los parsers"""
+    
+    def __init__(self, ruta: Optional[Path] = None):
+        self.lector = progreso.LectorProgreso(ruta) if ruta else None
+        self.texto = ""
+        self.ultimo_log = 0.0
+        self._detener = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+    
+    def __enter__(self):
+        if self.lector:
+            self._detener.clear()
+            self._hilo = threading.Thread(target=self._bucle, daemon=True)
+            self._hilo.start()
+        return self
+    
+    def __exit__(self, *excepcion):
+        if self._hilo:
+            self._detener.set()
+            self._hilo.join()
+            self._hilo = None
+            self.actualizar()
+        if self.texto:
+            bitacora.fijar_estado("")
+            Logger.progreso(self.texto)  # deja el estado final en el log
+            self.texto = ""
+    
+    def _bucle(self):
+        while not self._detener.wait(INTERVALO_PROGRESO):
+            self.actualizar()
+    
+    def actualizar(self):
+        eventos = self.lector.nuevos()
+        if not eventos:
+            return
+        self.texto = f"📊 {progreso.linea_estado(eventos[-1])}"
+        if bitacora.es_terminal():
+            ancho = shutil.get_terminal_size().columns - 4  # margen para el emoji; si la línea se parte, \r no la borra
+            bitacora.fijar_estado(f"{Colors.CYAN}   {self.texto[:ancho]}{Colors.END}")
+        elif time.time() - self.ultimo_log >= INTERVALO_PROGRESO_LOG:
+            Logger.progreso(self.texto)
+            self.ultimo_log = time.time()
+
+class SalidaEnProceso(io.TextIOBase):
+    """stdout de un parser llamado en este proceso: cada línea va a Logger.salida, como la de un subproceso"""
+    
+    def __init__(self, script: str):
+        self.script = script
+        self._resto = ""
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, texto: str) -> int:
+        lineas = (self._resto + texto).split("\n")
+        self._resto = lineas.pop()  # línea aún incompleta
+        for linea in lineas:
+            Logger.salida(linea.strip(), self.script)
+        return len(texto)
+    
+    def terminar(self):
+        if self._resto:
+            Logger.salida(self._resto.strip(), self.script)
+            self._resto = ""
 
 # ============================================
 # VERIFICADORES DE PRERREQUISITOS
@@ -163,6 +348,7 @@ class Verificadores:
     def verificar_ollama() -> bool:
         """Verifica que Ollama esté funcionando"""
         try:
+            import requests
             response = requests.get("http://localhost:11434/api/version", timeout=5)
             if response.status_code == 200:
                 Logger.success("Ollama está funcionando correctamente")
@@ -208,20 +394,19 @@ class Verificadores:
                 Logger.info(f"Creado directorio: {directorio}")
             else:
                 Logger.substep(f"Directorio existe: {directorio}")
+        return True
     
     @staticmethod
     def verificar_dependencias():
         """Verifica que las dependencias estén instaladas"""
         Logger.substep("Verificando dependencias de Python...")
-        try:
-            import openai
-            import pathlib
-            from bs4 import BeautifulSoup
-            Logger.success("Dependencias de Python verificadas")
-        except ImportError as e:
-            Logger.error(f"Dependencia faltante: {e}")
-            Logger.info("Ejecuta: pip install openai pathlib beautifulsoup4")
+        faltantes = [paquete for modulo, paquete in DEPENDENCIAS_PYTHON.items()
+                     if importlib.util.find_spec(modulo) is None]
+        if faltantes:
+            Logger.error(f"Dependencias faltantes: {', '.join(faltantes)}")
+            Logger.info(f"Ejecuta: pip install {' '.join(faltantes)}")
             return False
+        Logger.success("Dependencias de Python verificadas")
         
         Logger.substep("Verificando Node.js...")
         try:
@@ -236,6 +421,103 @@ class Verificadores:
             Logger.error("Node.js no está instalado")
             return False
 
+# ============================================
+# PRECARGA DE MODELOS
+# ============================================
+
+class PrecargaModelos:
+    """Carga los modelos de Ollama en segundo plano mientras trabaja el navegador"""
+    
+    def __init__(self, modelos: List[str]):
+        self.modelos = modelos
+        self.keep_alive = KEEP_ALIVE_EJECUCION
+        self.hilo: Optional[threading.Thread] = None
+        self.resultados: Dict[str, Dict[str, float]] = {}
+    
+    def _peticion(self, modelo: str, keep_alive: str) -> Dict[str, float]:
+        """Petición sin prompt: Ollama sólo carga el modelo y fija su keep_alive.
+        Con las mismas opciones que /api/chat: otro num_ctx obligaría a recargarlo en la primera extracción"""
+        import requests
+        from cliente_ollama import OPCIONES_BASE
+        inicio = time.perf_counter()
+        response = requests.post(
+            f"{OLLAMA_URL}/api/generate",
+            json={"model": modelo, "keep_alive": keep_alive, "options": OPCIONES_BASE},
+            timeout=300,
+        )
+        response.raise_for_status()
+        return {
+            "total": time.perf_counter() - inicio,
+            "carga": response.json().get("load_duration", 0) / 1e9,
+        }
+    
+    def _chat_minimo(self, modelo: str) -> float:
+        """Latencia en caliente: una llamada real a /api/chat de un solo token con el modelo ya cargado"""
+        from cliente_ollama import chat_ollama
+        respuesta = chat_ollama(modelo, "Responde sólo OK.", "OK", num_predict=1, prompt="precarga",
+                                script="cerebro", keep_alive=self.keep_alive)
+        return respuesta["total"]
+    
+    def _precargar(self):
+        for modelo in self.modelos:
+            try:
+                frio = self._peticion(modelo, self.keep_alive)
+                self.resultados[modelo] = {
+                    "frio": frio["total"],
+                    "carga": frio["carga"],
+                    "caliente": self._chat_minimo(modelo),
+                }
+            except Exception as e:
+                self.resultados[modelo] = {"error": str(e)}
+    
+    def iniciar(self):
+        """Lanza la precarga en segundo plano (no bloquea el paso actual)"""
+        if self.hilo and self.hilo.is_alive():
+            return
+        self.resultados = {}
+        Logger.substep(f"Precargando modelos en segundo plano: {', '.join(self.modelos)}")
+        self.hilo = threading.Thread(target=self._precargar, daemon=True)
+        self.hilo.start()
+    
+    def esperar(self):
+        """Espera a que la precarga termine y reporta la latencia en frío y en caliente"""
+        if self.hilo is None:
+            self.iniciar()
+        self.hilo.join()
+        for modelo, datos in self.resultados.items():
+            if "error" in datos:
+                Logger.warning(f"No se pudo precargar {modelo}: {datos['error']}")
+            else:
+                Logger.info(f"Modelo {modelo}: arranque {datos['frio']:.2f}s "
+                            f"(carga {datos['carga']:.2f}s), chat en caliente {datos['caliente']:.2f}s")
+        self.hilo = None
+    
+    def modelos_cargados(self) -> List[str]:
+        """Modelos de la cascada que Ollama tiene en memoria ahora mismo (/api/ps)"""
+        import requests
+        response = requests.get(f"{OLLAMA_URL}/api/ps", timeout=5)
+        response.raise_for_status()
+        cargados = set()
+        for datos in response.json().get("models", []):
+            cargados.update((datos.get("name"), datos.get("model")))
+        return [modelo for modelo in self.modelos if modelo in cargados]
+    
+    def liberar(self):
+        """Restaura el keep_alive por defecto de Ollama al terminar la ejecución (haya ido bien o no).
+        Sólo a los modelos que siguen cargados: una petición a uno ya descargado lo volvería a cargar"""
+        if self.hilo is not None:
+            self.hilo.join()  # una precarga en curso fijaría el keep_alive largo después de liberar
+            self.hilo = None
+        try:
+            cargados = self.modelos_cargados()
+        except Exception:
+            return  # Ollama no responde: no hay nada que liberar
+        for modelo in cargados:
+            try:
+                self._peticion(modelo, KEEP_ALIVE_DEFECTO)
+            except Exception:
+                pass
+
 # ============================================
 # EJECUTOR DE PASOS
 # ============================================
@@ -246,45 +528,65 @@ class EjecutorPasos:
     def __init__(self, estado: EstadoSistema, logger: Logger):
         self.estado = estado
         self.logger = logger
+        self.precarga = PrecargaModelos(MODELOS_CASCADA)
+        # Con --profile: {"directorio", "muestreo", "top"} (ver scripts/perfilado.py)
+        self.perfil: Optional[Dict[str, Any]] = None
+        self.paso_actual = 0
+        # La ejecución completa lo apunta al archivo de progreso de los parsers
+        self.progreso = MonitorProgreso()
+        self.salud = Salud()
+        self.salud.registrar("directorios", Verificadores.verificar_directorios, TTL_CHEQUEOS["directorios"])
+        self.salud.registrar("dependencias", Verificadores.verificar_dependencias, TTL_CHEQUEOS["dependencias"])
+        self.salud.registrar("ollama", Verificadores.verificar_ollama, TTL_CHEQUEOS["ollama"])
+        self.salud.registrar("cookies", Verificadores.verificar_cookies, TTL_CHEQUEOS["cookies"])
     
     def ejecutar_comando(self, comando: List[str], directorio: Path = BASE_DIR, timeout: int = 300) -> bool:
         """Ejecuta un comando y muestra output en tiempo real"""
         try:
+            script = Path(comando[-1]).name
+            if self.perfil and comando[0] == "python" and comando[1].endswith(".py"):
+                comando = perfilado.comando_perfilado(
+                    comando, f"paso_{self.paso_actual}_{Path(comando[1]).stem}", **self.perfil)
             Logger.substep(f"Ejecutando: {' '.join(comando)}")
             
             # Configurar encoding para Windows
             env = os.environ.copy()
             env['PYTHONIOENCODING'] = 'utf-8'
             env['PYTHONUNBUFFERED'] = '1'  # Fuerza output inmediato
+            env['CEREBRO_KEEP_ALIVE'] = KEEP_ALIVE_EJECUCION  # Los parsers mantienen el modelo cargado
+            env[trazas.ENV_RUTA_PADRE] = trazas.ruta_actual()  # Los spans del script cuelgan del paso
+            env[trazas.ENV_PROCESO] = Path(script).stem
             
-            # Ejecutar el comando con output en tiempo real
-            process = subprocess.Popen(
-                comando,
-                cwd=directorio,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,  # Combinar stderr con stdout
-                text=True,
-                bufsize=1,
-                universal_newlines=True,
-                env=env,
-                encoding='utf-8',
-                errors='replace'  # Reemplazar caracteres problemáticos
-            )
+            with trazas.span("comando", script=script) as atributos, self.progreso:
+                # Ejecutar el comando con output en tiempo real
+                process = subprocess.Popen(
+                    comando,
+                    cwd=directorio,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,  # Combinar stderr con stdout
+                    text=True,
+                    bufsize=1,
+                    universal_newlines=True,
+                    env=env,
+                    encoding='utf-8',
+                    errors='replace'  # Reemplazar caracteres problemáticos
+                )
             
-            # Leer output línea por línea en tiempo real
-            output_lines = []
-            while True:
-                line = process.stdout.readline()
-                if line == '' and process.poll() is not None:
-                    break
-                if line:
-                    clean_line = line.strip()
-                    output_lines.append(clean_line)
-                    # Mostrar con indentación para distinguir del output de CEREBRO
-                    print(f"{Colors.WHITE}   {clean_line}{Colors.END}")
+                # Leer output línea por línea en tiempo real; sólo se guardan las últimas para el error
+                output_lines = deque(maxlen=LINEAS_FINALES_COMANDO)
+                while True:
+                    line = process.stdout.readline()
+                    if line == '' and process.poll() is not None:
+                        break
+                    if line:
+                        clean_line = line.strip()
+                        output_lines.append(clean_line)
+                        # Mostrar con indentación para distinguir del output de CEREBRO
+                        Logger.salida(clean_line, script)
             
-            # Esperar a que termine completamente
-            return_code = process.wait()
+                # Esperar a que termine completamente
+                return_code = process.wait()
+                atributos["codigo"] = return_code
             
             if return_code == 0:
                 Logger.success(f"Comando ejecutado exitosamente")
@@ -293,7 +595,7 @@ class EjecutorPasos:
                 Logger.error(f"Comando falló con código de salida: {return_code}")
                 if output_lines:
                     Logger.error("Últimas líneas de output:")
-                    for line in output_lines[-5:]:  # Mostrar últimas 5 líneas
+                    for line in output_lines:
                         Logger.error(f"   {line}")
                 return False
                 
@@ -301,6 +603,45 @@ class EjecutorPasos:
             Logger.error(f"Error ejecutando comando: {e}")
             return False
 
+    def ejecutar_en_proceso(self, script: str, funcion, *argumentos):
+        """Como ejecutar_comando, pero llama a la función del parser en este proceso (modo vigilancia).
+        Devuelve lo que devuelve la función, o None si falló"""
+        Logger.substep(f"Ejecutando en proceso: {script}.{funcion.__name__}")
+        salida = SalidaEnProceso(script)
+        try:
+            with trazas.span("comando", proceso=script, script=f"{script}.py", en_proceso=True) as atributos, self.progreso:
+                with redirect_stdout(salida):
+                    resultado = funcion(*argumentos)
+                atributos["codigo"] = 0
+            salida.terminar()
+            Logger.success(f"{script} terminó correctamente")
+            return resultado
+        except Exception as e:
+            salida.terminar()
+            Logger.error(f"Error en {script}: {type(e).__name__}: {e}")
+            return None
+
+    def ejecutar_paso(self, numero: int, nombre: str, funcion) -> bool:
+        """Ejecuta un paso registrando su span y sus métricas (duración, fallos); con --profile lo perfila"""
+        metricas.PASO_EN_CURSO.fijar(numero)
+        self.paso_actual = numero
+        inicio = time.time()
+        exito = False
+        perfil = perfilado.perfilar(f"paso_{numero}_cerebro", **self.perfil) if self.perfil else nullcontext()
+        try:
+            with trazas.span(f"paso_{numero}", titulo=nombre) as atributos, perfil:
+                exito = funcion()
+                atributos["exito"] = exito
+            return exito
+        finally:
+            if not exito:
+                self.salud.invalidar()  # al reintentar se vuelve a comprobar todo
+            metricas.PASO_EN_CURSO.fijar(0)
+            metricas.PASO_EJECUCIONES.inc(paso=str(numero))
+            metricas.PASO_DURACION.observar(time.time() - inicio, paso=str(numero))
+            if not exito:
+                metricas.PASO_FALLOS.inc(paso=str(numero))
+    
     def paso_1_login_manual(self) -> bool:
         """Paso 1: Login manual para generar cookies (SOLO INSTRUCCIONES)"""
         Logger.step(1, "Login Manual en Amazon Seller Central 🔐")
@@ -342,7 +683,8 @@ class EjecutorPasos:
                 respuesta = input(f"\n{Colors.GREEN}{Colors.BOLD}>>> Presiona ENTER cuando hayas completado el login <<<{Colors.END}")
                 
                 # Verificar cookies después de cada confirmación
-                if Verificadores.verificar_cookies():
+                self.salud.invalidar("cookies")
+                if self.salud.verificar("cookies"):
                     Logger.success("✅ Cookies detectadas correctamente")
                     self.estado.guardar_estado(1, ["cookies/session.json"])
                     return True
@@ -364,18 +706,21 @@ class EjecutorPasos:
         Logger.step(2, "Extracción del HTML de la tabla de pedidos 🕷️")
         
         # Verificar cookies
-        if not Verificadores.verificar_cookies():
+        if not self.salud.verificar("cookies"):
             return False
         
+        # Cargar los modelos mientras el navegador descarga la tabla
+        self.precarga.iniciar()
+        
         # Ejecutar script de extracción
         comando = ["node", "scripts/extraer_html_tabla.js"]
         if not self.ejecutar_comando(comando):
             return False
         
         # Verificar que se creó el archivo HTML
-        archivos_html = list(HTML_DIR.glob("pedidos_*.html"))
-        if archivos_html:
-            archivo_mas_reciente = max(archivos_html, key=lambda p: p.name)
+        indice_directorios.invalidar()
+        archivo_mas_reciente = indice_directorios.pagina_lista_mas_reciente()
+        if archivo_mas_reciente is not None:
             Logger.success(f"HTML generado: {archivo_mas_reciente.name}")
             self.estado.guardar_estado(2, [str(archivo_mas_reciente)])
             return True
@@ -387,13 +732,13 @@ class EjecutorPasos:
         """Paso 3: Procesamiento de Lista de Pedidos con IA"""
         Logger.step(3, "Procesamiento de Lista de Pedidos con IA 🤖")
         
-        # Verificar Ollama
-        if not Verificadores.verificar_ollama():
+        # Verificar Ollama (en caché si ya se comprobó en los prerrequisitos)
+        if not self.salud.verificar("ollama"):
             return False
+        self.precarga.esperar()
         
         # Verificar que existe HTML del paso anterior
-        archivos_html = list(HTML_DIR.glob("pedidos_*.html"))
-        if not archivos_html:
+        if indice_directorios.pagina_lista_mas_reciente() is None:
             Logger.error("No se encontró archivo HTML del paso 2")
             return False
         
@@ -404,12 +749,12 @@ class EjecutorPasos:
         
         # Verificar archivos generados
         archivos_generados = []
-        json_file = CSV_DIR / "pedidos_consolidados.json"
-        csv_file = CSV_DIR / "pedidos_consolidados.csv"
+        ndjson_file = almacen_pedidos.NDJSON_CONSOLIDADO
+        csv_file = almacen_pedidos.OUTPUT_CSV_CONSOLIDADO
         
-        if json_file.exists():
-            archivos_generados.append(str(json_file))
-            Logger.success(f"JSON generado: {json_file}")
+        if ndjson_file.exists():
+            archivos_generados.append(str(ndjson_file))
+            Logger.success(f"NDJSON generado: {ndjson_file}")
         
         if csv_file.exists():
             archivos_generados.append(str(csv_file))
@@ -426,22 +771,31 @@ class EjecutorPasos:
         """Paso 4: Descarga de HTML de pedidos individuales"""
         Logger.step(4, "Descarga de HTML de pedidos individuales 📥")
         
-        # Verificar que existe el JSON con los pedidos
-        json_file = CSV_DIR / "pedidos_consolidados.json"
-        if not json_file.exists():
-            Logger.error("No se encontró archivo JSON del paso 3")
+        # Verificar que existe el almacén con los pedidos
+        if not almacen_pedidos.NDJSON_CONSOLIDADO.exists():
+            Logger.error("No se encontró archivo NDJSON del paso 3")
             return False
         
+        # Recargar/fijar los modelos mientras se descargan los pedidos
+        self.precarga.iniciar()
+        
         # Ejecutar descarga de pedidos individuales
+        previas = indice_directorios.ids_con_detalle()
         comando = ["node", "scripts/extraer_detalles_pedidos.js"]
         if not self.ejecutar_comando(comando, timeout=600):  # Timeout más largo para descargas
             return False
         
-        # Verificar archivos descargados
-        archivos_individuales = list(HTML_PEDIDOS_DIR.glob("*.html"))
-        if archivos_individuales:
-            Logger.success(f"Descargados {len(archivos_individuales)} archivos HTML individuales")
-            self.estado.guardar_estado(4, [str(f) for f in archivos_individuales])
+        # Verificar archivos descargados (las páginas ya procesadas están en el archivo comprimido)
+        indice_directorios.invalidar()
+        archivos_individuales = indice_directorios.rutas_detalle()
+        _, archivadas = archivo_html.contar_paginas()
+        if archivos_individuales or archivadas:
+            # Nuevas = las que no estaban antes de la descarga: se comparan nombres, sin stat() por archivo
+            nuevos = len(indice_directorios.ids_con_detalle() - previas)
+            Logger.info(f"{nuevos} páginas de detalle nuevas en esta ejecución")
+            Logger.success(f"{len(archivos_individuales)} archivos HTML individuales pendientes "
+                           f"({archivadas} ya archivados)")
+            self.estado.guardar_estado(4, [str(f) for f in archivos_individuales], nuevos)
             return True
         else:
             Logger.error("No se descargaron archivos HTML individuales")
@@ -451,30 +805,32 @@ class EjecutorPasos:
         """Paso 5: Extracción de detalles completos con IA"""
         Logger.step(5, "Extracción de detalles completos con IA 🎯")
         
-        # Verificar Ollama
-        if not Verificadores.verificar_ollama():
+        # Verificar Ollama (en caché si ya se comprobó en los prerrequisitos)
+        if not self.salud.verificar("ollama"):
             return False
+        self.precarga.esperar()
         
         # Verificar archivos HTML individuales
-        archivos_individuales = list(HTML_PEDIDOS_DIR.glob("*.html"))
-        if not archivos_individuales:
+        sueltas, archivadas = archivo_html.contar_paginas()
+        if not sueltas and not archivadas:
             Logger.error("No se encontraron archivos HTML individuales del paso 4")
             return False
         
-        Logger.info(f"Procesando {len(archivos_individuales)} archivos HTML individuales")
+        Logger.info(f"Procesando {sueltas} archivos HTML individuales")
         
         # Ejecutar extracción de detalles
         comando = ["python", "scripts/parser_detalles_llm.py"]
         if not self.ejecutar_comando(comando, timeout=900):  # Timeout más largo para IA
             return False
+        indice_directorios.invalidar()  # el parser movió las páginas procesadas al archivo
         
         # Verificar actualización de archivos
-        json_file = CSV_DIR / "pedidos_consolidados.json"
-        csv_file = CSV_DIR / "pedidos_consolidados.csv"
+        ndjson_file = almacen_pedidos.NDJSON_CONSOLIDADO
+        csv_file = almacen_pedidos.OUTPUT_CSV_CONSOLIDADO
         
         archivos_actualizados = []
-        if json_file.exists():
-            archivos_actualizados.append(str(json_file))
+        if ndjson_file.exists():
+            archivos_actualizados.append(str(ndjson_file))
         if csv_file.exists():
             archivos_actualizados.append(str(csv_file))
         
@@ -486,6 +842,24 @@ class EjecutorPasos:
             Logger.error("Error actualizando archivos consolidados")
             return False
 
+    def paso_6_exportar_bd(self) -> bool:
+        """Paso 6: Exportación incremental a PostgreSQL"""
+        Logger.step(6, "Exportación incremental a PostgreSQL 🗄️")
+        
+        if not EXPORTAR_BD:
+            Logger.info("Exportación desactivada (se activa con CEREBRO_EXPORTAR_BD=1)")
+            self.estado.guardar_estado(6)
+            return True
+        
+        # Un fallo de la BD no detiene la ejecución: la marca de exportación no avanza,
+        # así que la próxima ejecución vuelve a enviar los mismos cambios
+        comando = ["python", "scripts/exportar_postgres.py"]
+        if not self.ejecutar_comando(comando):
+            Logger.warning("No se pudo exportar a PostgreSQL; se reintentará en la próxima ejecución")
+        
+        self.estado.guardar_estado(6)
+        return True
+
 # ============================================
 # CEREBRO PRINCIPAL
 # ============================================
@@ -522,9 +896,10 @@ class CerebroAmazonPedidos:
             print(f"{Colors.GREEN}   ✅ Último paso completado: {ultimo_paso}{Colors.END}")
             print(f"{Colors.CYAN}   🔄 El sistema continuará desde el paso {ultimo_paso + 1}{Colors.END}")
             
-            if "archivos_generados" in self.estado.estado_actual:
-                archivos = self.estado.estado_actual["archivos_generados"]
-                print(f"{Colors.WHITE}   📁 Archivos generados: {len(archivos)}{Colors.END}")
+            for paso, manifiesto in sorted(self.estado.estado_actual.get("manifiestos", {}).items()):
+                nuevos = manifiesto.get("nuevos")
+                detalle = f" ({nuevos} nuevos en esta ejecución)" if nuevos is not None else ""
+                print(f"{Colors.WHITE}   📁 Paso {paso}: {manifiesto['archivos']} archivos{detalle}{Colors.END}")
         
         print()
     
@@ -532,26 +907,61 @@ class CerebroAmazonPedidos:
         """Verifica todos los prerrequisitos del sistema"""
         Logger.step(0, "Verificación de Prerrequisitos 🔍")
         
-        verificaciones = [
-            ("Directorios", Verificadores.verificar_directorios),
-            ("Dependencias", Verificadores.verificar_dependencias),
-            ("Ollama", Verificadores.verificar_ollama),
-        ]
-        
-        for nombre, verificador in verificaciones:
-            Logger.substep(f"Verificando {nombre}...")
-            if nombre == "Directorios":
-                verificador()  # Este no retorna bool
-                continue
-            elif not verificador():
-                Logger.error(f"Falló verificación: {nombre}")
-                return False
+        # Independientes entre sí: se comprueban en paralelo
+        verificaciones = ["directorios", "dependencias", "ollama"]
+        Logger.substep(f"Verificando {', '.join(verificaciones)}...")
+        salud = self.ejecutor.salud
+        if not salud.verificar(*verificaciones):
+            for nombre in verificaciones:
+                if not salud.chequeos[nombre].ok:
+                    Logger.error(f"Falló verificación: {nombre}")
+            return False
         
         Logger.success("Todos los prerrequisitos están listos")
         return True
     
     def ejecutar_flujo_completo(self):
-        """Ejecuta el flujo completo del proyecto"""
+        """Ejecuta el flujo completo del proyecto y guarda el reporte de tiempos de la ejecución"""
+        with self.registro_ejecucion() as ejecucion:
+            servidor = self.iniciar_servidor_metricas(ejecucion["metricas"])
+            try:
+                ejecucion["exito"] = self._ejecutar_flujo()
+            finally:
+                self.ejecutor.precarga.liberar()  # también si un paso falló o se interrumpió
+                if servidor is not None:
+                    servidor.shutdown()
+        return ejecucion["exito"]
+    
+    @contextmanager
+    def registro_ejecucion(self):
+        """Trazas, progreso, consumo del LLM y métricas de una ejecución (o de un ciclo del modo vigilancia);
+        al salir escribe el reporte y acumula las métricas. El bloque indica el resultado en ejecucion["exito"]"""
+        id_ejecucion = datetime.now().strftime("%Y%m%d_%H%M%S")
+        REPORTES_DIR.mkdir(exist_ok=True)
+        ruta_trazas = REPORTES_DIR / f"trazas_{id_ejecucion}.ndjson"
+        dir_metricas = REPORTES_DIR / f"metricas_{id_ejecucion}"
+        ruta_consumo = REPORTES_DIR / f"consumo_llm_{id_ejecucion}.tsv"
+        ruta_progreso = REPORTES_DIR / f"progreso_{id_ejecucion}.ndjson"
+        # Se heredan en los subprocesos: los parsers agregan sus spans y métricas a los de la ejecución
+        os.environ[trazas.ENV_TRAZAS] = str(ruta_trazas)
+        os.environ[metricas.ENV_DIRECTORIO] = str(dir_metricas)
+        os.environ[consumo_llm.ENV_REGISTRO] = str(ruta_consumo)
+        os.environ[progreso.ENV_PROGRESO] = str(ruta_progreso)
+        metricas.registro.agregador = True
+        self.ejecutor.progreso = MonitorProgreso(ruta_progreso)
+        if self.ejecutor.perfil is not None:
+            self.ejecutor.perfil["directorio"] = REPORTES_DIR / "perfiles" / id_ejecucion
+            Logger.info(f"🔬 Modo perfilado: resultados en {self.ejecutor.perfil['directorio']}")
+        ejecucion = {"id": id_ejecucion, "metricas": dir_metricas, "exito": False}
+        inicio = time.time()
+        try:
+            yield ejecucion
+        finally:
+            self.escribir_reporte_ejecucion(ruta_trazas, ruta_progreso, REPORTES_DIR / f"ejecucion_{id_ejecucion}.json")
+            self.escribir_consumo_llm(ruta_consumo, REPORTES_DIR / f"consumo_llm_{id_ejecucion}.json")
+            self.escribir_metricas(dir_metricas, ejecucion["exito"], time.time() - inicio)
+    
+    def _ejecutar_flujo(self) -> bool:
         self.mostrar_banner()
         self.mostrar_resumen_estado()
         
@@ -574,12 +984,13 @@ class CerebroAmazonPedidos:
             (3, "Procesamiento IA", self.ejecutor.paso_3_procesar_ia),
             (4, "Descarga Individual", self.ejecutor.paso_4_descargar_individuales),
             (5, "Extracción Detalles", self.ejecutor.paso_5_extraer_detalles),
+            (6, "Exportación BD", self.ejecutor.paso_6_exportar_bd),
         ]
         
         # Ejecutar pasos - algunos siempre se ejecutan, otros solo si es necesario
         for numero_paso, nombre_paso, funcion_paso in pasos:
             # Paso 1 (Login): Solo saltar si ya está hecho Y las cookies existen
-            if numero_paso == 1 and ultimo_paso >= 1 and Verificadores.verificar_cookies():
+            if numero_paso == 1 and ultimo_paso >= 1 and self.ejecutor.salud.verificar("cookies"):
                 Logger.warning(f"Paso {numero_paso} (Login) ya completado - Saltando")
                 continue
             
@@ -587,25 +998,99 @@ class CerebroAmazonPedidos:
             if numero_paso == 2:
                 Logger.info(f"Iniciando {nombre_paso} (siempre se ejecuta para detectar nuevas ventas)")
             
-            # Pasos 3,4,5: Solo saltar si no es necesario (el script decide)
+            # Pasos 3 a 6: Solo saltar si no es necesario (el script decide)
             elif numero_paso > 2 and ultimo_paso >= numero_paso:
                 Logger.warning(f"Paso {numero_paso} ya completado en esta sesión - Saltando")
                 continue
             else:
                 Logger.info(f"Iniciando {nombre_paso}")
             
-            if not funcion_paso():
+            if not self.ejecutor.ejecutar_paso(numero_paso, nombre_paso, funcion_paso):
                 Logger.error(f"Error en paso {numero_paso}: {nombre_paso}")
                 Logger.error("Ejecución abortada. El estado se guardó para recuperación.")
                 return False
             
             Logger.success(f"Paso {numero_paso} completado exitosamente")
         
+        # Integrar los detalles y pedidos nuevos al CSV/JSON y a la instantánea mientras se muestra el resumen
+        compactacion = None
+        if almacen_pedidos.deltas_pendientes() or almacen_pedidos.instantanea_desactualizada():
+            Logger.info("Compactando archivos consolidados en segundo plano...")
+            compactacion = almacen_pedidos.compactar_en_segundo_plano()
+        
         # Flujo completado
-        self.mostrar_resumen_final()
+        with trazas.span("resumen_final"):
+            self.mostrar_resumen_final(compactacion)
         return True
     
-    def mostrar_resumen_final(self):
+    def iniciar_servidor_metricas(self, dir_metricas: Path):
+        """Endpoint /metrics en localhost mientras dura la ejecución (sólo con CEREBRO_METRICAS_PUERTO)"""
+        puerto = os.environ.get(metricas.ENV_PUERTO)
+        if not puerto:
+            return None
+        try:
+            servidor = metricas.iniciar_servidor(dir_metricas, int(puerto))
+            Logger.info(f"📡 Métricas en http://127.0.0.1:{puerto}/metrics")
+            return servidor
+        except (OSError, ValueError) as e:
+            Logger.warning(f"No se pudo iniciar el endpoint de métricas: {e}")
+            return None
+    
+    def escribir_metricas(self, dir_metricas: Path, exito: bool, duracion: float):
+        """Acumula las métricas de la ejecución (cerebro + parsers) en el archivo .prom"""
+        try:
+            metricas.ULTIMA_EJECUCION.fijar(time.time())
+            metricas.ULTIMA_EXITO.fijar(1 if exito else 0)
+            metricas.ULTIMA_DURACION.fijar(duracion)
+            try:
+                metricas.PEDIDOS_ALMACEN.fijar(almacen_pedidos.contar_pedidos())
+            except Exception:
+                pass  # almacén aún vacío o sin crear
+            metricas.escribir_textfile(dir_metricas)
+            metricas.registro.reiniciar()  # ya sumadas a las acumuladas; el modo vigilancia sigue contando desde cero
+            for volcado in dir_metricas.glob("*.json"):
+                volcado.unlink()
+            if dir_metricas.exists():
+                dir_metricas.rmdir()
+        except Exception as e:
+            Logger.warning(f"No se pudieron escribir las métricas: {e}")
+    
+    def escribir_consumo_llm(self, ruta_consumo: Path, ruta_resumen: Path):
+        """Resumen de tokens y latencia por script, prompt y modelo"""
+        if not ruta_consumo.exists():
+            return
+        try:
+            filas = consumo_llm.escribir_resumen(ruta_consumo, ruta_resumen)
+            Logger.info(f"🔢 Consumo del LLM: {ruta_resumen}")
+            for fila in filas:
+                Logger.info(f"   {fila['script']}/{fila['prompt']} ({fila['modelo']}): {fila['llamadas']} llamadas, "
+                            f"{fila['tokens_prompt']}+{fila['tokens_respuesta']} tokens, "
+                            f"media {fila['duracion_media']:.2f}s, {fila['tokens_por_segundo']:.1f} tok/s")
+        except Exception as e:
+            Logger.warning(f"No se pudo resumir el consumo del LLM: {e}")
+    
+    def escribir_reporte_ejecucion(self, ruta_trazas: Path, ruta_progreso: Path, ruta_reporte: Path):
+        """Reporte JSON con el desglose por etapa, la latencia por pedido y el progreso final de cada parser"""
+        try:
+            chequeos = self.ejecutor.salud.instantanea()
+            reporte = trazas.escribir_reporte(ruta_trazas, ruta_reporte,
+                                              extra={"progreso": progreso.resumen(ruta_progreso), "salud": chequeos})
+            if not reporte["spans"]:
+                return
+            Logger.info(f"⏱️  Reporte de tiempos: {ruta_reporte} ({reporte['duracion_total']:.1f}s)")
+            for ruta, etapa in list(reporte["etapas"].items())[:5]:
+                Logger.info(f"   {ruta}: {etapa['total']:.1f}s ({etapa['llamadas']} llamadas)")
+            for nombre, datos in reporte["latencia_por_pedido"].items():
+                Logger.info(f"   📈 {nombre}: {datos['n']} pedidos, p50 {datos['p50']}s, p90 {datos['p90']}s, máx {datos['max']}s")
+            for evento in reporte["progreso"].values():
+                Logger.info(f"   📊 {progreso.linea_estado(evento)} en {progreso.formatear_duracion(evento['transcurrido'])}")
+            for nombre, datos in chequeos.items():
+                Logger.info(f"   🩺 {nombre}: {datos['ejecuciones']} comprobaciones ({datos['aciertos_cache']} en caché), "
+                            f"media {datos['latencia_media'] * 1000:.0f}ms")
+        except Exception as e:
+            Logger.warning(f"No se pudo generar el reporte de tiempos: {e}")
+    
+    def mostrar_resumen_final(self, compactacion: Optional[almacen_pedidos.Compactacion] = None):
         """Muestra un resumen final del proceso"""
         print(f"\n{Colors.BOLD}{Colors.GREEN}")
         print("╔" + "═" * 58 + "╗")
@@ -615,6 +1100,33 @@ class CerebroAmazonPedidos:
         print("╚" + "═" * 58 + "╝")
         print(f"{Colors.END}")
         
+        # Los archivos deben estar compactados antes de contarlos, listarlos y respaldarlos
+        compactado = True
+        if compactacion is not None:
+            compactacion.join()
+            if compactacion.error is not None:
+                compactado = False
+                Logger.error(f"Falló la compactación de archivos consolidados: {compactacion.error}")
+                Logger.warning("Los cambios siguen en los deltas; la próxima ejecución vuelve a compactar")
+            else:
+                Logger.success("Compactación de archivos consolidados completada")
+        
+        # Contar pedidos procesados (sin decodificar el histórico)
+        try:
+            Logger.success(f"   🛒 Total de pedidos procesados: {almacen_pedidos.contar_pedidos()}")
+        except Exception as e:
+            Logger.warning(f"No se pudo contar pedidos: {e}")
+        
+        # Resumen de ventas (opcional: requiere numpy)
+        try:
+            import analitica_pedidos
+            for linea in analitica_pedidos.resumen_corto():
+                Logger.info(f"   {linea}")
+        except ImportError:
+            Logger.info("   (instala numpy para ver el resumen de ventas)")
+        except Exception as e:
+            Logger.warning(f"No se pudo generar el resumen de ventas: {e}")
+        
         # Mostrar archivos finales
         Logger.info("📊 ARCHIVOS FINALES GENERADOS:")
         
@@ -629,17 +1141,11 @@ class CerebroAmazonPedidos:
             size_mb = csv_file.stat().st_size / (1024 * 1024)
             Logger.success(f"   📊 {csv_file} ({size_mb:.2f} MB)")
         
-        # Contar pedidos procesados
-        try:
-            if json_file.exists():
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    Logger.success(f"   🛒 Total de pedidos procesados: {len(data)}")
-        except Exception as e:
-            Logger.warning(f"No se pudo contar pedidos: {e}")
-        
-        # Crear backup automático de archivos finales
-        self.crear_backup_automatico()
+        # Crear backup automático de archivos finales (no de unos a medio compactar)
+        if compactado:
+            self.crear_backup_automatico()
+        else:
+            Logger.warning("Respaldo omitido: los archivos consolidados no se compactaron")
         
         # Limpiar estado al final (permite nueva ejecución sin reset manual)
         Logger.info("Limpiando estado del sistema para permitir próxima ejecución...")
@@ -650,31 +1156,190 @@ class CerebroAmazonPedidos:
         print(f"{Colors.YELLOW}💡 Tip: Puedes ejecutar 'python cerebro.py' nuevamente para buscar más ventas{Colors.END}")
     
     def crear_backup_automatico(self):
-        """Crea backup automático de archivos finales con timestamp"""
+        """Respaldo deduplicado de los archivos finales (sólo se guarda lo que cambió)"""
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-
-            json_file = CSV_DIR / "pedidos_consolidados.json"
-            csv_file = CSV_DIR / "pedidos_consolidados.csv"
-            backup_dir = CSV_DIR / "backup"
-
-            # Asegurar que el directorio de backup existe
-            backup_dir.mkdir(parents=True, exist_ok=True)
-
-            if json_file.exists():
-                backup_json = backup_dir / f"pedidos_consolidados_{timestamp}.json"
-                shutil.copy2(json_file, backup_json)  # COPIA en lugar de mover
-                Logger.success(f"Backup JSON creado: {backup_json.name}")
-
-            if csv_file.exists():
-                backup_csv = backup_dir / f"pedidos_consolidados_{timestamp}.csv"
-                shutil.copy2(csv_file, backup_csv)  # COPIA en lugar de mover
-                Logger.success(f"Backup CSV creado: {backup_csv.name}")
-
+            manifiesto = respaldo_pedidos.crear_respaldo()
+            estadisticas = manifiesto["estadisticas"]
+            Logger.success(f"Respaldo {manifiesto['id']} creado: {estadisticas['trozos_nuevos']} trozos nuevos "
+                           f"({estadisticas['bytes_nuevos'] / 1024:.1f} KB sin comprimir)")
+            
+            borrados, trozos_borrados = respaldo_pedidos.aplicar_retencion()
+            if borrados:
+                Logger.info(f"Retención: {borrados} respaldos antiguos y {trozos_borrados} trozos eliminados")
+            
         except Exception as e:
             Logger.warning(f"No se pudo crear backup automático: {e}")
             Logger.info("Los archivos principales siguen disponibles")
 
+# ============================================
+# MODO VIGILANCIA
+# ============================================
+
+class ModoVigilancia:
+    """Proceso de larga duración que procesa cada página en cuanto llega (python cerebro.py --vigilar).
+    
+    Una página de lista nueva (html/pedidos_*.html) dispara sólo la extracción (paso 3) y una
+    página de detalle nueva (html_pedidos/<id>.html) sólo el enriquecimiento (paso 5). Los
+    parsers se llaman en este proceso: la sesión con Ollama, los modelos cargados, el índice de
+    directorios y los IDs del almacén se preparan una vez y siguen en memoria entre ventas.
+    Las descargas (pasos 2 y 4) las sigue haciendo el navegador, fuera de este proceso."""
+    
+    def __init__(self, cerebro: CerebroAmazonPedidos):
+        self.cerebro = cerebro
+        self.ejecutor = cerebro.ejecutor
+        self.vigilante: Optional[Vigilante] = None
+        self.parser_tabla = None
+        self.parser_detalles = None
+        self.ids_existentes: set = set()
+        self.sin_detalles: set = set()
+        # Trabajo pendiente → fecha de escritura de la página (None: ya estaba al arrancar)
+        self.listas_pendientes: Dict[Path, Optional[float]] = {}
+        self.detalles_pendientes: Dict[str, Optional[float]] = {}
+        # Páginas de detalle que llegaron antes que la lista con su pedido
+        self.adelantadas: Dict[str, float] = {}
+        self.reintentar_desde = 0.0
+        self.ciclos = 0
+        self.procesados = {"listas": 0, "pedidos": 0, "detalles": 0}
+    
+    def ejecutar(self) -> bool:
+        self.cerebro.mostrar_banner()
+        if not self.cerebro.verificar_prerrequisitos():
+            Logger.error("No se pueden cumplir los prerrequisitos. Abortando.")
+            return False
+        
+        # Antes de importar los parsers: cliente_ollama lee el keep_alive al cargarse
+        os.environ["CEREBRO_KEEP_ALIVE"] = KEEP_ALIVE_VIGILANCIA
+        import parser_tabla_llm
+        import parser_detalles_llm
+        self.parser_tabla = parser_tabla_llm
+        self.parser_detalles = parser_detalles_llm
+        self.ejecutor.precarga.keep_alive = KEEP_ALIVE_VIGILANCIA
+        self.ejecutor.precarga.iniciar()
+        metricas.registro.agregador = True
+        servidor = self.cerebro.iniciar_servidor_metricas(REPORTES_DIR / "metricas_vigilancia")
+        
+        self.ids_existentes = almacen_pedidos.cargar_ids()
+        self.sin_detalles = set(almacen_pedidos.ids_sin_campo("direccion_envio"))
+        self.vigilante = Vigilante([HTML_DIR, HTML_PEDIDOS_DIR])
+        # Ponerse al día con lo que llegó mientras no corría
+        pagina = indice_directorios.pagina_lista_mas_reciente()
+        if pagina is not None:
+            self.listas_pendientes[pagina] = None
+        for id_pedido in self.sin_detalles & indice_directorios.ids_con_detalle():
+            self.detalles_pendientes[id_pedido] = None
+        
+        Logger.success(f"👀 Vigilando {HTML_DIR.name}/ y {HTML_PEDIDOS_DIR.name}/ cada {INTERVALO_VIGILANCIA}s "
+                       f"({len(self.ids_existentes)} pedidos en el almacén, {len(self.sin_detalles)} sin detalles). "
+                       f"Ctrl+C para salir")
+        try:
+            while True:
+                for ruta, llegada in self.vigilante.revisar():
+                    self.clasificar(ruta, llegada)
+                if (self.listas_pendientes or self.detalles_pendientes) and time.monotonic() >= self.reintentar_desde:
+                    self.ciclo()
+                time.sleep(INTERVALO_VIGILANCIA)
+        except KeyboardInterrupt:
+            print()
+            Logger.warning("Vigilancia detenida por el usuario")
+        finally:
+            if servidor is not None:
+                servidor.shutdown()
+            self.ejecutor.precarga.liberar()
+            if almacen_pedidos.deltas_pendientes() or almacen_pedidos.instantanea_desactualizada():
+                Logger.info("Compactando archivos consolidados...")
+                try:
+                    almacen_pedidos.compactar()
+                except Exception as e:
+                    Logger.error(f"Falló la compactación de archivos consolidados: {e}")
+            Logger.info(f"🏁 {self.ciclos} ciclos: {self.procesados['listas']} páginas de lista "
+                        f"({self.procesados['pedidos']} pedidos nuevos), {self.procesados['detalles']} pedidos enriquecidos; "
+                        f"{self.vigilante.revisiones} revisiones, {self.vigilante.recorridos} recorridos de directorio")
+        return True
+    
+    def clasificar(self, ruta: Path, llegada: float):
+        """Decide qué etapa necesita una página nueva o reescrita"""
+        if ruta.parent == HTML_DIR and ruta.name.startswith(PREFIJO_LISTA):
+            Logger.info(f"📄 Página de lista nueva: {ruta.name}")
+            self.listas_pendientes[ruta] = llegada
+        elif ruta.parent == HTML_PEDIDOS_DIR:
+            id_pedido = ruta.stem
+            if id_pedido in self.sin_detalles:
+                Logger.info(f"📄 Página de detalle nueva: {id_pedido}")
+                self.detalles_pendientes[id_pedido] = llegada
+            elif id_pedido not in self.ids_existentes:
+                Logger.debug(f"Página de {id_pedido} antes que su pedido: se procesará al extraerlo de la lista")
+                self.adelantadas[id_pedido] = llegada
+            else:
+                Logger.debug(f"Página de {id_pedido} ignorada: el pedido ya tiene sus detalles")
+    
+    def ciclo(self):
+        """Una ejecución corta con su propio reporte: sólo las etapas que necesitan las páginas llegadas"""
+        if not self.ejecutor.salud.verificar("ollama"):
+            Logger.warning(f"Ollama no responde: se reintenta en {REINTENTO_VIGILANCIA}s "
+                           f"({len(self.listas_pendientes)} listas y {len(self.detalles_pendientes)} pedidos en espera)")
+            self.reintentar_desde = time.monotonic() + REINTENTO_VIGILANCIA
+            return
+        if self.ejecutor.precarga.hilo is not None:
+            self.ejecutor.precarga.esperar()
+        
+        self.ciclos += 1
+        with self.cerebro.registro_ejecucion() as ejecucion:
+            exito = True
+            if self.listas_pendientes:
+                exito = self.ejecutor.ejecutar_paso(3, "Procesamiento IA", self.extraer_listas)
+            if self.detalles_pendientes:
+                exito = self.ejecutor.ejecutar_paso(5, "Extracción Detalles", self.extraer_detalles) and exito
+            ejecucion["exito"] = exito
+        trazas.olvidar_registros()  # ya están en el archivo del ciclo
+        Logger.info("👀 Esperando páginas nuevas...")
+    
+    def extraer_listas(self) -> bool:
+        """Paso 3 en proceso, sólo con las páginas de lista que llegaron"""
+        Logger.step(3, "Procesamiento de Lista de Pedidos con IA 🤖")
+        pendientes, self.listas_pendientes = self.listas_pendientes, {}
+        exito = True
+        for pagina, llegada in sorted(pendientes.items()):
+            nuevos = self.ejecutor.ejecutar_en_proceso("parser_tabla_llm", self.parser_tabla.procesar_pagina,
+                                                       pagina, self.ids_existentes)
+            if nuevos is None:
+                exito = False
+                continue
+            self.procesados["listas"] += 1
+            self.procesados["pedidos"] += len(nuevos)
+            if llegada is not None:
+                metricas.VIGILANCIA_LATENCIA.observar(time.time() - llegada, etapa="lista")
+            
+            # Los pedidos nuevos aún no tienen detalles; sus páginas pueden haber llegado antes
+            ids_nuevos = {pedido["id_pedido"] for pedido in nuevos}
+            self.sin_detalles |= ids_nuevos
+            indice_directorios.invalidar()
+            for id_pedido in ids_nuevos & indice_directorios.ids_con_detalle():
+                self.detalles_pendientes[id_pedido] = self.adelantadas.pop(id_pedido, None)
+        return exito
+    
+    def extraer_detalles(self) -> bool:
+        """Paso 5 en proceso, sólo con los pedidos cuya página de detalle llegó"""
+        Logger.step(5, "Extracción de detalles completos con IA 🎯")
+        pendientes, self.detalles_pendientes = self.detalles_pendientes, {}
+        indice_directorios.invalidar()  # leer_html busca las páginas sueltas en el índice
+        actualizaciones = self.ejecutor.ejecutar_en_proceso("parser_detalles_llm", self.parser_detalles.enriquecer,
+                                                            sorted(pendientes))
+        if actualizaciones is None:
+            return False
+        
+        ahora = time.time()
+        for id_pedido in actualizaciones:
+            self.sin_detalles.discard(id_pedido)
+            llegada = pendientes.get(id_pedido)
+            if llegada is not None:
+                metricas.VIGILANCIA_LATENCIA.observar(ahora - llegada, etapa="detalle")
+                Logger.success(f"⚡ {id_pedido} enriquecido {ahora - llegada:.1f}s después de llegar su página")
+        self.procesados["detalles"] += len(actualizaciones)
+        fallidos = len(pendientes) - len(actualizaciones)
+        if fallidos:
+            Logger.warning(f"{fallidos} pedidos sin detalles: se reintentan cuando su página se vuelva a descargar")
+        return True
+
 # ============================================
 # PUNTO DE ENTRADA PRINCIPAL
 # ============================================
@@ -691,6 +1356,7 @@ def main():
         
         # Crear y ejecutar cerebro
         cerebro = CerebroAmazonPedidos()
+        cerebro.ejecutor.perfil = perfilado.opciones(sys.argv)
         
         # Manejar argumentos de línea de comandos
         if len(sys.argv) > 1:
@@ -702,13 +1368,18 @@ def main():
             elif sys.argv[1] == "--status":
                 cerebro.mostrar_resumen_estado()
                 return
+            elif sys.argv[1] == "--vigilar":
+                sys.exit(0 if ModoVigilancia(cerebro).ejecutar() else 1)
             elif sys.argv[1] == "--help":
                 print(f"{Colors.CYAN}🧠 CEREBRO - Amazon Pedidos Automation Master{Colors.END}")
                 print(f"{Colors.WHITE}Uso: python cerebro.py [opciones]{Colors.END}")
                 print(f"{Colors.WHITE}Opciones:{Colors.END}")
                 print(f"  --reset   Reinicia el estado del sistema")
                 print(f"  --status  Muestra el estado actual")
+                print(f"  --vigilar Queda vigilando html/ y html_pedidos/ y procesa cada página nueva al llegar")
                 print(f"  --help    Muestra esta ayuda")
+                print(f"  --profile Perfila cada paso (cProfile + tracemalloc) en reportes/perfiles/")
+                print(f"            --profile-muestreo agrega muestreo de reloj de pared, --profile-top N líneas de memoria")
                 print(f"\n{Colors.YELLOW}El sistema te guiará paso a paso, empezando por el login manual{Colors.END}")
                 return
         
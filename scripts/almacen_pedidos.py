@@ -0,0 +1,457 @@
+# scripts/almacen_pedidos.py
+
+"""
+Almacén incremental de pedidos consolidados.
+
+En lugar de reescribir todo el histórico en cada ejecución:
+  - los pedidos nuevos se AGREGAN como líneas a `pedidos_consolidados.ndjson`
+    y como filas a `pedidos_consolidados.csv` (columnas fijas),
+  - los detalles que se añaden a pedidos existentes se registran como deltas
+    en `pedidos_deltas.ndjson`,
+  - una compactación periódica (en segundo plano desde cerebro.py) aplica los
+    deltas y regenera el NDJSON, el CSV y el JSON completo, además de la
+    instantánea binaria por columnas (`pedidos_instantanea.bin`, ver
+    instantanea_pedidos.py) que permite leer ids o pocas columnas sin
+    decodificar todo el histórico.
+
+`pedidos_consolidados.json` se mantiene como vista compatible para scripts
+externos y se actualiza en cada compactación.
+
+Los números de secuencia del índice de cambios (`pedidos_cambios.idx`) son marcas
+externas: la exportación a PostgreSQL y la caché de analítica los guardan. Si el
+índice falta se reconstruye desde el almacén con otra numeración y una generación
+nueva (`pedidos_cambios.gen`), que invalida esas marcas; por eso no hay que borrarlo.
+Un índice desordenado por versiones anteriores se arregla con --reparar-indice,
+que conserva las secuencias.
+
+Uso:
+    python scripts/almacen_pedidos.py --compactar
+    python scripts/almacen_pedidos.py --reparar-indice
+"""
+
+import os
+import sys
+import csv
+import json
+import shutil
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from registro_pedido import RegistroPedido, como_dict
+from instantanea_pedidos import InstantaneaPedidos, abrir_instantanea, escribir_instantanea
+
+# === CONFIGURACIÓN ===
+BASE_DIR = Path(__file__).resolve().parent.parent
+CSV_DIR = BASE_DIR / "csv"
+
+OUTPUT_JSON_CONSOLIDADO = CSV_DIR / "pedidos_consolidados.json"
+OUTPUT_CSV_CONSOLIDADO = CSV_DIR / "pedidos_consolidados.csv"
+NDJSON_CONSOLIDADO = CSV_DIR / "pedidos_consolidados.ndjson"
+NDJSON_DELTAS = CSV_DIR / "pedidos_deltas.ndjson"
+# Índice de cambios ordenado por fecha: una línea de ancho fijo por alta o delta
+INDICE_CAMBIOS = CSV_DIR / "pedidos_cambios.idx"
+# Generación del índice: cambia cada vez que se reconstruye (y se renumeran las secuencias)
+GENERACION_INDICE = CSV_DIR / "pedidos_cambios.gen"
+# Instantánea por columnas del NDJSON compactado (se lee con mmap)
+INSTANTANEA = CSV_DIR / "pedidos_instantanea.bin"
+
+# Número de deltas pendientes a partir del cual conviene compactar
+UMBRAL_DELTAS = 200
+
+# Esquema fijo de columnas (mismo orden que la tabla `ventas` de la base de datos)
+COLUMNAS = [
+    "fecha_pedido", "id_pedido", "producto", "asin", "sku", "cantidad",
+    "costo_unitario", "subtotal", "fecha_limite_envio", "estado_pedido",
+    "fecha_procesado", "direccion_envio", "telefono_comprador", "subtotal_productos",
+    "costo_envio", "total_antes_impuestos", "impuestos", "total_pedido",
+]
+
+# Formato del índice: "<fecha_cambio> <id_pedido>\n" con anchos fijos, así la
+# entrada número N (secuencia N) está en el byte (N - 1) * ANCHO_ENTRADA_INDICE.
+# La fecha es el momento en que se registró el cambio y nunca decrece, así que el
+# índice está ordenado por fecha (consulta_cambios.py busca en él por bisección)
+ANCHO_FECHA_INDICE = 26
+ANCHO_ID_INDICE = 24
+ANCHO_ENTRADA_INDICE = ANCHO_FECHA_INDICE + 1 + ANCHO_ID_INDICE + 1
+
+_bloqueo = threading.Lock()
+
+
+# Codificadores reutilizables: json.dumps con opciones crea uno nuevo en cada llamada
+_codificador_linea = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+_codificador_json = json.JSONEncoder(ensure_ascii=False, indent=2)
+
+
+def _linea(registro) -> str:
+    return _codificador_linea.encode(como_dict(registro)) + "\n"
+
+
+def _leer_ndjson(ruta: Path, hasta: int | None = None, desde: int = 0):
+    """Registros del archivo a partir del byte `desde`; con `hasta` sólo los escritos antes de ese byte."""
+    if not ruta.exists():
+        return
+    leidos = desde
+    with open(ruta, "rb") as f:
+        f.seek(desde)
+        for linea in f:
+            leidos += len(linea)
+            if hasta is not None and leidos > hasta:
+                break
+            if linea.strip():
+                yield json.loads(linea)
+
+
+def _escribir_atomico(ruta: Path, escribir, newline=None):
+    """Escribe en un archivo temporal y lo renombra sobre el destino."""
+    temporal = ruta.with_name(ruta.name + ".tmp")
+    with open(temporal, "w", encoding="utf-8", newline=newline) as f:
+        escribir(f)
+    os.replace(temporal, ruta)
+
+
+def _escribir_csv_completo(pedidos: list[dict]):
+    def escribir(f):
+        writer = csv.DictWriter(f, fieldnames=COLUMNAS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(pedidos)
+    _escribir_atomico(OUTPUT_CSV_CONSOLIDADO, escribir, newline="")
+
+
+def _escribir_json_completo(pedidos: list):
+    """Mismo resultado que json.dump(pedidos, indent=2), pedido por pedido (sin copiar la lista a dicts)."""
+    def escribir(f):
+        if not pedidos:
+            f.write("[]")
+            return
+        f.write("[\n")
+        for n, pedido in enumerate(pedidos):
+            texto = _codificador_json.encode(como_dict(pedido))
+            f.write(("" if n == 0 else ",\n") + "  " + texto.replace("\n", "\n  "))
+        f.write("\n]")
+    _escribir_atomico(OUTPUT_JSON_CONSOLIDADO, escribir)
+
+
+def migrar_si_necesario():
+    """Crea el NDJSON a partir del JSON consolidado antiguo la primera vez."""
+    if NDJSON_CONSOLIDADO.exists() or not OUTPUT_JSON_CONSOLIDADO.exists():
+        return
+    try:
+        with open(OUTPUT_JSON_CONSOLIDADO, "r", encoding="utf-8") as f:
+            contenido = f.read()
+        pedidos = json.loads(contenido) if contenido else []
+    except json.JSONDecodeError:
+        print("ADVERTENCIA: El archivo JSON existe pero esta vacio o corrupto.")
+        return
+    print(f"🔁 Migrando {len(pedidos)} pedidos al almacén incremental ({NDJSON_CONSOLIDADO.name})...")
+    _escribir_atomico(NDJSON_CONSOLIDADO, lambda f: f.writelines(_linea(p) for p in pedidos))
+    _escribir_csv_completo(pedidos)
+
+
+def _entrada_indice(fecha: str, id_pedido: str) -> str:
+    return f"{fecha[:ANCHO_FECHA_INDICE]:<{ANCHO_FECHA_INDICE}} {id_pedido[:ANCHO_ID_INDICE]:<{ANCHO_ID_INDICE}}\n"
+
+
+def _ultima_fecha_indice() -> str:
+    if not INDICE_CAMBIOS.exists() or INDICE_CAMBIOS.stat().st_size < ANCHO_ENTRADA_INDICE:
+        return ""
+    with open(INDICE_CAMBIOS, "rb") as f:
+        f.seek(-ANCHO_ENTRADA_INDICE, os.SEEK_END)
+        return f.read(ANCHO_FECHA_INDICE).decode("ascii").rstrip()
+
+
+def _registrar_en_indice(ids: list[str]):
+    """
+    Agrega los pedidos al final del índice de cambios con la fecha de ahora. Se llama
+    con _bloqueo tomado; la fecha no baja de la última entrada aunque el reloj retroceda.
+    """
+    fecha = max(datetime.now().isoformat(timespec="microseconds"), _ultima_fecha_indice())
+    with open(INDICE_CAMBIOS, "a", encoding="ascii", newline="\n") as f:
+        f.writelines(_entrada_indice(fecha, id_pedido) for id_pedido in ids)
+
+
+def generacion_indice() -> str:
+    """Generación del índice de cambios ("" si nunca se reconstruyó). Las marcas por secuencia sólo valen dentro de una."""
+    try:
+        return GENERACION_INDICE.read_text(encoding="ascii").strip()
+    except FileNotFoundError:
+        return ""
+
+
+def asegurar_indice():
+    """
+    Construye el índice de cambios a partir del almacén si todavía no existe. La
+    numeración no es la del índice anterior, así que se registra una generación nueva.
+    """
+    migrar_si_necesario()
+    if INDICE_CAMBIOS.exists() or not NDJSON_CONSOLIDADO.exists():
+        return
+    with _bloqueo:
+        if INDICE_CAMBIOS.exists():
+            return
+        print(f"🔁 Reconstruyendo el índice de cambios ({INDICE_CAMBIOS.name}); las marcas por secuencia anteriores dejan de valer")
+        cambios = sorted((fecha_cambio(p), p["id_pedido"]) for p in cargar_pedidos() if p.get("id_pedido"))
+        _escribir_atomico(GENERACION_INDICE, lambda f: f.write(datetime.now().isoformat(timespec="microseconds")))
+        _escribir_atomico(INDICE_CAMBIOS, lambda f: f.writelines(_entrada_indice(*c) for c in cambios), newline="\n")
+
+
+def reparar_indice() -> int:
+    """
+    Deja el índice ordenado por fecha sin renumerarlo: cada fecha que baja respecto de
+    la anterior se sube a esa fecha. Las secuencias y la generación no cambian, así que
+    las marcas guardadas siguen valiendo; una marca por fecha puede devolver de nuevo
+    algún cambio, nunca omitirlo. Devuelve el número de entradas corregidas.
+    """
+    if not INDICE_CAMBIOS.exists():
+        return 0
+    with _bloqueo:
+        with open(INDICE_CAMBIOS, "r", encoding="ascii", newline="\n") as f:
+            entradas = [(e[:ANCHO_FECHA_INDICE].rstrip(), e[ANCHO_FECHA_INDICE + 1:].rstrip())
+                        for e in f if len(e) == ANCHO_ENTRADA_INDICE]
+        corregidas = 0
+        maxima = ""
+        for i, (fecha, id_pedido) in enumerate(entradas):
+            if fecha < maxima:
+                entradas[i] = (maxima, id_pedido)
+                corregidas += 1
+            else:
+                maxima = fecha
+        if corregidas:
+            _escribir_atomico(INDICE_CAMBIOS, lambda f: f.writelines(_entrada_indice(*e) for e in entradas), newline="\n")
+    return corregidas
+
+
+def instantanea_vigente() -> tuple[InstantaneaPedidos | None, int]:
+    """
+    (instantánea, byte del NDJSON desde el que hay pedidos que no contiene).
+    Si no hay instantánea o no corresponde al NDJSON actual: (None, 0).
+    """
+    instantanea = abrir_instantanea(INSTANTANEA)
+    if instantanea is None:
+        return None, 0
+    origen = instantanea.origen
+    try:
+        estado = NDJSON_CONSOLIDADO.stat()
+        if estado.st_ino == origen.get("inodo") and estado.st_size >= origen.get("bytes", 0):
+            return instantanea, origen["bytes"]
+    except OSError:
+        pass
+    instantanea.cerrar()
+    return None, 0
+
+
+def instantanea_desactualizada() -> bool:
+    """True si hay pedidos en el NDJSON que la instantánea todavía no incluye."""
+    if not NDJSON_CONSOLIDADO.exists():
+        return False
+    instantanea, desde = instantanea_vigente()
+    if instantanea is None:
+        return True
+    instantanea.cerrar()
+    return NDJSON_CONSOLIDADO.stat().st_size > desde
+
+
+def cargar_ids() -> set[str]:
+    """IDs de todos los pedidos almacenados (los deltas no agregan pedidos)."""
+    migrar_si_necesario()
+    ids = set()
+    instantanea, desde = instantanea_vigente()
+    if instantanea is not None:
+        with instantanea:
+            ids.update(id_pedido for id_pedido in instantanea.columna("id_pedido") if id_pedido)
+    ids.update(p["id_pedido"] for p in _leer_ndjson(NDJSON_CONSOLIDADO, desde=desde) if p.get("id_pedido"))
+    return ids
+
+
+def ids_sin_campo(campo: str) -> list[str]:
+    """IDs (en orden de alta) de los pedidos que todavía no tienen `campo`, deltas incluidos."""
+    migrar_si_necesario()
+    pendientes = {}
+    instantanea, desde = instantanea_vigente()
+    if instantanea is not None:
+        with instantanea:
+            for fila, id_pedido in enumerate(instantanea.columna("id_pedido")):
+                if id_pedido and not instantanea.tiene(campo, fila):
+                    pendientes[id_pedido] = True
+    for pedido in _leer_ndjson(NDJSON_CONSOLIDADO, desde=desde):
+        if pedido.get("id_pedido") and campo not in pedido:
+            pendientes[pedido["id_pedido"]] = True
+    for delta in _leer_ndjson(NDJSON_DELTAS):
+        if campo in delta:
+            pendientes.pop(delta.get("id_pedido"), None)
+    return list(pendientes)
+
+
+def cargar_pedidos(fin_pedidos: int | None = None, fin_deltas: int | None = None) -> list[RegistroPedido]:
+    """
+    Todos los pedidos con los deltas pendientes ya aplicados, en orden de alta.
+    Se devuelven como RegistroPedido (Mapping de sólo lectura) para no tener el
+    histórico completo en dicts.
+    """
+    migrar_si_necesario()
+    pedidos = {}
+    for pedido in _leer_ndjson(NDJSON_CONSOLIDADO, fin_pedidos):
+        pedidos[pedido.get("id_pedido")] = RegistroPedido(pedido)
+    for delta in _leer_ndjson(NDJSON_DELTAS, fin_deltas):
+        pedido = pedidos.get(delta.get("id_pedido"))
+        if pedido is not None:
+            pedido.actualizar(delta)
+    return list(pedidos.values())
+
+
+def cargar_pedidos_por_id(ids: set[str]) -> dict[str, dict]:
+    """Sólo los pedidos indicados, con sus deltas aplicados, recorriendo los archivos sin cargarlos."""
+    migrar_si_necesario()
+    pedidos = {}
+    for pedido in _leer_ndjson(NDJSON_CONSOLIDADO):
+        if pedido.get("id_pedido") in ids:
+            pedidos[pedido["id_pedido"]] = pedido
+    for delta in _leer_ndjson(NDJSON_DELTAS):
+        pedido = pedidos.get(delta.get("id_pedido"))
+        if pedido is not None:
+            pedido.update(delta)
+    return pedidos
+
+
+def fecha_cambio(pedido: dict) -> str:
+    """Momento del último cambio del pedido: alta (fecha_procesado) o delta (fecha_actualizacion)."""
+    return max(pedido.get("fecha_procesado") or "", pedido.get("fecha_actualizacion") or "")
+
+
+def contar_pedidos() -> int:
+    """Número de pedidos almacenados sin decodificar los registros."""
+    migrar_si_necesario()
+    if not NDJSON_CONSOLIDADO.exists():
+        return 0
+    # Con el bloqueo: una compactación en curso no reemplaza los archivos entre la instantánea y el NDJSON
+    with _bloqueo:
+        total = 0
+        instantanea, desde = instantanea_vigente()
+        if instantanea is not None:
+            with instantanea:
+                total = len(instantanea)
+        with open(NDJSON_CONSOLIDADO, "rb") as f:
+            f.seek(desde)
+            return total + sum(1 for linea in f if linea.strip())
+
+
+def agregar_pedidos(nuevos: list[dict]):
+    """Agrega pedidos nuevos al final del NDJSON y del CSV."""
+    if not nuevos:
+        return
+    asegurar_indice()
+    CSV_DIR.mkdir(parents=True, exist_ok=True)
+    with _bloqueo:
+        with open(NDJSON_CONSOLIDADO, "a", encoding="utf-8") as f:
+            f.writelines(_linea(p) for p in nuevos)
+        _registrar_en_indice([p["id_pedido"] for p in nuevos if p.get("id_pedido")])
+
+        escribir_encabezado = not OUTPUT_CSV_CONSOLIDADO.exists() or OUTPUT_CSV_CONSOLIDADO.stat().st_size == 0
+        with open(OUTPUT_CSV_CONSOLIDADO, "a", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNAS, extrasaction="ignore")
+            if escribir_encabezado:
+                writer.writeheader()
+            writer.writerows(nuevos)
+    print(f"💾 {len(nuevos)} pedidos agregados a: {NDJSON_CONSOLIDADO.resolve()}")
+    print(f"🧾 {len(nuevos)} filas agregadas a: {OUTPUT_CSV_CONSOLIDADO.resolve()}")
+
+
+def registrar_deltas(actualizaciones: dict[str, dict]):
+    """Registra campos nuevos de pedidos existentes: {id_pedido: {campo: valor}}."""
+    if not actualizaciones:
+        return
+    asegurar_indice()
+    fecha_actualizacion = datetime.now().isoformat()
+    with _bloqueo:
+        with open(NDJSON_DELTAS, "a", encoding="utf-8") as f:
+            f.writelines(
+                _linea({"id_pedido": id_pedido, **campos, "fecha_actualizacion": fecha_actualizacion})
+                for id_pedido, campos in actualizaciones.items()
+            )
+        _registrar_en_indice(list(actualizaciones))
+    print(f"📝 {len(actualizaciones)} actualizaciones registradas en: {NDJSON_DELTAS.resolve()}")
+
+
+def deltas_pendientes() -> int:
+    if not NDJSON_DELTAS.exists():
+        return 0
+    with open(NDJSON_DELTAS, "rb") as f:
+        return sum(1 for linea in f if linea.strip())
+
+
+def necesita_compactacion() -> bool:
+    return deltas_pendientes() >= UMBRAL_DELTAS
+
+
+def _conservar_cola(ruta: Path, desde: int, lineas_base=()) -> int:
+    """
+    Reescribe `ruta` con `lineas_base` más lo agregado después del byte `desde`.
+    Devuelve el tamaño en bytes de la parte base.
+    """
+    temporal = ruta.with_name(ruta.name + ".tmp")
+    with open(temporal, "wb") as f:
+        for linea in lineas_base:
+            f.write(linea.encode("utf-8"))
+        tamano_base = f.tell()
+        if ruta.exists():
+            with open(ruta, "rb") as original:
+                original.seek(desde)
+                shutil.copyfileobj(original, f)
+    os.replace(temporal, ruta)
+    return tamano_base
+
+
+def compactar():
+    """Aplica los deltas y regenera NDJSON, CSV, JSON completos e instantánea."""
+    migrar_si_necesario()
+    if not NDJSON_CONSOLIDADO.exists():
+        return
+    with _bloqueo:
+        # Lo que se agregue mientras se compacta queda después de estas posiciones y se conserva
+        fin_pedidos = NDJSON_CONSOLIDADO.stat().st_size
+        fin_deltas = NDJSON_DELTAS.stat().st_size if NDJSON_DELTAS.exists() else 0
+        pedidos = cargar_pedidos(fin_pedidos, fin_deltas)
+
+        tamano = _conservar_cola(NDJSON_CONSOLIDADO, fin_pedidos, (_linea(p) for p in pedidos))
+        # La instantánea identifica el NDJSON nuevo por inodo; hasta reescribirla, la anterior no es vigente
+        escribir_instantanea(INSTANTANEA, pedidos, {
+            "inodo": NDJSON_CONSOLIDADO.stat().st_ino,
+            "bytes": tamano,
+        })
+        if NDJSON_DELTAS.exists():
+            _conservar_cola(NDJSON_DELTAS, fin_deltas)
+
+        _escribir_csv_completo(pedidos)
+        _escribir_json_completo(pedidos)
+    print(f"🗜️  Compactación completada: {len(pedidos)} pedidos en {CSV_DIR.resolve()}")
+
+
+class Compactacion(threading.Thread):
+    """Compactación en un hilo; si falla, la excepción queda en `error` para el llamador."""
+
+    def __init__(self):
+        super().__init__(daemon=False)
+        self.error: Exception | None = None
+
+    def run(self):
+        try:
+            compactar()
+        except Exception as e:
+            self.error = e
+
+
+def compactar_en_segundo_plano() -> Compactacion:
+    """Lanza la compactación en un hilo; el llamador debe hacer join() y revisar `error` antes de salir."""
+    hilo = Compactacion()
+    hilo.start()
+    return hilo
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--compactar":
+        compactar()
+    elif len(sys.argv) > 1 and sys.argv[1] == "--reparar-indice":
+        print(f"🔧 Entradas del índice de cambios corregidas: {reparar_indice()} (las secuencias no cambian)")
+    else:
+        print(f"Pedidos almacenados: {contar_pedidos()} | Deltas pendientes: {deltas_pendientes()}")
+        print("Uso: python scripts/almacen_pedidos.py --compactar | --reparar-indice")
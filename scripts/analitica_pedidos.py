@@ -0,0 +1,199 @@
+# scripts/analitica_pedidos.py
+
+"""
+Resumen analítico de los pedidos consolidados con NumPy.
+
+Los pedidos se convierten una sola vez a columnas:
+  - fechas como datetime64[D],
+  - importes como float64 (NaN cuando no hay dato),
+  - SKU y estado como códigos categóricos (int32) + tabla de categorías.
+
+Las columnas se guardan en `csv/analitica_cache/` (.npy) junto con la firma del
+almacén; mientras el almacén no cambie, los reportes leen las columnas con
+memory-map y calculan los agregados de forma vectorizada.
+
+Requiere: pip install numpy
+
+Uso:
+    python scripts/analitica_pedidos.py                 # reporte completo
+    python scripts/analitica_pedidos.py --top 20        # top 20 SKU por ingreso
+    python scripts/analitica_pedidos.py --reconstruir   # ignora la caché de columnas
+"""
+
+import re
+import sys
+import json
+from datetime import date
+
+import numpy as np
+
+from almacen_pedidos import CSV_DIR, cargar_pedidos, generacion_indice
+from consulta_cambios import secuencia_actual
+import metricas
+
+# === CONFIGURACIÓN ===
+CACHE_DIR = CSV_DIR / "analitica_cache"
+META_CACHE = CACHE_DIR / "meta.json"
+VERSION_CACHE = 1
+
+# Estados (en minúsculas) que cuentan como envío pendiente
+ESTADOS_PENDIENTES = {"pendiente", "no enviado", "sin enviar", "por enviar", "unshipped"}
+
+REGEX_FECHA_ISO = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+COLUMNAS_FECHA = ["fecha_pedido", "fecha_limite_envio"]
+COLUMNAS_IMPORTE = ["subtotal", "total_pedido", "cantidad"]
+COLUMNAS_CATEGORIA = ["sku", "estado_pedido"]
+
+
+def firma_almacen() -> dict:
+    """
+    Identifica el contenido actual del almacén: la secuencia de cambios avanza con
+    cada alta o delta y no cambia al compactar, así la caché sobrevive a la compactación.
+    Si el índice se reconstruye la secuencia se renumera, pero cambia la generación.
+    """
+    seq = secuencia_actual()  # reconstruye el índice si falta, antes de leer la generación
+    return {"version": VERSION_CACHE, "seq": seq, "generacion": generacion_indice()}
+
+
+def _fecha(valor) -> str:
+    return valor if isinstance(valor, str) and REGEX_FECHA_ISO.match(valor) else "NaT"
+
+
+def _importe(valor) -> float:
+    try:
+        return float(valor) if valor not in (None, "") else np.nan
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def construir_columnas(pedidos: list[dict]) -> tuple[dict, dict]:
+    """Convierte la lista de pedidos a columnas NumPy y categorías."""
+    columnas = {}
+    categorias = {}
+    for nombre in COLUMNAS_FECHA:
+        columnas[nombre] = np.array([_fecha(p.get(nombre)) for p in pedidos], dtype="datetime64[D]")
+    for nombre in COLUMNAS_IMPORTE:
+        columnas[nombre] = np.array([_importe(p.get(nombre)) for p in pedidos], dtype=np.float64)
+    for nombre in COLUMNAS_CATEGORIA:
+        valores = np.array([str(p.get(nombre) or "") for p in pedidos], dtype=object)
+        if len(valores):
+            unicos, codigos = np.unique(valores, return_inverse=True)
+        else:
+            unicos, codigos = np.array([], dtype=object), np.array([], dtype=np.int64)
+        columnas[nombre] = codigos.astype(np.int32)
+        categorias[nombre] = unicos.tolist()
+    return columnas, categorias
+
+
+def cargar_columnas(forzar: bool = False) -> tuple[dict, dict]:
+    """Columnas desde la caché si sigue vigente; si no, se reconstruyen y se guardan."""
+    firma = firma_almacen()
+    if not forzar and META_CACHE.exists():
+        try:
+            meta = json.loads(META_CACHE.read_text(encoding="utf-8"))
+            if meta.get("firma") == firma:
+                columnas = {
+                    nombre: np.load(CACHE_DIR / f"{nombre}.npy", mmap_mode="r")
+                    for nombre in COLUMNAS_FECHA + COLUMNAS_IMPORTE + COLUMNAS_CATEGORIA
+                }
+                metricas.CACHE.inc(cache="analitica_columnas", resultado="acierto")
+                return columnas, meta["categorias"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    metricas.CACHE.inc(cache="analitica_columnas", resultado="fallo")
+    columnas, categorias = construir_columnas(cargar_pedidos())
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    for nombre, columna in columnas.items():
+        np.save(CACHE_DIR / f"{nombre}.npy", columna)
+    META_CACHE.write_text(json.dumps({"firma": firma, "categorias": categorias}, ensure_ascii=False),
+                          encoding="utf-8")
+    return columnas, categorias
+
+
+def ingreso_por_pedido(columnas: dict) -> np.ndarray:
+    """total_pedido cuando existe (paso 5), si no el subtotal de la lista."""
+    total = np.asarray(columnas["total_pedido"])
+    subtotal = np.asarray(columnas["subtotal"])
+    return np.nan_to_num(np.where(np.isnan(total), subtotal, total))
+
+
+def totales_diarios(columnas: dict) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(días, número de pedidos, ingreso) agrupados por fecha_pedido."""
+    fechas = np.asarray(columnas["fecha_pedido"])
+    validas = ~np.isnat(fechas)
+    dias, indices = np.unique(fechas[validas], return_inverse=True)
+    conteo = np.bincount(indices, minlength=len(dias))
+    ingreso = np.bincount(indices, weights=ingreso_por_pedido(columnas)[validas], minlength=len(dias))
+    return dias, conteo, ingreso
+
+
+def ingresos_por_sku(columnas: dict, categorias: dict) -> tuple[list[str], np.ndarray, np.ndarray]:
+    """(SKU, unidades, ingreso) por SKU, ordenado de mayor a menor ingreso."""
+    codigos = np.asarray(columnas["sku"])
+    n = len(categorias["sku"])
+    unidades = np.bincount(codigos, weights=np.nan_to_num(np.asarray(columnas["cantidad"]), nan=1.0), minlength=n)
+    ingreso = np.bincount(codigos, weights=ingreso_por_pedido(columnas), minlength=n)
+    orden = np.argsort(-ingreso, kind="stable")
+    return [categorias["sku"][i] for i in orden], unidades[orden], ingreso[orden]
+
+
+def pendientes_por_fecha_limite(columnas: dict, categorias: dict) -> tuple[np.ndarray, np.ndarray]:
+    """(fecha límite, número de pedidos) de los envíos pendientes."""
+    codigos_pendientes = [i for i, estado in enumerate(categorias["estado_pedido"])
+                          if estado.strip().lower() in ESTADOS_PENDIENTES]
+    limite = np.asarray(columnas["fecha_limite_envio"])
+    mascara = np.isin(np.asarray(columnas["estado_pedido"]), codigos_pendientes) & ~np.isnat(limite)
+    dias, conteo = np.unique(limite[mascara], return_counts=True)
+    return dias, conteo
+
+
+def resumen_corto() -> list[str]:
+    """Líneas breves para el resumen final de cerebro.py."""
+    columnas, categorias = cargar_columnas()
+    if not len(columnas["fecha_pedido"]):
+        return []
+    dias, conteo, ingreso = totales_diarios(columnas)
+    skus, _, ingreso_sku = ingresos_por_sku(columnas, categorias)
+    _, pendientes = pendientes_por_fecha_limite(columnas, categorias)
+    lineas = [f"💰 Ingreso total: {ingreso_por_pedido(columnas).sum():,.2f}"]
+    if len(dias):
+        lineas.append(f"📅 Último día con ventas: {dias[-1]} ({conteo[-1]} pedidos, {ingreso[-1]:,.2f})")
+    if skus:
+        lineas.append(f"🏷️  SKU con más ingreso: {skus[0] or '(sin SKU)'} ({ingreso_sku[0]:,.2f})")
+    lineas.append(f"🚚 Envíos pendientes: {int(pendientes.sum())}")
+    return lineas
+
+
+def main():
+    top = int(sys.argv[sys.argv.index("--top") + 1]) if "--top" in sys.argv else 10
+    columnas, categorias = cargar_columnas(forzar="--reconstruir" in sys.argv)
+    total_pedidos = len(columnas["fecha_pedido"])
+    if not total_pedidos:
+        print("ℹ️ No hay pedidos para analizar.")
+        return
+
+    print(f"📊 Resumen de {total_pedidos} pedidos (ingreso total {ingreso_por_pedido(columnas).sum():,.2f})")
+
+    print("\n📅 Últimos 14 días con ventas:")
+    dias, conteo, ingreso = totales_diarios(columnas)
+    for dia, n, monto in zip(dias[-14:], conteo[-14:], ingreso[-14:]):
+        print(f"   {dia}  {n:>5} pedidos  {monto:>12,.2f}")
+
+    print(f"\n🏷️  Top {top} SKU por ingreso:")
+    skus, unidades, ingreso_sku = ingresos_por_sku(columnas, categorias)
+    for sku, u, monto in list(zip(skus, unidades, ingreso_sku))[:top]:
+        print(f"   {sku or '(sin SKU)':<30} {u:>7.0f} uds  {monto:>12,.2f}")
+
+    print("\n🚚 Envíos pendientes por fecha límite:")
+    dias_limite, pendientes = pendientes_por_fecha_limite(columnas, categorias)
+    hoy = np.datetime64(date.today().isoformat(), "D")
+    if not len(dias_limite):
+        print("   (ninguno)")
+    for dia, n in zip(dias_limite, pendientes):
+        marca = "⚠️ vencido" if dia < hoy else ""
+        print(f"   {dia}  {n:>5} pedidos {marca}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+# scripts/archivo_html.py
+
+"""
+Archivo comprimido de las páginas de detalle ya procesadas (html_pedidos/).
+
+Las páginas cuyo pedido ya tiene detalles se mueven a segmentos comprimidos:
+
+    html_pedidos/archivo/segmento_00001.pack   páginas comprimidas (xz), una tras otra
+    html_pedidos/archivo/indice.tsv            id_pedido, segmento, desplazamiento, longitud
+
+Cada página se comprime por separado, así leer una sola página no descomprime
+las vecinas. Los segmentos y el índice sólo crecen (se agregan al final); si
+una página se archiva dos veces, vale la última entrada del índice.
+
+`leer_html(id_pedido)` devuelve la página esté suelta en html_pedidos/ o en el
+archivo, por lo que parser_detalles_llm.py no necesita saber dónde está.
+
+Uso:
+    python scripts/archivo_html.py --archivar   # archiva las páginas de pedidos con detalles
+    python scripts/archivo_html.py              # estadísticas
+"""
+
+import os
+import sys
+import lzma
+from pathlib import Path
+
+from indice_directorios import HTML_PEDIDOS_DIR, indice as indice_directorios
+
+# === CONFIGURACIÓN ===
+ARCHIVO_DIR = HTML_PEDIDOS_DIR / "archivo"
+INDICE_ARCHIVO = ARCHIVO_DIR / "indice.tsv"
+
+# Tamaño a partir del cual se empieza un segmento nuevo
+TAMANO_MAXIMO_SEGMENTO = 64 * 1024 * 1024
+PRESET_COMPRESION = 6
+# Páginas que se escriben antes de sincronizar segmento e índice con el disco y borrar las sueltas
+LOTE_SINCRONIZACION = 50
+
+_indice_cache: dict[str, tuple[int, int, int]] | None = None
+
+
+def _ruta_segmento(numero: int) -> Path:
+    return ARCHIVO_DIR / f"segmento_{numero:05d}.pack"
+
+
+def _sincronizar_directorio(directorio: Path):
+    """fsync del directorio, para que un segmento o un índice recién creados no se pierdan en un corte.
+    En Windows un directorio no se puede abrir así (NTFS ya registra la entrada en su diario)."""
+    if os.name == "nt":
+        return
+    fd = os.open(directorio, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def cargar_indice() -> dict[str, tuple[int, int, int]]:
+    """{id_pedido: (segmento, desplazamiento, longitud)}; se lee una vez por proceso."""
+    global _indice_cache
+    if _indice_cache is None:
+        _indice_cache = {}
+        if INDICE_ARCHIVO.exists():
+            with open(INDICE_ARCHIVO, "r", encoding="ascii") as f:
+                for linea in f:
+                    partes = linea.rstrip("\n").split("\t")
+                    if len(partes) == 4:  # una línea a medio escribir se ignora
+                        _indice_cache[partes[0]] = (int(partes[1]), int(partes[2]), int(partes[3]))
+    return _indice_cache
+
+
+def esta_archivado(id_pedido: str) -> bool:
+    return id_pedido in cargar_indice()
+
+
+def leer_html(id_pedido: str) -> str | None:
+    """Página de detalle del pedido, suelta o archivada. None si no existe."""
+    suelta = indice_directorios.ruta_detalle(id_pedido)
+    if suelta is not None:
+        return suelta.read_text(encoding="utf-8")
+    ubicacion = cargar_indice().get(id_pedido)
+    if ubicacion is None:
+        return None
+    segmento, desplazamiento, longitud = ubicacion
+    with open(_ruta_segmento(segmento), "rb") as f:
+        f.seek(desplazamiento)
+        return lzma.decompress(f.read(longitud)).decode("utf-8")
+
+
+def archivar(ids: list[str]) -> tuple[int, int, int]:
+    """
+    Mueve al archivo las páginas sueltas de `ids`. Cada página se borra de
+    html_pedidos/ sólo después de que el segmento, el índice y el directorio del
+    archivo estén sincronizados con el disco (os.fsync), por lotes de
+    LOTE_SINCRONIZACION páginas: un corte de luz nunca deja una página borrada
+    sin su entrada en el índice. Devuelve (páginas archivadas, bytes originales,
+    bytes comprimidos).
+    """
+    ubicaciones = cargar_indice()
+    ARCHIVO_DIR.mkdir(parents=True, exist_ok=True)
+    segmento = max((s for s, _, _ in ubicaciones.values()), default=1)
+    archivadas = bytes_originales = bytes_comprimidos = 0
+    # (id_pedido, página suelta) ya escritas en el archivo pero todavía no sincronizadas
+    pendientes: list[tuple[str, Path]] = []
+
+    def sincronizar_y_borrar():
+        if not pendientes:
+            return
+        f_segmento.flush()
+        os.fsync(f_segmento.fileno())
+        f_indice.flush()
+        os.fsync(f_indice.fileno())
+        _sincronizar_directorio(ARCHIVO_DIR)
+        for id_pedido, suelta in pendientes:
+            suelta.unlink()
+            indice_directorios.olvidar_detalle(id_pedido)
+        pendientes.clear()
+
+    with open(INDICE_ARCHIVO, "a", encoding="ascii") as f_indice:
+        f_segmento = open(_ruta_segmento(segmento), "ab")
+        try:
+            for id_pedido in ids:
+                suelta = indice_directorios.ruta_detalle(id_pedido)
+                if suelta is None:
+                    continue
+                original = suelta.read_bytes()
+                comprimido = lzma.compress(original, preset=PRESET_COMPRESION)
+
+                if f_segmento.tell() + len(comprimido) > TAMANO_MAXIMO_SEGMENTO and f_segmento.tell() > 0:
+                    sincronizar_y_borrar()
+                    f_segmento.close()
+                    segmento += 1
+                    f_segmento = open(_ruta_segmento(segmento), "ab")
+                desplazamiento = f_segmento.tell()
+                f_segmento.write(comprimido)
+
+                f_indice.write(f"{id_pedido}\t{segmento}\t{desplazamiento}\t{len(comprimido)}\n")
+                ubicaciones[id_pedido] = (segmento, desplazamiento, len(comprimido))
+                pendientes.append((id_pedido, suelta))
+                if len(pendientes) >= LOTE_SINCRONIZACION:
+                    sincronizar_y_borrar()
+
+                archivadas += 1
+                bytes_originales += len(original)
+                bytes_comprimidos += len(comprimido)
+            sincronizar_y_borrar()
+        finally:
+            f_segmento.close()
+    return archivadas, bytes_originales, bytes_comprimidos
+
+
+def contar_paginas() -> tuple[int, int]:
+    """(páginas sueltas en html_pedidos/, páginas archivadas)."""
+    return indice_directorios.contar_detalles(), len(cargar_indice())
+
+
+def imprimir_archivado(archivadas: int, bytes_originales: int, bytes_comprimidos: int):
+    if archivadas:
+        proporcion = bytes_originales / max(bytes_comprimidos, 1)
+        print(f"🗄️  {archivadas} páginas archivadas: {bytes_originales / 1024:.0f} KB → "
+              f"{bytes_comprimidos / 1024:.0f} KB ({proporcion:.1f}x)")
+
+
+def main():
+    if "--archivar" in sys.argv:
+        from almacen_pedidos import cargar_ids, ids_sin_campo
+
+        # Sólo las páginas de pedidos que ya tienen detalles (las demás las necesita el paso 5)
+        procesados = cargar_ids() - set(ids_sin_campo("direccion_envio"))
+        sueltas = [id_pedido for id_pedido in indice_directorios.ids_con_detalle() if id_pedido in procesados]
+        imprimir_archivado(*archivar(sueltas))
+    sueltas, archivadas = contar_paginas()
+    tamano = sum(ruta.stat().st_size for ruta in ARCHIVO_DIR.glob("*.pack")) if ARCHIVO_DIR.exists() else 0
+    print(f"📄 Páginas sueltas: {sueltas} | Archivadas: {archivadas} ({tamano / (1024 * 1024):.2f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,401 @@
+# scripts/benchmark_rendimiento.py
+
+"""
+Benchmark de las rutas críticas deterministas (sin LLM ni navegador).
+
+Para cada tamaño de corpus (100, 1.000, 10.000 y 100.000 pedidos) se genera un
+árbol temporal con una copia de cerebro.py y scripts/, una página de lista
+sintética y una página de detalle por pedido. Las mediciones corren en un
+subproceso dentro de ese árbol, así nunca tocan csv/, html/ ni el estado reales.
+
+Casos medidos:
+  limpiar_html_y_guardar, dividir_en_pedidos, extraer_id_del_bloque,
+  encontrar_seccion_pedidos, agregar_pedidos
+  (guardar NDJSON + CSV), cargar_pedidos, cargar_ids, compactar (escribe
+  NDJSON, CSV, JSON e instantánea) y EstadoSistema.guardar_estado.
+
+Arranque: tiempo de importación (`python -X importtime`) de cerebro.py y de los
+parsers, y tiempo total de `python cerebro.py --help`, con la caché de bytecode
+caliente. Además de compararse con la base, cada uno tiene un presupuesto fijo
+(PRESUPUESTO_ARRANQUE): superarlo también es un fallo.
+
+Cada caso se repite y se toma el mejor tiempo. Los resultados se comparan con
+la línea base (reportes/benchmark_base.json): el benchmark termina con código
+1 si algún caso es más lento que la base por encima de la tolerancia. Los tiempos
+dependen de la máquina, así que la base no se versiona: se registra en cada máquina
+con --guardar-base antes del cambio. Si la base no existe o le faltan
+casos medidos (p. ej. se guardó con --solo-arranque) el benchmark termina con código 2,
+salvo con --sin-base, que compara sólo los casos con referencia y revisa los presupuestos.
+
+Uso:
+    python scripts/benchmark_rendimiento.py                       # compara con la base
+    python scripts/benchmark_rendimiento.py --guardar-base        # registra la base
+    python scripts/benchmark_rendimiento.py --sin-base            # acepta casos sin referencia en la base
+    python scripts/benchmark_rendimiento.py --tamanos 100,1000 --tolerancia 0.2
+    python scripts/benchmark_rendimiento.py --solo-arranque
+"""
+
+import gc
+import io
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import tempfile
+import subprocess
+from contextlib import redirect_stdout
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# === CONFIGURACIÓN ===
+BASE_DIR = Path(__file__).resolve().parent.parent
+SCRIPTS_DIR = BASE_DIR / "scripts"
+ARCHIVO_BASE = BASE_DIR / "reportes" / "benchmark_base.json"
+ARCHIVO_ULTIMO = BASE_DIR / "reportes" / "benchmark_ultimo.json"
+
+TAMANOS = [100, 1_000, 10_000, 100_000]
+# Repeticiones mínimas por tamaño (se toma el mejor tiempo); los casos rápidos se
+# repiten hasta sumar TIEMPO_MINIMO segundos (o MAXIMO_REPETICIONES) para reducir el ruido
+REPETICIONES = {100: 7, 1_000: 5, 10_000: 3, 100_000: 1}
+TIEMPO_MINIMO = 1.0
+MAXIMO_REPETICIONES = 50
+# Regresión: más lento que la base en más de TOLERANCIA (proporción) y más de MINIMO_SEGUNDOS
+TOLERANCIA = 0.25
+MINIMO_SEGUNDOS = 0.005
+SEMILLA = 20250717
+
+# Arranque: módulos cuya importación se mide y presupuesto (segundos) de cada medición
+MODULOS_ARRANQUE = ["cerebro", "parser_tabla_llm", "parser_detalles_llm"]
+PRESUPUESTO_ARRANQUE = {
+    "import cerebro": 0.060,
+    "import parser_tabla_llm": 0.150,   # incluye bs4, que el parser usa siempre
+    "import parser_detalles_llm": 0.060,
+    "cerebro.py --help": 0.150,         # proceso completo, intérprete incluido
+}
+REPETICIONES_ARRANQUE = 7
+
+PRODUCTOS = ["Funda para celular", "Cable USB-C 2m", "Audífonos inalámbricos", "Soporte para laptop",
+             "Lámpara LED escritorio", "Mouse ergonómico", "Teclado mecánico", "Cargador rápido 65W"]
+ESTADOS = ["Pendiente", "Enviado", "No enviado", "Cancelado"]
+
+
+# --- Corpus sintético ---
+
+def _id_pedido(i: int) -> str:
+    return f"{700 + i % 10:03d}-{1000000 + i:07d}-{2000000 + (i * 7919) % 8000000:07d}"
+
+
+def generar_pedidos(tamano: int) -> list[dict]:
+    """Pedidos con el esquema de almacen_pedidos.COLUMNAS (campos de la lista)."""
+    azar = random.Random(SEMILLA)
+    inicio = date(2025, 1, 1)
+    pedidos = []
+    for i in range(tamano):
+        fecha = inicio + timedelta(days=azar.randrange(200))
+        cantidad = azar.randint(1, 4)
+        costo = round(azar.uniform(99, 2500), 2)
+        sku = f"SKU-{azar.randrange(max(10, tamano // 20)):05d}"
+        pedidos.append({
+            "fecha_pedido": fecha.isoformat(),
+            "id_pedido": _id_pedido(i),
+            "producto": azar.choice(PRODUCTOS),
+            "asin": f"B0{azar.randrange(16 ** 8):08X}",
+            "sku": sku,
+            "cantidad": cantidad,
+            "costo_unitario": costo,
+            "subtotal": round(costo * cantidad, 2),
+            "fecha_limite_envio": (fecha + timedelta(days=3)).isoformat(),
+            "estado_pedido": azar.choice(ESTADOS),
+            "fecha_procesado": datetime(2025, 7, 17, 12, 0, 0).isoformat(),
+        })
+    return pedidos
+
+
+def generar_pagina_lista(pedidos: list[dict]) -> str:
+    """Página de lista con la estructura que espera dividir_en_pedidos (bloques 'hace ...' → 'Más información', '«')."""
+    partes = ["<html><head><script>var datos = {};</script><style>.x{color:red}</style></head>",
+              "<body><div id='main-content'><h1>Pedidos</h1><table class='orders'>"]
+    for i, p in enumerate(pedidos):
+        partes.append(
+            f"<tr class='order-row'><td><div>hace {i % 23 + 1} horas</div><div>{p['fecha_pedido']}</div></td>"
+            f"<td><div>{p['id_pedido']}</div><span>Comprador: Cliente {i}</span></td>"
+            f"<td><p>{p['producto']}</p><p>ASIN: {p['asin']}</p><p>SKU: {p['sku']}</p>"
+            f"<p>Cantidad: {p['cantidad']}</p><p>$ {p['costo_unitario']:.2f}</p></td>"
+            f"<td><p>Enviar antes de {p['fecha_limite_envio']}</p><p>{p['estado_pedido']}</p>"
+            f"<p>Más información</p><p>«</p></td></tr>"
+        )
+    partes.append("</table></div><footer>Amazon Seller Central</footer></body></html>")
+    return "\n".join(partes)
+
+
+def generar_arbol(destino: Path, tamano: int):
+    """Árbol temporal con el código actual y el corpus del tamaño indicado."""
+    shutil.copy2(BASE_DIR / "cerebro.py", destino / "cerebro.py")
+    shutil.copytree(SCRIPTS_DIR, destino / "scripts", ignore=shutil.ignore_patterns("__pycache__", "*.js"))
+    for carpeta in ("html", "html_pedidos", "csv", "reportes"):
+        (destino / carpeta).mkdir()
+
+    pedidos = generar_pedidos(tamano)
+    (destino / "html" / "pedidos_20250717.html").write_text(generar_pagina_lista(pedidos), encoding="utf-8")
+    for p in pedidos:
+        (destino / "html_pedidos" / f"{p['id_pedido']}.html").write_text(
+            f"<html><body><p>Pedido {p['id_pedido']}</p><p>Enviar a: Cliente</p></body></html>", encoding="utf-8")
+    (destino / "corpus.json").write_text(json.dumps(pedidos, ensure_ascii=False), encoding="utf-8")
+
+
+# --- Mediciones (dentro del árbol temporal) ---
+
+def medir(preparar, ejecutar, repeticiones: int) -> float:
+    """Mejor tiempo de `ejecutar(preparar())` en segundos; la salida por consola se descarta."""
+    mejor = float("inf")
+    total = 0.0
+    hechas = 0
+    while hechas < repeticiones or (total < TIEMPO_MINIMO and hechas < MAXIMO_REPETICIONES):
+        with redirect_stdout(io.StringIO()):
+            argumento = preparar()
+            gc.collect()
+            inicio = time.perf_counter()
+            ejecutar(argumento)
+            duracion = time.perf_counter() - inicio
+        mejor = min(mejor, duracion)
+        total += duracion
+        hechas += 1
+    return mejor
+
+
+def trabajador(tamano: int) -> dict:
+    """Corre en el árbol temporal: importa el código copiado y mide cada caso."""
+    raiz = Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(raiz))
+    import almacen_pedidos
+    import parser_tabla_llm
+    from cerebro import EstadoSistema, STATE_FILE, MANIFIESTOS_FILE
+
+    pedidos = json.loads((raiz / "corpus.json").read_text(encoding="utf-8"))
+    html = raiz / "html" / "pedidos_20250717.html"
+    txt = raiz / "html" / "pedidos_limpio_20250717.txt"
+    repeticiones = REPETICIONES.get(tamano, 3)
+    sin_preparar = lambda: None
+    resultados = {}
+
+    resultados["limpiar_html_y_guardar"] = medir(
+        sin_preparar, lambda _: parser_tabla_llm.limpiar_html_y_guardar(html, txt), repeticiones)
+    texto = txt.read_text(encoding="utf-8")
+    resultados["dividir_en_pedidos"] = medir(
+        sin_preparar, lambda _: parser_tabla_llm.dividir_en_pedidos(texto), repeticiones)
+    bloques = parser_tabla_llm.dividir_en_pedidos(texto)
+    resultados["extraer_id_del_bloque"] = medir(
+        sin_preparar, lambda _: [parser_tabla_llm.extraer_id_del_bloque(b) for b in bloques], repeticiones)
+
+    import parser_html_llm_v2_optimizado
+    html_crudo = html.read_text(encoding="utf-8")
+    resultados["encontrar_seccion_pedidos"] = medir(
+        sin_preparar, lambda _: parser_html_llm_v2_optimizado.encontrar_seccion_pedidos(html_crudo), repeticiones)
+
+    def almacen_vacio():
+        shutil.rmtree(almacen_pedidos.CSV_DIR)
+        almacen_pedidos.CSV_DIR.mkdir()
+    resultados["agregar_pedidos"] = medir(
+        almacen_vacio, lambda _: almacen_pedidos.agregar_pedidos(pedidos), repeticiones)
+    resultados["cargar_pedidos"] = medir(sin_preparar, lambda _: almacen_pedidos.cargar_pedidos(), repeticiones)
+    resultados["cargar_ids"] = medir(sin_preparar, lambda _: almacen_pedidos.cargar_ids(), repeticiones)
+
+    # Compactación con un 10% de pedidos enriquecidos (paso 5)
+    detalles = {p["id_pedido"]: {"direccion_envio": "Calle 1, CDMX", "total_pedido": p["subtotal"]}
+                for p in pedidos[::10]}
+    def almacen_con_deltas():
+        almacen_vacio()
+        almacen_pedidos.agregar_pedidos(pedidos)
+        almacen_pedidos.registrar_deltas(detalles)
+    resultados["compactar"] = medir(almacen_con_deltas, lambda _: almacen_pedidos.compactar(), repeticiones)
+
+    # Estado tras el paso 4: manifiesto de una página de detalle por pedido
+    paginas = [str(ruta) for ruta in (raiz / "html_pedidos").iterdir()]
+    def estado_nuevo():
+        for ruta in (STATE_FILE, MANIFIESTOS_FILE):
+            if ruta.exists():
+                ruta.unlink()
+        estado = EstadoSistema()
+        estado.marcar_inicio()
+        return estado
+    resultados["guardar_estado"] = medir(estado_nuevo, lambda estado: estado.guardar_estado(4, paginas, len(paginas)), repeticiones)
+    return resultados
+
+
+def ejecutar_tamano(tamano: int) -> dict:
+    with tempfile.TemporaryDirectory(prefix=f"benchmark_{tamano}_") as temporal:
+        arbol = Path(temporal)
+        print(f"📦 Generando corpus de {tamano} pedidos...")
+        generar_arbol(arbol, tamano)
+        env = entorno_limpio()
+        salida = subprocess.run(
+            [sys.executable, str(arbol / "scripts" / Path(__file__).name), "--trabajador", str(tamano)],
+            cwd=arbol, env=env, capture_output=True, text=True, encoding="utf-8",
+        )
+        if salida.returncode != 0:
+            raise RuntimeError(f"falló el benchmark de {tamano} pedidos:\n{salida.stderr[-2000:]}")
+        return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def entorno_limpio() -> dict:
+    """Entorno del subproceso sin las variables de la ejecución de cerebro en curso."""
+    env = dict(os.environ, PYTHONIOENCODING="utf-8", CEREBRO_EXPORTAR_BD="0")
+    for variable in ("CEREBRO_TRAZAS", "CEREBRO_METRICAS", "CEREBRO_CONSUMO_LLM", "CEREBRO_PROGRESO"):
+        env.pop(variable, None)
+    return env
+
+
+def _importtime(salida: str, modulo: str) -> tuple[float, list[tuple[int, str]]]:
+    """Tiempo acumulado de `modulo` (segundos) y los imports más costosos según -X importtime."""
+    total = 0.0
+    costos = []
+    for linea in salida.splitlines():
+        if not linea.startswith("import time:") or "|" not in linea:
+            continue
+        _, propio, acumulado, nombre = (parte.strip() for parte in linea.replace("import time:", "|").split("|"))
+        if not acumulado.isdigit():
+            continue  # cabecera
+        if nombre == "site":
+            costos = []  # lo anterior es el arranque del intérprete
+            continue
+        costos.append((int(acumulado), nombre))
+        if nombre == modulo:
+            total = int(acumulado) / 1e6
+    return total, sorted(costos, reverse=True)[1:6]
+
+
+def medir_arranque() -> tuple[dict, dict]:
+    """Mejor tiempo de importación de cada módulo y de `cerebro.py --help` en un árbol temporal."""
+    with tempfile.TemporaryDirectory(prefix="benchmark_arranque_") as temporal:
+        arbol = Path(temporal)
+        shutil.copy2(BASE_DIR / "cerebro.py", arbol / "cerebro.py")
+        shutil.copytree(SCRIPTS_DIR, arbol / "scripts", ignore=shutil.ignore_patterns("__pycache__", "*.js"))
+        env = entorno_limpio()
+        env.pop("PYTHONDONTWRITEBYTECODE", None)  # como en producción: la primera corrida deja los .pyc
+        resultados = {}
+        detalle = {}
+        for modulo in MODULOS_ARRANQUE:
+            codigo = f"import sys; sys.argv = ['{modulo}']; sys.path[:0] = ['.', 'scripts']; import {modulo}"
+            mejor = float("inf")
+            for _ in range(REPETICIONES_ARRANQUE + 1):  # la primera compila y se descarta
+                salida = subprocess.run([sys.executable, "-X", "importtime", "-c", codigo], cwd=arbol, env=env,
+                                        capture_output=True, text=True, encoding="utf-8")
+                if salida.returncode != 0:
+                    raise RuntimeError(f"no se pudo importar {modulo}:\n{salida.stderr[-2000:]}")
+                segundos, costos = _importtime(salida.stderr, modulo)
+                if segundos < mejor:
+                    mejor, detalle[f"import {modulo}"] = segundos, costos
+            resultados[f"import {modulo}"] = mejor
+
+        mejor = float("inf")
+        for _ in range(REPETICIONES_ARRANQUE + 1):
+            inicio = time.perf_counter()
+            subprocess.run([sys.executable, "cerebro.py", "--help"], cwd=arbol, env=env, capture_output=True)
+            mejor = min(mejor, time.perf_counter() - inicio)
+        resultados["cerebro.py --help"] = mejor
+        return resultados, detalle
+
+
+def verificar_presupuesto(arranque: dict, detalle: dict) -> list[str]:
+    """Mediciones de arranque por encima de PRESUPUESTO_ARRANQUE, con sus imports más costosos."""
+    excedidos = []
+    for caso, segundos in arranque.items():
+        presupuesto = PRESUPUESTO_ARRANQUE.get(caso)
+        if presupuesto is not None and segundos > presupuesto:
+            costos = ", ".join(f"{nombre} {micro / 1000:.0f}ms" for micro, nombre in detalle.get(caso, []))
+            excedidos.append(f"{caso}: {segundos * 1000:.0f}ms > presupuesto {presupuesto * 1000:.0f}ms"
+                             + (f" ({costos})" if costos else ""))
+    return excedidos
+
+
+# --- Comparación con la línea base ---
+
+def comparar(resultados: dict, base: dict, tolerancia: float) -> tuple[list[str], list[str]]:
+    """Imprime la tabla de resultados y devuelve (regresiones, casos sin referencia en la base)."""
+    regresiones = []
+    sin_referencia = []
+    print(f"\n{'tamaño':>8}  {'caso':<28} {'actual':>10} {'base':>10} {'cambio':>8}")
+    for tamano, casos in resultados.items():
+        for caso, segundos in casos.items():
+            referencia = base.get(tamano, {}).get(caso)
+            if referencia is None:
+                print(f"{tamano:>8}  {caso:<28} {segundos:>9.4f}s {'-':>10} {'':>8}")
+                sin_referencia.append(f"{caso} ({tamano})")
+                continue
+            cambio = segundos / referencia - 1 if referencia else 0.0
+            regresion = cambio > tolerancia and segundos - referencia > MINIMO_SEGUNDOS
+            marca = " ❌" if regresion else ""
+            print(f"{tamano:>8}  {caso:<28} {segundos:>9.4f}s {referencia:>9.4f}s {cambio:>+7.0%}{marca}")
+            if regresion:
+                regresiones.append(f"{caso} ({tamano} pedidos): {referencia:.4f}s → {segundos:.4f}s ({cambio:+.0%})")
+    return regresiones, sin_referencia
+
+
+def main():
+    argumentos = sys.argv[1:]
+    if "--trabajador" in argumentos:
+        resultados = trabajador(int(argumentos[argumentos.index("--trabajador") + 1]))
+        print(json.dumps(resultados))
+        return
+
+    tamanos = TAMANOS
+    if "--tamanos" in argumentos:
+        tamanos = [int(t) for t in argumentos[argumentos.index("--tamanos") + 1].split(",")]
+    tolerancia = TOLERANCIA
+    if "--tolerancia" in argumentos:
+        tolerancia = float(argumentos[argumentos.index("--tolerancia") + 1])
+    ruta_base = Path(argumentos[argumentos.index("--base") + 1]) if "--base" in argumentos else ARCHIVO_BASE
+
+    resultados = {}
+    if "--solo-arranque" not in argumentos:
+        resultados = {str(tamano): ejecutar_tamano(tamano) for tamano in tamanos}
+    print("🚀 Midiendo el arranque...")
+    resultados["arranque"], detalle_arranque = medir_arranque()
+    excedidos = verificar_presupuesto(resultados["arranque"], detalle_arranque)
+    ARCHIVO_ULTIMO.parent.mkdir(parents=True, exist_ok=True)
+    ARCHIVO_ULTIMO.write_text(json.dumps(resultados, indent=2), encoding="utf-8")
+
+    base = json.loads(ruta_base.read_text(encoding="utf-8")) if ruta_base.exists() else {}
+    regresiones, sin_referencia = comparar(resultados, base, tolerancia)
+    if excedidos:
+        print(f"\n❌ Arranque fuera de presupuesto:")
+        for excedido in excedidos:
+            print(f"   - {excedido}")
+
+    if "--guardar-base" in argumentos:
+        base.update(resultados)
+        ruta_base.parent.mkdir(parents=True, exist_ok=True)
+        ruta_base.write_text(json.dumps(base, indent=2), encoding="utf-8")
+        print(f"\n📌 Línea base actualizada: {ruta_base}")
+        if excedidos:
+            sys.exit(1)
+    elif regresiones:
+        print(f"\n❌ {len(regresiones)} regresiones (tolerancia {tolerancia:.0%}):")
+        for regresion in regresiones:
+            print(f"   - {regresion}")
+        sys.exit(1)
+    elif excedidos:
+        sys.exit(1)
+    elif not sin_referencia:
+        print(f"\n✅ Sin regresiones respecto a {ruta_base} (tolerancia {tolerancia:.0%})")
+    elif "--sin-base" in argumentos:
+        print(f"\n✅ Arranque dentro de presupuesto; {len(sin_referencia)} casos sin referencia no se compararon")
+    elif not base:
+        print(f"\n❌ No hay línea base en {ruta_base}: no se comprobó ninguna regresión.")
+        print("   Regístrala en esta máquina antes del cambio con --guardar-base "
+              "(o usa --sin-base para revisar sólo los presupuestos)")
+        sys.exit(2)
+    else:
+        # Una base guardada con --solo-arranque u otros --tamanos no cubre todos los casos
+        print(f"\n❌ {len(sin_referencia)} casos sin referencia en {ruta_base}: no se comprobó si empeoraron")
+        for caso in sin_referencia:
+            print(f"   - {caso}")
+        print("   Regístralos con --guardar-base y las mismas opciones "
+              "(o usa --sin-base para comparar sólo los que tienen referencia)")
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
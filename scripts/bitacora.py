@@ -0,0 +1,252 @@
+# scripts/bitacora.py
+
+"""
+Backend de logging de cerebro.py sobre el módulo estándar `logging`.
+
+Dos destinos:
+
+  - Consola: cada registro se formatea con la plantilla de su estilo (colores y
+    emojis, los define cerebro.py) y se escribe en sys.stdout sin forzar el vaciado;
+    un hilo vacía la salida cada INTERVALO_VACIADO segundos y los avisos y errores
+    se vacían al momento. Los print() del resto del programa pasan por el mismo
+    búfer, así que el orden se conserva. Admite una línea de estado al pie
+    (fijar_estado) que se redibuja debajo de cada línea nueva.
+  - Archivo: una línea JSON por registro en reportes/cerebro.log (rota por tamaño).
+    El logger sólo encola el registro; un hilo escritor toma todo lo encolado, lo
+    escribe de una vez y vacía el archivo una sola vez por lote. Los campos extra
+    del registro (estilo, script, ruta del span...) se guardan como claves del JSON.
+
+Niveles (variables de entorno):
+    CEREBRO_LOG_NIVEL           consola, por defecto INFO (WARNING oculta la salida de los parsers)
+    CEREBRO_LOG_NIVEL_ARCHIVO   archivo, por defecto DEBUG
+
+Uso:
+    import bitacora
+    log = bitacora.obtener("cerebro", plantillas)
+    log.info("Paso completado", extra={"estilo": "success"})
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+
+# === CONFIGURACIÓN ===
+BASE_DIR = Path(__file__).resolve().parent.parent
+ARCHIVO_LOG = BASE_DIR / "reportes" / "cerebro.log"
+TAMANO_MAXIMO_LOG = 5 * 1024 * 1024  # bytes antes de rotar
+RESPALDOS_LOG = 5                    # cerebro.log.1 ... cerebro.log.5
+INTERVALO_VACIADO = 0.2              # segundos entre vaciados de la consola
+ENV_NIVEL = "CEREBRO_LOG_NIVEL"
+ENV_NIVEL_ARCHIVO = "CEREBRO_LOG_NIVEL_ARCHIVO"
+
+# Atributos propios de LogRecord; el resto son campos extra que van al JSON
+_ATRIBUTOS_ESTANDAR = set(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {"message", "asctime", "taskName"}
+
+_consola = None
+_escritor = None
+_bloqueo = threading.Lock()
+
+
+class FormatoJSON(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        datos = {
+            "fecha": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensaje": record.getMessage(),
+            "proceso": record.process,
+        }
+        for clave, valor in record.__dict__.items():
+            if clave not in _ATRIBUTOS_ESTANDAR:
+                datos[clave] = valor
+        if record.exc_info:
+            datos["excepcion"] = self.formatException(record.exc_info)
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+
+class FormatoConsola(logging.Formatter):
+    """Aplica la plantilla del estilo del registro ({hora} y {mensaje}); sin estilo, la del nivel."""
+
+    def __init__(self, plantillas: dict[str, str]):
+        super().__init__()
+        self.plantillas = plantillas
+        self._segundo = None
+        self._hora = ""
+
+    def format(self, record: logging.LogRecord) -> str:
+        segundo = int(record.created)
+        if segundo != self._segundo:  # la hora sólo se formatea una vez por segundo
+            self._segundo = segundo
+            self._hora = time.strftime("%H:%M:%S", time.localtime(segundo))
+        estilo = getattr(record, "estilo", record.levelname.lower())
+        plantilla = self.plantillas.get(estilo) or self.plantillas.get(record.levelname.lower(), "[{hora}] {mensaje}")
+        return plantilla.format(hora=self._hora, mensaje=record.getMessage())
+
+
+class ConsolaBufferizada(logging.StreamHandler):
+    """Escribe en el búfer de stdout sin vaciarlo en cada línea y mantiene una línea de estado al pie."""
+
+    def __init__(self, plantillas: dict[str, str]):
+        super().__init__(sys.stdout)
+        self.setFormatter(FormatoConsola(plantillas))
+        self.es_terminal = self.stream.isatty()
+        self.estado = ""
+        if self.es_terminal and getattr(self.stream, "line_buffering", False):
+            self.stream.reconfigure(line_buffering=False)
+        self._detener = threading.Event()
+        threading.Thread(target=self._vaciar_periodicamente, daemon=True).start()
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            texto = self.format(record)
+            with self.lock:
+                if self.estado:
+                    self._borrar_estado()
+                self.stream.write(texto + "\n")
+                if self.estado:
+                    self._dibujar_estado()
+                if record.levelno >= logging.WARNING:
+                    self.stream.flush()
+        except Exception:
+            self.handleError(record)
+
+    def fijar_estado(self, texto: str):
+        """Muestra (o con "" borra) la línea de estado; sólo tiene efecto en un terminal."""
+        if not self.es_terminal:
+            return
+        with self.lock:
+            if self.estado:
+                self._borrar_estado()
+            self.estado = texto
+            if texto:
+                self._dibujar_estado()
+            self.stream.flush()
+
+    def _dibujar_estado(self):
+        self.stream.write(self.estado)
+
+    def _borrar_estado(self):
+        self.stream.write("\r\033[K")
+
+    def _vaciar_periodicamente(self):
+        while not self._detener.wait(INTERVALO_VACIADO):
+            try:
+                with self.lock:
+                    self.stream.flush()
+            except (OSError, ValueError):
+                return  # stdout cerrado al terminar el intérprete
+
+
+class ColaRegistros(logging.Handler):
+    """Encola el registro tal cual para el escritor (logging.handlers.QueueHandler lo copia y
+    formatea antes de encolarlo, y sólo importar logging.handlers cuesta más que el resto del arranque)."""
+
+    def __init__(self, cola: queue.SimpleQueue):
+        super().__init__()
+        self.cola = cola
+
+    def emit(self, record: logging.LogRecord):
+        self.cola.put_nowait(record)
+
+
+class EscritorArchivo(threading.Thread):
+    """Escribe por lotes los registros encolados como JSON y rota el archivo por tamaño."""
+
+    def __init__(self, ruta: Path, nivel: int):
+        super().__init__(daemon=True)
+        self.ruta = ruta
+        self.nivel = nivel
+        self.cola = queue.SimpleQueue()
+        self.formato = FormatoJSON()
+        self.archivo = open(ruta, "a", encoding="utf-8")
+        self.tamano = self.archivo.tell()
+
+    def run(self):
+        terminar = False
+        while not terminar:
+            lote = [self.cola.get()]
+            while True:
+                try:
+                    lote.append(self.cola.get_nowait())
+                except queue.Empty:
+                    break
+            terminar = None in lote  # marca de fin que encola detener()
+            lineas = "".join(self.formato.format(r) + "\n" for r in lote if r is not None and r.levelno >= self.nivel)
+            if lineas:
+                self.archivo.write(lineas)
+                self.archivo.flush()
+                self.tamano += len(lineas.encode("utf-8"))
+                if self.tamano >= TAMANO_MAXIMO_LOG:
+                    self._rotar()
+        self.archivo.close()
+
+    def _rotar(self):
+        """cerebro.log → cerebro.log.1 → ... → cerebro.log.RESPALDOS_LOG (el más viejo se descarta)."""
+        self.archivo.close()
+        for i in range(RESPALDOS_LOG - 1, 0, -1):
+            anterior = self.ruta.with_name(f"{self.ruta.name}.{i}")
+            if anterior.exists():
+                os.replace(anterior, self.ruta.with_name(f"{self.ruta.name}.{i + 1}"))
+        os.replace(self.ruta, self.ruta.with_name(f"{self.ruta.name}.1"))
+        self.archivo = open(self.ruta, "a", encoding="utf-8")
+        self.tamano = 0
+
+    def detener(self):
+        self.cola.put(None)
+        self.join()
+
+
+def _nivel(variable: str, defecto: str) -> int:
+    nivel = logging.getLevelName(os.environ.get(variable, defecto).upper())
+    return nivel if isinstance(nivel, int) else logging.getLevelName(defecto)
+
+
+def obtener(nombre: str, plantillas: dict[str, str], archivo: Path = ARCHIVO_LOG) -> logging.Logger:
+    """Logger `nombre` con los destinos de consola y archivo (se configuran una sola vez)."""
+    global _consola, _escritor
+    registrador = logging.getLogger(nombre)
+    with _bloqueo:
+        if _consola is not None:
+            return registrador
+        _consola = ConsolaBufferizada(plantillas)
+        _consola.setLevel(_nivel(ENV_NIVEL, "INFO"))
+        registrador.addHandler(_consola)
+        try:
+            archivo.parent.mkdir(parents=True, exist_ok=True)
+            _escritor = EscritorArchivo(archivo, _nivel(ENV_NIVEL_ARCHIVO, "DEBUG"))
+            _escritor.start()
+            registrador.addHandler(ColaRegistros(_escritor.cola))
+            atexit.register(detener)
+        except OSError as e:
+            registrador.warning(f"No se pudo abrir el log {archivo}: {e}")
+        registrador.setLevel(min(_consola.level, _nivel(ENV_NIVEL_ARCHIVO, "DEBUG")))
+        registrador.propagate = False
+    return registrador
+
+
+def fijar_estado(texto: str):
+    if _consola is not None:
+        _consola.fijar_estado(texto)
+
+
+def es_terminal() -> bool:
+    return _consola.es_terminal if _consola is not None else sys.stdout.isatty()
+
+
+def detener():
+    """Vacía la consola y escribe en el archivo los registros pendientes."""
+    global _escritor
+    if _consola is not None:
+        _consola._detener.set()
+        _consola.fijar_estado("")
+        _consola.flush()
+    if _escritor is not None:
+        _escritor.detener()
+        _escritor = None
@@ -0,0 +1,110 @@
+# scripts/cascada_llm.py
+
+"""
+Cascada de modelos para la extracción con LLM.
+
+Cada bloque se envía primero al modelo más pequeño (y rápido) de la lista.
+Si su respuesta no pasa la validación, se escala al siguiente modelo, y así
+sucesivamente hasta llegar al último (el más grande). Se llevan estadísticas
+de aciertos y latencia por nivel para poder ajustar la configuración.
+"""
+
+import os
+import time
+
+# === CONFIGURACIÓN ===
+# Orden de la cascada: del modelo más pequeño al más grande.
+# Se puede sobrescribir con la variable de entorno CASCADA_MODELOS="modelo_a,modelo_b".
+MODELOS_CASCADA_DEFECTO = ["llama3.2:3b", "llama3.1:8b"]
+MODELOS_CASCADA = [
+    m.strip() for m in os.environ.get("CASCADA_MODELOS", "").split(",") if m.strip()
+] or MODELOS_CASCADA_DEFECTO
+
+
+class EstadisticasNivel:
+    """Contadores de un nivel de la cascada"""
+
+    def __init__(self, modelo: str):
+        self.modelo = modelo
+        self.intentos = 0
+        self.aciertos = 0
+        self.errores = 0
+        self.reparaciones = 0
+        self.tiempo_total = 0.0
+        self.tiempo_reparacion = 0.0
+
+    @property
+    def tasa_acierto(self) -> float:
+        return self.aciertos / self.intentos if self.intentos else 0.0
+
+    @property
+    def latencia_media(self) -> float:
+        return self.tiempo_total / self.intentos if self.intentos else 0.0
+
+
+class CascadaModelos:
+    """Ejecuta una petición en cascada, escalando sólo cuando la validación falla"""
+
+    def __init__(self, modelos: list[str] | None = None):
+        self.modelos = list(modelos or MODELOS_CASCADA)
+        self.niveles = [EstadisticasNivel(m) for m in self.modelos]
+
+    def ejecutar(self, llamar, validar, etiqueta: str = "", reparar=None):
+        """
+        Llama a `llamar(modelo)` nivel por nivel. `validar(resultado)` devuelve la
+        lista de problemas encontrados (vacía si el resultado es aceptable).
+
+        Si se indica `reparar(resultado, modelo)`, antes de escalar se intenta
+        corregir sólo los campos con problemas usando el modelo del nivel
+        siguiente (o el mismo si ya es el último); la extracción completa con el
+        modelo mayor sólo se repite si la reparación no es válida.
+
+        Devuelve el primer resultado válido; si ninguno lo es, el último resultado
+        no nulo (mismo comportamiento que antes de la cascada).
+        """
+        ultimo_resultado = None
+        for i, nivel in enumerate(self.niveles):
+            inicio = time.perf_counter()
+            resultado = llamar(nivel.modelo)
+            nivel.tiempo_total += time.perf_counter() - inicio
+            nivel.intentos += 1
+
+            if resultado is None:
+                nivel.errores += 1
+                problemas = ["sin respuesta"]
+            else:
+                ultimo_resultado = resultado
+                problemas = validar(resultado)
+
+            if not problemas:
+                nivel.aciertos += 1
+                return resultado
+
+            if reparar is not None and resultado is not None:
+                modelo_reparacion = self.niveles[min(i + 1, len(self.niveles) - 1)].modelo
+                inicio = time.perf_counter()
+                reparado = reparar(resultado, modelo_reparacion)
+                nivel.tiempo_reparacion += time.perf_counter() - inicio
+                if reparado is not None and not validar(reparado):
+                    nivel.reparaciones += 1
+                    print(f"🩹 {etiqueta}: corregido con {modelo_reparacion} sin reextraer el pedido.")
+                    return reparado
+
+            if i + 1 < len(self.niveles):
+                print(f"⤴️  {etiqueta}: {nivel.modelo} no pasó la validación ({'; '.join(problemas)}). "
+                      f"Escalando a {self.niveles[i + 1].modelo}...")
+            else:
+                print(f"⚠️ {etiqueta}: ningún modelo pasó la validación ({'; '.join(problemas)}).")
+
+        return ultimo_resultado
+
+    def imprimir_resumen(self):
+        """Muestra la tasa de acierto y la latencia media de cada nivel"""
+        if not any(n.intentos for n in self.niveles):
+            return
+        print("\n📊 Resumen de la cascada de modelos:")
+        for nivel in self.niveles:
+            print(f"   • {nivel.modelo}: {nivel.aciertos}/{nivel.intentos} aceptados "
+                  f"({nivel.tasa_acierto:.0%}), {nivel.reparaciones} reparados, {nivel.errores} errores, "
+                  f"latencia media {nivel.latencia_media:.2f}s, "
+                  f"reparaciones {nivel.tiempo_reparacion:.2f}s")
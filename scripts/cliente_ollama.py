@@ -0,0 +1,181 @@
+# scripts/cliente_ollama.py
+
+"""
+Cliente mínimo para la API nativa de Ollama (/api/chat).
+
+Todas las peticiones de extracción comparten el mismo mensaje de sistema y sólo
+cambia el mensaje del usuario. Ollama reutiliza la caché KV del prefijo común
+cuando el prompt empieza con exactamente los mismos tokens y el modelo sigue
+cargado con las mismas opciones, así que este cliente garantiza:
+  - el mensaje de sistema va siempre primero y byte a byte idéntico,
+  - las opciones que afectan al contexto (num_ctx, temperatura) son fijas,
+  - la conexión HTTP se reutiliza entre peticiones.
+
+/api/chat no acepta un `context` explícito (sólo /api/generate lo hace, y está
+obsoleto); la reutilización la hace el propio servidor sobre el prefijo común.
+
+Uso para medir el efecto:
+    python scripts/cliente_ollama.py --medir-prefijo html/pedidos_limpio_YYYYMMDD.txt
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+from pathlib import Path
+
+import metricas
+import consumo_llm
+from trazas import span
+
+# === CONFIGURACIÓN ===
+OLLAMA_URL = os.environ.get("OLLAMA_URL", "http://localhost:11434")
+# cerebro.py lo define para que cada petición mantenga el modelo cargado toda la ejecución
+KEEP_ALIVE = os.environ.get("CEREBRO_KEEP_ALIVE")
+# Opciones fijas: cambiar num_ctx entre peticiones obliga a recargar el modelo y pierde la caché
+OPCIONES_BASE = {"temperature": 0, "num_ctx": 4096}
+TIMEOUT = 300
+# Una carga de modelo más larga que esto indica que no seguía en memoria (keep_alive vencido)
+UMBRAL_CARGA_MODELO = 0.5
+SCRIPT = "cliente_ollama"  # etiqueta de las llamadas de --medir-prefijo
+
+_sesion = None
+
+
+def _obtener_sesion():
+    """Sesión HTTP compartida; requests se importa con la primera petición, no al arrancar el script."""
+    global _sesion
+    if _sesion is None:
+        import requests
+        _sesion = requests.Session()
+    return _sesion
+
+
+def chat_ollama(modelo: str, sistema: str, usuario: str, formato: dict | str | None = None,
+                num_predict: int | None = None, prompt: str = "chat", *, script: str,
+                keep_alive: str | None = None) -> dict:
+    """
+    Envía un mensaje de sistema + usuario a /api/chat en modo streaming.
+
+    Devuelve un dict con el texto generado ("contenido"), el tiempo hasta el primer
+    token ("ttft"), el tiempo total ("total") y los contadores de Ollama
+    ("prompt_eval_count", "eval_count", duraciones en segundos). La llamada queda
+    anotada en consumo_llm con el nombre `prompt`, a cuenta de `script`. Sin
+    `keep_alive` se usa el de CEREBRO_KEEP_ALIVE.
+    """
+    opciones = dict(OPCIONES_BASE)
+    if num_predict:
+        opciones["num_predict"] = num_predict
+    cuerpo = {
+        "model": modelo,
+        "messages": [
+            {"role": "system", "content": sistema},
+            {"role": "user", "content": usuario},
+        ],
+        "stream": True,
+        "options": opciones,
+    }
+    if formato is not None:
+        cuerpo["format"] = formato
+    keep_alive = keep_alive or KEEP_ALIVE
+    if keep_alive:
+        cuerpo["keep_alive"] = keep_alive
+
+    with span("llm", modelo=modelo) as atributos:
+        inicio = time.perf_counter()
+        ttft = None
+        partes = []
+        final = {}
+        try:
+            with _obtener_sesion().post(f"{OLLAMA_URL}/api/chat", json=cuerpo, stream=True, timeout=TIMEOUT) as response:
+                response.raise_for_status()
+                for linea in response.iter_lines():
+                    if not linea:
+                        continue
+                    fragmento = json.loads(linea)
+                    if "error" in fragmento:
+                        raise RuntimeError(fragmento["error"])
+                    texto = fragmento.get("message", {}).get("content", "")
+                    if texto:
+                        if ttft is None:
+                            ttft = time.perf_counter() - inicio
+                        partes.append(texto)
+                    if fragmento.get("done"):
+                        final = fragmento
+        except Exception:
+            metricas.LLM_LLAMADAS.inc(script=script, modelo=modelo, resultado="error")
+            raise
+
+        resultado = {
+            "contenido": "".join(partes).strip(),
+            "ttft": ttft if ttft is not None else time.perf_counter() - inicio,
+            "total": time.perf_counter() - inicio,
+            "prompt_eval_count": final.get("prompt_eval_count", 0),
+            "eval_count": final.get("eval_count", 0),
+            "prompt_eval_duration": final.get("prompt_eval_duration", 0) / 1e9,
+            "eval_duration": final.get("eval_duration", 0) / 1e9,
+            "load_duration": final.get("load_duration", 0) / 1e9,
+        }
+        # Espera + evaluación del prompt (ttft) frente a generación de tokens
+        atributos["ttft"] = round(resultado["ttft"], 4)
+        atributos["generacion"] = round(resultado["total"] - resultado["ttft"], 4)
+        atributos["tokens_prompt"] = resultado["prompt_eval_count"]
+        atributos["tokens_respuesta"] = resultado["eval_count"]
+
+    consumo_llm.registrar_llamada(
+        script, prompt, modelo, resultado["prompt_eval_count"], resultado["eval_count"], resultado["total"],
+        ttft=resultado["ttft"], generacion=resultado["eval_duration"] or resultado["total"] - resultado["ttft"],
+    )
+    metricas.CACHE.inc(cache="modelo_cargado",
+                       resultado="acierto" if resultado["load_duration"] < UMBRAL_CARGA_MODELO else "fallo")
+    return resultado
+
+
+def medir_reutilizacion_prefijo(modelo: str, sistema: str, usuarios: list[str],
+                                formato: dict | str | None = None, num_predict: int | None = None) -> dict:
+    """
+    Compara el tiempo hasta el primer token con el prefijo estable frente a un
+    prefijo que cambia en cada petición (lo que invalida la caché KV).
+    """
+    resultados = {"con_prefijo": [], "sin_prefijo": []}
+    chat_ollama(modelo, sistema, usuarios[0], formato, num_predict, prompt="medicion", script=SCRIPT)  # calienta modelo y caché
+    for usuario in usuarios:
+        resultados["con_prefijo"].append(chat_ollama(modelo, sistema, usuario, formato, num_predict, prompt="medicion", script=SCRIPT))
+        sistema_distinto = f"[{uuid.uuid4().hex}]\n{sistema}"
+        resultados["sin_prefijo"].append(chat_ollama(modelo, sistema_distinto, usuario, formato, num_predict, prompt="medicion", script=SCRIPT))
+
+    resumen = {}
+    for clave, llamadas in resultados.items():
+        resumen[clave] = {
+            "ttft_medio": sum(r["ttft"] for r in llamadas) / len(llamadas),
+            "tokens_prompt_evaluados": sum(r["prompt_eval_count"] for r in llamadas) / len(llamadas),
+        }
+    return resumen
+
+
+def main():
+    if len(sys.argv) < 3 or sys.argv[1] != "--medir-prefijo":
+        print("Uso: python scripts/cliente_ollama.py --medir-prefijo <pedidos_limpio_YYYYMMDD.txt> [n_bloques]")
+        return
+
+    from parser_tabla_llm import (LLM, PROMPT_EXTRACCION, ESQUEMA_EXTRACCION,
+                                  NUM_PREDICT_EXTRACCION, dividir_en_pedidos)
+
+    texto = Path(sys.argv[2]).read_text(encoding="utf-8")
+    n_bloques = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    bloques = dividir_en_pedidos(texto)[:n_bloques]
+    if not bloques:
+        print("❌ No se encontraron bloques de pedidos en el archivo.")
+        return
+
+    print(f"⏱️  Midiendo reutilización de prefijo con {len(bloques)} bloques ({LLM})...")
+    resumen = medir_reutilizacion_prefijo(LLM, PROMPT_EXTRACCION.strip(), bloques,
+                                          ESQUEMA_EXTRACCION, NUM_PREDICT_EXTRACCION)
+    for clave, datos in resumen.items():
+        print(f"   • {clave}: TTFT medio {datos['ttft_medio']:.2f}s, "
+              f"tokens de prompt evaluados {datos['tokens_prompt_evaluados']:.0f}")
+
+
+if __name__ == "__main__":
+    main()
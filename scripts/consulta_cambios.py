@@ -0,0 +1,131 @@
+# scripts/consulta_cambios.py
+
+"""
+Consulta de pedidos nuevos o actualizados desde una marca.
+
+La marca puede ser:
+  - una fecha/hora ISO (se compara con el momento en que se registró cada cambio), o
+  - un número de secuencia devuelto por una consulta anterior (entero).
+
+Se usa el índice de cambios de almacen_pedidos.py (`pedidos_cambios.idx`), que
+está ordenado por fecha (cada entrada lleva la hora en que se agregó, sin retroceder)
+y tiene entradas de ancho fijo: la búsqueda por fecha
+es binaria y la búsqueda por secuencia es directa. Sólo se leen del almacén
+los pedidos que cambiaron, sin cargar el histórico completo en memoria.
+
+Uso:
+    python scripts/consulta_cambios.py --desde 2025-10-01T00:00:00
+    python scripts/consulta_cambios.py --desde 120 --salida cambios.ndjson
+
+La salida es NDJSON: un pedido por línea, con la clave "_seq" de su último
+cambio. La última secuencia se informa por stderr para usarla como próxima marca.
+"""
+
+import sys
+import json
+from typing import Iterator
+
+from almacen_pedidos import (
+    INDICE_CAMBIOS, ANCHO_ENTRADA_INDICE, ANCHO_FECHA_INDICE,
+    asegurar_indice, cargar_pedidos_por_id,
+)
+
+
+def secuencia_actual() -> int:
+    """Número de cambios registrados (la secuencia del último cambio)."""
+    asegurar_indice()
+    if not INDICE_CAMBIOS.exists():
+        return 0
+    return INDICE_CAMBIOS.stat().st_size // ANCHO_ENTRADA_INDICE
+
+
+def _leer_entrada(f, secuencia: int) -> tuple[str, str]:
+    f.seek((secuencia - 1) * ANCHO_ENTRADA_INDICE)
+    entrada = f.read(ANCHO_ENTRADA_INDICE).decode("ascii")
+    return entrada[:ANCHO_FECHA_INDICE].rstrip(), entrada[ANCHO_FECHA_INDICE + 1:].rstrip()
+
+
+def secuencia_desde_fecha(fecha: str) -> int:
+    """Secuencia del último cambio con fecha <= `fecha` (búsqueda binaria en el índice)."""
+    total = secuencia_actual()
+    if total == 0:
+        return 0
+    bajo, alto = 0, total
+    with open(INDICE_CAMBIOS, "rb") as f:
+        while bajo < alto:
+            medio = (bajo + alto) // 2
+            fecha_entrada, _ = _leer_entrada(f, medio + 1)
+            if fecha_entrada <= fecha:
+                bajo = medio + 1
+            else:
+                alto = medio
+    return bajo
+
+
+def ids_cambiados_desde(secuencia: int, hasta: int | None = None) -> dict[str, int]:
+    """{id_pedido: secuencia de su último cambio} para los cambios en (secuencia, hasta]."""
+    cambios = {}
+    if not INDICE_CAMBIOS.exists():
+        return cambios
+    with open(INDICE_CAMBIOS, "rb") as f:
+        f.seek(secuencia * ANCHO_ENTRADA_INDICE)
+        for n, entrada in enumerate(iter(lambda: f.read(ANCHO_ENTRADA_INDICE), b""), secuencia + 1):
+            if len(entrada) < ANCHO_ENTRADA_INDICE or (hasta is not None and n > hasta):
+                break  # entrada a medio escribir o fuera del rango pedido
+            id_pedido = entrada[ANCHO_FECHA_INDICE + 1:].decode("ascii").rstrip()
+            cambios.pop(id_pedido, None)
+            cambios[id_pedido] = n
+    return cambios
+
+
+def resolver_marca(marca: str | int) -> int:
+    """Convierte una marca (secuencia o fecha ISO) en número de secuencia."""
+    if isinstance(marca, int) or str(marca).isdigit():
+        return int(marca)
+    return secuencia_desde_fecha(str(marca)) if marca else 0
+
+
+def cambios_desde(marca: str | int, hasta: int | None = None) -> Iterator[dict]:
+    """
+    Pedidos insertados o actualizados después de `marca` (y hasta la secuencia
+    `hasta`, si se indica), en orden de cambio. Cada pedido incluye "_seq" con la
+    secuencia de su último cambio.
+    """
+    asegurar_indice()
+    cambios = ids_cambiados_desde(resolver_marca(marca), hasta)
+    if not cambios:
+        return
+    pedidos = cargar_pedidos_por_id(set(cambios))
+    for id_pedido, seq in cambios.items():
+        pedido = pedidos.get(id_pedido)
+        if pedido is not None:
+            yield {**pedido, "_seq": seq}
+
+
+def main():
+    argumentos = sys.argv[1:]
+    if "--desde" not in argumentos or argumentos.index("--desde") + 1 >= len(argumentos):
+        print("Uso: python scripts/consulta_cambios.py --desde <fecha ISO | secuencia> [--salida archivo.ndjson]",
+              file=sys.stderr)
+        sys.exit(1)
+    marca = argumentos[argumentos.index("--desde") + 1]
+
+    salida = sys.stdout
+    if "--salida" in argumentos:
+        salida = open(argumentos[argumentos.index("--salida") + 1], "w", encoding="utf-8")
+
+    total = 0
+    fin = secuencia_actual()
+    try:
+        for pedido in cambios_desde(marca, fin):
+            salida.write(json.dumps(pedido, ensure_ascii=False, separators=(",", ":")) + "\n")
+            total += 1
+    finally:
+        if salida is not sys.stdout:
+            salida.close()
+
+    print(f"📤 {total} pedidos cambiados desde {marca}. Próxima marca: {fin}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
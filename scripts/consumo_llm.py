@@ -0,0 +1,175 @@
+# scripts/consumo_llm.py
+
+"""
+Registro de tokens y latencia de cada llamada al LLM.
+
+Cada llamada se anota en una línea TSV, etiquetada por script, prompt y modelo:
+
+    fecha  script  prompt  modelo  tokens_prompt  tokens_respuesta  duracion  ttft  generacion
+
+  - duracion:   segundos desde la petición hasta la respuesta completa
+  - ttft:       segundos hasta el primer token (espera + lectura del prompt);
+                sin streaming coincide con la duración
+  - generacion: segundos generando la respuesta (vacío si el cliente no lo informa)
+
+cliente_ollama.chat_ollama registra sus llamadas automáticamente; los scripts
+que usan el cliente de OpenAI llaman a `chat_openai(cliente_openai(), "nombre_prompt", script="...", ...)`
+en lugar de `client.chat.completions.create(...)` para tomar `response.usage`. El
+nombre del script se pasa siempre: en modo vigilancia los parsers corren dentro de
+cerebro.py y sys.argv[0] no los identifica.
+
+El registro de la ejecución es el que indica CEREBRO_CONSUMO_LLM (cerebro.py lo
+fija en reportes/consumo_llm_<id>.tsv); un script ejecutado a mano escribe el suyo
+en reportes/consumo_llm_<script>_<fecha>.tsv.
+
+Uso:
+    python scripts/consumo_llm.py                                  # resumen del registro más reciente
+    python scripts/consumo_llm.py reportes/consumo_llm_<id>.tsv
+"""
+
+import os
+import sys
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+
+import metricas
+
+# === CONFIGURACIÓN ===
+REPORTES_DIR = metricas.REPORTES_DIR
+ENV_REGISTRO = "CEREBRO_CONSUMO_LLM"
+CAMPOS = ["fecha", "script", "prompt", "modelo", "tokens_prompt", "tokens_respuesta", "duracion", "ttft", "generacion"]
+
+_clientes_openai = {}
+_inicio = datetime.now()
+
+
+def ruta_registro(script: str) -> Path:
+    return Path(os.environ.get(ENV_REGISTRO) or REPORTES_DIR / f"consumo_llm_{script}_{_inicio:%Y%m%d_%H%M%S}.tsv")
+
+
+def registrar_llamada(script: str, prompt: str, modelo: str, tokens_prompt: int, tokens_respuesta: int,
+                      duracion: float, ttft: float | None = None, generacion: float | None = None):
+    """Anota una llamada terminada en el registro de la ejecución y en las métricas."""
+    ruta = ruta_registro(script)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    valores = [
+        datetime.now().isoformat(timespec="seconds"), script, prompt, modelo,
+        tokens_prompt or 0, tokens_respuesta or 0, f"{duracion:.4f}",
+        f"{(ttft if ttft is not None else duracion):.4f}",
+        f"{generacion:.4f}" if generacion is not None else "",
+    ]
+    # Una línea corta por escritura: los procesos que comparten el registro no se mezclan
+    with open(ruta, "a", encoding="utf-8") as f:
+        f.write("\t".join(str(v) for v in valores) + "\n")
+
+    metricas.LLM_LLAMADAS.inc(script=script, modelo=modelo, resultado="ok")
+    metricas.LLM_TOKENS.inc(tokens_prompt or 0, script=script, modelo=modelo, tipo="prompt")
+    metricas.LLM_TOKENS.inc(tokens_respuesta or 0, script=script, modelo=modelo, tipo="respuesta")
+    metricas.LLM_DURACION.observar(duracion, script=script, modelo=modelo)
+
+
+def cliente_openai(base_url: str = "http://localhost:11434/v1"):
+    """Cliente de OpenAI contra Ollama; openai se importa y el cliente se crea con la primera llamada."""
+    if base_url not in _clientes_openai:
+        from openai import OpenAI
+        _clientes_openai[base_url] = OpenAI(base_url=base_url, api_key="ollama")
+    return _clientes_openai[base_url]
+
+
+def chat_openai(client, prompt: str, *, script: str, **parametros):
+    """client.chat.completions.create(**parametros) registrando response.usage y la duración."""
+    inicio = time.perf_counter()
+    try:
+        response = client.chat.completions.create(**parametros)
+    except Exception:
+        metricas.LLM_LLAMADAS.inc(script=script, modelo=parametros.get("model", ""), resultado="error")
+        raise
+    uso = getattr(response, "usage", None)
+    registrar_llamada(
+        script,
+        prompt,
+        parametros.get("model", ""),
+        getattr(uso, "prompt_tokens", 0),
+        getattr(uso, "completion_tokens", 0),
+        time.perf_counter() - inicio,
+    )
+    return response
+
+
+def leer_registro(ruta: Path) -> list[dict]:
+    llamadas = []
+    with open(ruta, "r", encoding="utf-8") as f:
+        for linea in f:
+            partes = linea.rstrip("\n").split("\t")
+            if len(partes) != len(CAMPOS):
+                continue
+            llamada = dict(zip(CAMPOS, partes))
+            for campo in ("tokens_prompt", "tokens_respuesta"):
+                llamada[campo] = int(llamada[campo])
+            for campo in ("duracion", "ttft"):
+                llamada[campo] = float(llamada[campo])
+            llamada["generacion"] = float(llamada["generacion"]) if llamada["generacion"] else None
+            llamadas.append(llamada)
+    return llamadas
+
+
+def resumen(llamadas: list[dict]) -> list[dict]:
+    """Totales por (script, prompt, modelo), de mayor a menor tiempo total."""
+    grupos = {}
+    for llamada in llamadas:
+        grupos.setdefault((llamada["script"], llamada["prompt"], llamada["modelo"]), []).append(llamada)
+
+    filas = []
+    for (script, prompt, modelo), grupo in grupos.items():
+        duraciones = sorted(l["duracion"] for l in grupo)
+        tokens_respuesta = sum(l["tokens_respuesta"] for l in grupo)
+        # Velocidad de generación: sobre el tiempo generando si se conoce, si no sobre la duración completa
+        tiempo_generacion = sum(l["generacion"] if l["generacion"] else l["duracion"] for l in grupo)
+        filas.append({
+            "script": script,
+            "prompt": prompt,
+            "modelo": modelo,
+            "llamadas": len(grupo),
+            "tokens_prompt": sum(l["tokens_prompt"] for l in grupo),
+            "tokens_respuesta": tokens_respuesta,
+            "tokens_prompt_medio": round(sum(l["tokens_prompt"] for l in grupo) / len(grupo), 1),
+            "duracion_total": round(sum(duraciones), 3),
+            "duracion_media": round(sum(duraciones) / len(grupo), 3),
+            "duracion_p90": round(duraciones[min(len(duraciones) - 1, int(0.9 * len(duraciones)))], 3),
+            "ttft_medio": round(sum(l["ttft"] for l in grupo) / len(grupo), 3),
+            "tokens_por_segundo": round(tokens_respuesta / tiempo_generacion, 1) if tiempo_generacion else 0.0,
+        })
+    return sorted(filas, key=lambda fila: -fila["duracion_total"])
+
+
+def escribir_resumen(ruta_registro_tsv: Path, destino: Path) -> list[dict]:
+    """Guarda el resumen del registro como JSON junto al registro."""
+    filas = resumen(leer_registro(ruta_registro_tsv)) if ruta_registro_tsv.exists() else []
+    temporal = destino.with_name(destino.name + ".tmp")
+    temporal.write_text(json.dumps(filas, indent=2, ensure_ascii=False), encoding="utf-8")
+    os.replace(temporal, destino)
+    return filas
+
+
+def imprimir_resumen(filas: list[dict]):
+    print(f"{'script':<24} {'prompt':<12} {'modelo':<16} {'llamadas':>8} {'tok in':>9} {'tok out':>8} "
+          f"{'media s':>8} {'p90 s':>7} {'ttft s':>7} {'tok/s':>7}")
+    for f in filas:
+        print(f"{f['script']:<24} {f['prompt']:<12} {f['modelo']:<16} {f['llamadas']:>8} {f['tokens_prompt']:>9} "
+              f"{f['tokens_respuesta']:>8} {f['duracion_media']:>8.2f} {f['duracion_p90']:>7.2f} "
+              f"{f['ttft_medio']:>7.2f} {f['tokens_por_segundo']:>7.1f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        ruta = Path(sys.argv[1])
+    else:
+        registros = sorted(REPORTES_DIR.glob("consumo_llm_*.tsv"), key=lambda r: r.stat().st_mtime)
+        if not registros:
+            print("No hay registros de consumo en reportes/")
+            sys.exit(0)
+        ruta = registros[-1]
+    print(f"📒 {ruta}")
+    imprimir_resumen(resumen(leer_registro(ruta)))
@@ -0,0 +1,126 @@
+# scripts/esquemas_llm.py
+
+"""
+Esquemas JSON de las respuestas esperadas del LLM.
+
+Cada prompt tiene aquí su estructura definida una sola vez. El mismo esquema se
+usa para:
+  - pedir salida estructurada a Ollama mediante el parámetro `format`
+    (el modelo sólo puede generar JSON que lo cumpla),
+  - calcular un tope de tokens (`num_predict`) ajustado a la respuesta,
+  - validar la respuesta recibida.
+"""
+
+# Tokens aproximados por carácter en texto español (estimación conservadora)
+TOKENS_POR_CARACTER = 0.5
+# Tokens reservados para un valor numérico o booleano
+TOKENS_POR_NUMERO = 8
+# Margen sobre la estimación para no truncar respuestas válidas
+MARGEN_NUM_PREDICT = 1.25
+
+ESQUEMA_EXTRACCION = {
+    "type": "object",
+    "properties": {
+        "fecha_pedido": {"type": ["string", "null"], "maxLength": 10},
+        "id_pedido": {"type": "string", "maxLength": 19},
+        "producto": {"type": ["string", "null"], "maxLength": 300},
+        "asin": {"type": ["string", "null"], "maxLength": 10},
+        "sku": {"type": ["string", "null"], "maxLength": 60},
+        "cantidad": {"type": ["integer", "null"]},
+        "costo_unitario": {"type": ["number", "null"]},
+        "subtotal": {"type": ["number", "null"]},
+        "fecha_limite_envio": {"type": ["string", "null"], "maxLength": 10},
+        "estado_pedido": {"type": ["string", "null"], "maxLength": 40},
+    },
+    "required": [
+        "fecha_pedido", "id_pedido", "producto", "asin", "sku", "cantidad",
+        "costo_unitario", "subtotal", "fecha_limite_envio", "estado_pedido",
+    ],
+    "additionalProperties": False,
+}
+
+ESQUEMA_DETALLES = {
+    "type": "object",
+    "properties": {
+        "direccion_envio": {"type": ["string", "null"], "maxLength": 400},
+        "telefono_comprador": {"type": ["string", "null"], "maxLength": 30},
+        "subtotal_productos": {"type": "number"},
+        "costo_envio": {"type": "number"},
+        "total_antes_impuestos": {"type": "number"},
+        "impuestos": {"type": "number"},
+        "total_pedido": {"type": "number"},
+    },
+    "required": [
+        "direccion_envio", "telefono_comprador", "subtotal_productos", "costo_envio",
+        "total_antes_impuestos", "impuestos", "total_pedido",
+    ],
+    "additionalProperties": False,
+}
+
+_TIPOS_PYTHON = {
+    "string": (str,),
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+    "null": (type(None),),
+    "object": (dict,),
+    "array": (list,),
+}
+
+
+def _cumple_tipo(valor, tipo: str) -> bool:
+    # bool es subclase de int: no se acepta como número
+    if isinstance(valor, bool) and tipo in ("integer", "number"):
+        return False
+    if tipo == "integer" and isinstance(valor, float):
+        return valor.is_integer()
+    return isinstance(valor, _TIPOS_PYTHON[tipo])
+
+
+def validar_esquema(datos, esquema: dict, ruta: str = "") -> list[str]:
+    """
+    Valida `datos` contra el subconjunto de JSON Schema usado en este módulo
+    (type, properties, required, additionalProperties, maxLength).
+    Devuelve la lista de problemas encontrados (vacía si es válido).
+    """
+    problemas = []
+    nombre = ruta or "respuesta"
+
+    tipos = esquema.get("type")
+    if tipos:
+        tipos = [tipos] if isinstance(tipos, str) else tipos
+        if not any(_cumple_tipo(datos, t) for t in tipos):
+            return [f"tipo inválido en '{nombre}'"]
+
+    if isinstance(datos, str) and "maxLength" in esquema and len(datos) > esquema["maxLength"]:
+        problemas.append(f"'{nombre}' excede {esquema['maxLength']} caracteres")
+
+    if isinstance(datos, dict):
+        propiedades = esquema.get("properties", {})
+        for campo in esquema.get("required", []):
+            if campo not in datos:
+                problemas.append(f"falta '{campo}'")
+        if esquema.get("additionalProperties") is False:
+            for campo in datos:
+                if campo not in propiedades:
+                    problemas.append(f"campo no esperado '{campo}'")
+        for campo, subesquema in propiedades.items():
+            if campo in datos:
+                problemas.extend(validar_esquema(datos[campo], subesquema, campo))
+
+    return problemas
+
+
+def calcular_num_predict(esquema: dict) -> int:
+    """Estima el máximo de tokens que puede ocupar una respuesta que cumpla el esquema."""
+    tokens = 2  # llaves de apertura y cierre
+    for campo, subesquema in esquema.get("properties", {}).items():
+        tipos = subesquema.get("type", "string")
+        tipos = [tipos] if isinstance(tipos, str) else tipos
+        tokens += len(campo) * TOKENS_POR_CARACTER + 4  # nombre, comillas, dos puntos y coma
+        if "string" in tipos:
+            tokens += subesquema.get("maxLength", 100) * TOKENS_POR_CARACTER + 2
+        else:
+            tokens += TOKENS_POR_NUMERO
+    return int(tokens * MARGEN_NUM_PREDICT)
+
@@ -0,0 +1,201 @@
+# scripts/exportar_postgres.py
+
+"""
+Exporta a PostgreSQL (tabla `ventas`) sólo los pedidos que cambiaron desde la
+última exportación.
+
+  1. Se consultan (consulta_cambios.py) los pedidos cuyo último cambio (alta o
+     detalles) es posterior a la marca guardada en `csv/export_postgres_marca.json`.
+  2. Se envían en streaming con COPY a una tabla temporal.
+  3. Un único INSERT ... ON CONFLICT los integra a `ventas`, insertando los
+     nuevos y completando las columnas de detalle de los existentes.
+  4. Si todo sale bien se guarda la nueva marca.
+
+La marca guarda también la generación del índice de cambios: si el índice se
+reconstruyó (secuencias renumeradas), la marca deja de valer y se exporta todo.
+
+Requiere: pip install "psycopg[binary]"
+
+Conexión (no hay valores por defecto ni contraseñas en el repositorio): variables
+PGHOST, PGPORT, PGDATABASE, PGUSER y PGPASSWORD, o el archivo `config_postgres.json`
+en la raíz del proyecto (ignorado por git) con las claves host, port, dbname, user y
+password. Las variables tienen prioridad; la contraseña también puede venir de ~/.pgpass.
+
+Uso:
+    python scripts/exportar_postgres.py            # exporta los cambios
+    python scripts/exportar_postgres.py --todo     # ignora la marca y exporta todo
+"""
+
+import os
+import sys
+import json
+from datetime import date
+from pathlib import Path
+
+from almacen_pedidos import fecha_cambio, asegurar_indice, generacion_indice, CSV_DIR
+from consulta_cambios import cambios_desde, resolver_marca, secuencia_actual
+
+# === CONFIGURACIÓN ===
+BASE_DIR = Path(__file__).resolve().parent.parent
+ARCHIVO_CONEXION = BASE_DIR / "config_postgres.json"
+VARIABLES_CONEXION = {"host": "PGHOST", "port": "PGPORT", "dbname": "PGDATABASE",
+                      "user": "PGUSER", "password": "PGPASSWORD"}
+CONEXION_OBLIGATORIA = ("host", "dbname", "user")
+
+MARCA_EXPORTACION = CSV_DIR / "export_postgres_marca.json"
+
+COLUMNAS_VENTAS = [
+    "id_pedido", "fecha_pedido", "producto", "asin", "sku", "cantidad",
+    "subtotal", "fecha_limite_envio", "estado_pedido", "fecha_procesado",
+    "direccion_envio", "telefono_comprador", "subtotal_productos",
+    "costo_envio", "total_antes_impuestos", "impuestos", "total_pedido",
+]
+# Columnas que se completan después del alta (paso 5) o que pueden cambiar
+COLUMNAS_ACTUALIZABLES = [
+    "estado_pedido", "direccion_envio", "telefono_comprador", "subtotal_productos",
+    "costo_envio", "total_antes_impuestos", "impuestos", "total_pedido",
+]
+COLUMNAS_FECHA = {"fecha_pedido", "fecha_limite_envio"}
+COLUMNAS_NUMERICAS = {"subtotal", "subtotal_productos", "costo_envio", "total_antes_impuestos", "impuestos", "total_pedido"}
+
+
+def configuracion_bd() -> dict:
+    """Parámetros de conexión desde config_postgres.json y las variables PG*; ValueError si faltan."""
+    config = {}
+    if ARCHIVO_CONEXION.exists():
+        try:
+            config.update(json.loads(ARCHIVO_CONEXION.read_text(encoding="utf-8")))
+        except (json.JSONDecodeError, OSError) as e:
+            raise ValueError(f"no se pudo leer {ARCHIVO_CONEXION.name}: {e}")
+    for clave, variable in VARIABLES_CONEXION.items():
+        if os.environ.get(variable):
+            config[clave] = os.environ[variable]
+    faltan = [VARIABLES_CONEXION[clave] for clave in CONEXION_OBLIGATORIA if not config.get(clave)]
+    if faltan:
+        raise ValueError(f"faltan {', '.join(faltan)} (variables de entorno o {ARCHIVO_CONEXION.name})")
+    return {clave: valor for clave, valor in config.items() if clave in VARIABLES_CONEXION and valor}
+
+
+def leer_marca() -> dict:
+    """Marca de la última exportación: {"seq": secuencia, "fecha": fecha del último cambio, "generacion": del índice}."""
+    if not MARCA_EXPORTACION.exists():
+        return {}
+    try:
+        return json.loads(MARCA_EXPORTACION.read_text(encoding="utf-8"))
+    except (json.JSONDecodeError, OSError):
+        return {}
+
+
+def guardar_marca(marca: dict):
+    temporal = MARCA_EXPORTACION.with_name(MARCA_EXPORTACION.name + ".tmp")
+    temporal.write_text(json.dumps(marca), encoding="utf-8")
+    os.replace(temporal, MARCA_EXPORTACION)
+
+
+def _numero(valor):
+    try:
+        return float(valor) if valor not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _fecha(valor):
+    try:
+        return date.fromisoformat(valor) if valor else None
+    except (TypeError, ValueError):
+        return None
+
+
+def fila_ventas(pedido: dict) -> tuple:
+    """Convierte un pedido a la fila de `ventas` (mismas reglas que upsert-to-db.js)."""
+    fila = []
+    for columna in COLUMNAS_VENTAS:
+        valor = pedido.get(columna)
+        if columna in COLUMNAS_FECHA:
+            valor = _fecha(valor)
+        elif columna in COLUMNAS_NUMERICAS:
+            valor = _numero(valor)
+        elif columna == "cantidad":
+            try:
+                valor = int(valor) or 1
+            except (TypeError, ValueError):
+                valor = 1
+        elif columna == "fecha_procesado":
+            valor = valor or None
+        fila.append(valor)
+    return tuple(fila)
+
+
+def sql_upsert() -> str:
+    columnas = ", ".join(COLUMNAS_VENTAS)
+    actualizaciones = ",\n            ".join(
+        f"{c} = COALESCE(EXCLUDED.{c}, ventas.{c})" for c in COLUMNAS_ACTUALIZABLES
+    )
+    return f"""
+        INSERT INTO ventas ({columnas})
+        SELECT DISTINCT ON (id_pedido) {columnas}
+        FROM ventas_staging
+        ORDER BY id_pedido
+        ON CONFLICT (id_pedido) DO UPDATE SET
+            {actualizaciones}
+        RETURNING (xmax = 0) AS insertado
+    """
+
+
+def exportar(todo: bool = False) -> bool:
+    marca = {} if todo else leer_marca()
+    asegurar_indice()
+    generacion = generacion_indice()
+    if marca and marca.get("generacion", "") != generacion:
+        print("⚠️  El índice de cambios se reconstruyó después de la última exportación: "
+              "su marca ya no corresponde y se exporta todo")
+        marca = {}
+    # Las marcas antiguas sólo tenían fecha; la secuencia es exacta y se prefiere
+    desde = marca.get("seq", marca.get("fecha", 0))
+    inicio = resolver_marca(desde)
+    fin = secuencia_actual()
+    if fin <= inicio:
+        print(f"✅ No hay pedidos nuevos ni actualizados desde la marca {desde or 'inicial'}. Nada que exportar.")
+        return True
+    print(f"📤 Exportando pedidos cambiados entre las secuencias {inicio} y {fin}...")
+
+    try:
+        import psycopg
+    except ImportError:
+        print('❌ Falta el driver de PostgreSQL. Ejecuta: pip install "psycopg[binary]"')
+        return False
+    try:
+        config = configuracion_bd()
+    except ValueError as e:
+        print(f"❌ Falta la configuración de PostgreSQL: {e}")
+        return False
+
+    enviados = 0
+    ultima_fecha = marca.get("fecha", "")
+    try:
+        with psycopg.connect(**config) as conexion:
+            with conexion.cursor() as cursor:
+                cursor.execute(
+                    "CREATE TEMP TABLE ventas_staging (LIKE ventas INCLUDING DEFAULTS) ON COMMIT DROP"
+                )
+                with cursor.copy(f"COPY ventas_staging ({', '.join(COLUMNAS_VENTAS)}) FROM STDIN") as copia:
+                    for pedido in cambios_desde(inicio, fin):
+                        copia.write_row(fila_ventas(pedido))
+                        enviados += 1
+                        ultima_fecha = max(ultima_fecha, fecha_cambio(pedido))
+                cursor.execute(sql_upsert())
+                resultados = cursor.fetchall()
+            conexion.commit()
+    except Exception as e:
+        print(f"❌ Error exportando a PostgreSQL ({config['host']}): {e}")
+        return False
+
+    insertados = sum(1 for (insertado,) in resultados if insertado)
+    guardar_marca({"seq": fin, "fecha": ultima_fecha, "generacion": generacion})
+    print(f"✅ Listo. Insertados: {insertados} | Actualizados: {len(resultados) - insertados} | "
+          f"Enviados: {enviados} | Nueva marca: secuencia {fin}")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if exportar(todo="--todo" in sys.argv) else 1)
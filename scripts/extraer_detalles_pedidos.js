@@ -7,7 +7,11 @@ const path = require('path');
 // --- Configuración ---
 const BASE_DIR = path.resolve(__dirname, '..'); // Sube un nivel a la carpeta raíz del proyecto
 const CONSOLIDATED_JSON_PATH = path.join(BASE_DIR, 'csv', 'pedidos_consolidados.json');
+// Almacén incremental (una línea JSON por pedido); tiene prioridad sobre el JSON consolidado
+const CONSOLIDATED_NDJSON_PATH = path.join(BASE_DIR, 'csv', 'pedidos_consolidados.ndjson');
 const HTML_PEDIDOS_DIR = path.join(BASE_DIR, 'html_pedidos');
+// Índice de las páginas ya procesadas y archivadas (scripts/archivo_html.py)
+const INDICE_ARCHIVO_PATH = path.join(HTML_PEDIDOS_DIR, 'archivo', 'indice.tsv');
 const COOKIES_PATH = path.join(BASE_DIR, 'cookies', 'session.json');
 // --------------------
 
@@ -23,7 +27,7 @@ function sleep(min_ms, max_ms) {
 
 (async () => {
     // 1. Verificar que los archivos y carpetas necesarios existan
-    if (!fs.existsSync(CONSOLIDATED_JSON_PATH)) {
+    if (!fs.existsSync(CONSOLIDATED_NDJSON_PATH) && !fs.existsSync(CONSOLIDATED_JSON_PATH)) {
         console.error(`❌ Error: No se encuentra el archivo JSON consolidado en: ${CONSOLIDATED_JSON_PATH}`);
         return;
     }
@@ -38,8 +42,13 @@ function sleep(min_ms, max_ms) {
         fs.mkdirSync(HTML_PEDIDOS_DIR, { recursive: true });
     }
 
-    // 2. Leer los pedidos del archivo JSON
-    const pedidos = JSON.parse(fs.readFileSync(CONSOLIDATED_JSON_PATH, 'utf-8'));
+    // 2. Leer los pedidos del almacén NDJSON (o del JSON consolidado si aún no existe)
+    const pedidos = fs.existsSync(CONSOLIDATED_NDJSON_PATH)
+        ? fs.readFileSync(CONSOLIDATED_NDJSON_PATH, 'utf-8')
+            .split('\n')
+            .filter(linea => linea.trim())
+            .map(linea => JSON.parse(linea))
+        : JSON.parse(fs.readFileSync(CONSOLIDATED_JSON_PATH, 'utf-8'));
     if (!pedidos || pedidos.length === 0) {
         console.log('ℹ️ No hay pedidos en el archivo JSON para procesar. Saliendo.');
         return;
@@ -47,10 +56,15 @@ function sleep(min_ms, max_ms) {
     
     console.log(`🔍 Se encontraron ${pedidos.length} pedidos en el archivo consolidado.`);
 
-    // 3. Filtrar los pedidos que necesitan ser descargados
+    // 3. Filtrar los pedidos que necesitan ser descargados (ni sueltos ni archivados)
+    const archivados = new Set(
+        fs.existsSync(INDICE_ARCHIVO_PATH)
+            ? fs.readFileSync(INDICE_ARCHIVO_PATH, 'ascii').split('\n').map(linea => linea.split('\t')[0]).filter(Boolean)
+            : []
+    );
     const pedidos_a_descargar = pedidos.filter(pedido => {
         const html_path = path.join(HTML_PEDIDOS_DIR, `${pedido.id_pedido}.html`);
-        return !fs.existsSync(html_path);
+        return !archivados.has(pedido.id_pedido) && !fs.existsSync(html_path);
     });
 
     if (pedidos_a_descargar.length === 0) {
@@ -0,0 +1,103 @@
+# scripts/indice_directorios.py
+
+"""
+Índice en memoria de html/ y html_pedidos/.
+
+Cada directorio se recorre una sola vez con os.scandir y el resultado se
+conserva hasta que se invalida (después de un paso que descarga archivos).
+Las consultas frecuentes son O(1) sin llamadas a stat():
+  - ¿qué pedidos tienen página de detalle suelta?
+  - ¿cuál es la página de lista más reciente?
+
+Uso:
+    from indice_directorios import indice
+    indice.tiene_detalle(id_pedido)
+    indice.pagina_lista_mas_reciente()
+    indice.invalidar()   # después de que otro proceso escribió en los directorios
+"""
+
+import os
+from pathlib import Path
+
+# === CONFIGURACIÓN ===
+BASE_DIR = Path(__file__).resolve().parent.parent
+HTML_DIR = BASE_DIR / "html"
+HTML_PEDIDOS_DIR = BASE_DIR / "html_pedidos"
+
+PREFIJO_LISTA = "pedidos_"
+EXTENSION = ".html"
+
+
+def _escanear(directorio: Path) -> dict[str, os.DirEntry]:
+    """{nombre sin extensión: entrada} de los .html del directorio (un solo recorrido)."""
+    entradas = {}
+    if not directorio.is_dir():
+        return entradas
+    with os.scandir(directorio) as iterador:
+        for entrada in iterador:
+            if entrada.name.endswith(EXTENSION) and entrada.is_file():
+                entradas[entrada.name[:-len(EXTENSION)]] = entrada
+    return entradas
+
+
+class IndiceDirectorios:
+    """Resultado cacheado de recorrer html/ y html_pedidos/"""
+
+    def __init__(self, html_dir: Path = HTML_DIR, html_pedidos_dir: Path = HTML_PEDIDOS_DIR):
+        self.html_dir = html_dir
+        self.html_pedidos_dir = html_pedidos_dir
+        self._detalles: dict[str, os.DirEntry] | None = None
+        self._listas: list[str] | None = None
+
+    def invalidar(self):
+        """Olvida el recorrido anterior; la próxima consulta vuelve a escanear."""
+        self._detalles = None
+        self._listas = None
+
+    def _entradas_detalle(self) -> dict[str, os.DirEntry]:
+        if self._detalles is None:
+            self._detalles = _escanear(self.html_pedidos_dir)
+        return self._detalles
+
+    # --- html_pedidos/ ---
+
+    def ids_con_detalle(self) -> set[str]:
+        """IDs de pedido con página de detalle suelta en html_pedidos/."""
+        return set(self._entradas_detalle())
+
+    def tiene_detalle(self, id_pedido: str) -> bool:
+        return id_pedido in self._entradas_detalle()
+
+    def ruta_detalle(self, id_pedido: str) -> Path | None:
+        entrada = self._entradas_detalle().get(id_pedido)
+        return Path(entrada.path) if entrada is not None else None
+
+    def contar_detalles(self) -> int:
+        return len(self._entradas_detalle())
+
+    def rutas_detalle(self) -> list[Path]:
+        return [Path(entrada.path) for entrada in self._entradas_detalle().values()]
+
+    def olvidar_detalle(self, id_pedido: str):
+        """Quita un pedido del índice (su página se movió al archivo comprimido)."""
+        if self._detalles is not None:
+            self._detalles.pop(id_pedido, None)
+
+    # --- html/ ---
+
+    def paginas_lista(self) -> list[str]:
+        """Nombres de las páginas de lista (pedidos_*.html), de la más antigua a la más reciente."""
+        if self._listas is None:
+            self._listas = sorted(
+                nombre + EXTENSION for nombre in _escanear(self.html_dir) if nombre.startswith(PREFIJO_LISTA)
+            )
+        return self._listas
+
+    def pagina_lista_mas_reciente(self) -> Path | None:
+        """La página de lista con el nombre (fecha) más reciente."""
+        listas = self.paginas_lista()
+        return self.html_dir / listas[-1] if listas else None
+
+
+# Índice compartido por todo el proceso
+indice = IndiceDirectorios()
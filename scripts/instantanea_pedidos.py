@@ -0,0 +1,231 @@
+# scripts/instantanea_pedidos.py
+
+"""
+Instantánea binaria por columnas del histórico de pedidos.
+
+Se escribe en cada compactación (almacen_pedidos.compactar) y se abre con mmap:
+leer sólo `id_pedido`, o un par de columnas, no decodifica direcciones ni
+nombres de producto.
+
+Formato (little-endian):
+  - "PEDCOL01"
+  - por columna: un byte de tipo por fila y un valor de 8 bytes por fila
+      tipo 0 = campo ausente, 1 = null, 2 = texto, 3 = entero, 4 = decimal,
+      5 = otro valor JSON (guardado como texto)
+      los textos se guardan como índice (uint64) en la tabla de cadenas;
+      los números como float64
+  - tabla de cadenas sin repetidos: desplazamientos (uint64, n + 1) + bytes UTF-8
+  - índice id_pedido → fila: números de fila (uint32) ordenados por id_pedido
+  - encabezado JSON (filas, posiciones de cada sección) + su longitud (uint32) + "PEDCOL01"
+
+Las secciones empiezan en múltiplos de 8 bytes.
+"""
+
+import os
+import json
+import mmap
+import struct
+from pathlib import Path
+
+from registro_pedido import como_dict
+
+MAGIA = b"PEDCOL01"
+VERSION = 1
+
+AUSENTE, NULO, TEXTO, ENTERO, DECIMAL, JSON_OTRO = range(6)
+
+
+def _alinear(f):
+    relleno = -f.tell() % 8
+    if relleno:
+        f.write(b"\0" * relleno)
+
+
+def _codificar(valor, cadenas: dict[str, int]) -> tuple[int, bytes]:
+    if valor is None:
+        return NULO, bytes(8)
+    if isinstance(valor, str):
+        return TEXTO, struct.pack("<Q", cadenas.setdefault(valor, len(cadenas)))
+    if isinstance(valor, int) and not isinstance(valor, bool) and abs(valor) < 2 ** 53:
+        return ENTERO, struct.pack("<d", valor)
+    if isinstance(valor, float):
+        return DECIMAL, struct.pack("<d", valor)
+    texto = json.dumps(valor, ensure_ascii=False)
+    return JSON_OTRO, struct.pack("<Q", cadenas.setdefault(texto, len(cadenas)))
+
+
+def escribir_instantanea(ruta: Path, pedidos: list, origen: dict):
+    """
+    Escribe la instantánea de `pedidos` de forma atómica. `origen` identifica la
+    porción del almacén que refleja (p. ej. inodo y tamaño del NDJSON).
+    """
+    filas = len(pedidos)
+    cadenas: dict[str, int] = {}
+    codificadas = {}  # nombre -> (tipos, valores), en orden de aparición
+    for fila, pedido in enumerate(pedidos):
+        for nombre, valor in como_dict(pedido).items():
+            columna = codificadas.get(nombre)
+            if columna is None:
+                columna = codificadas[nombre] = (bytearray(filas), bytearray(8 * filas))
+            columna[0][fila], columna[1][8 * fila:8 * fila + 8] = _codificar(valor, cadenas)
+
+    ids = [pedido.get("id_pedido") or "" for pedido in pedidos]
+    orden = sorted(range(len(pedidos)), key=ids.__getitem__)
+
+    temporal = ruta.with_name(ruta.name + ".tmp")
+    with open(temporal, "wb") as f:
+        f.write(MAGIA)
+        posiciones = {}
+        for nombre, (tipos, valores) in codificadas.items():
+            _alinear(f)
+            inicio_tipos = f.tell()
+            f.write(tipos)
+            _alinear(f)
+            posiciones[nombre] = [inicio_tipos, f.tell()]
+            f.write(valores)
+
+        textos = [texto.encode("utf-8") for texto in cadenas]  # dict conserva el orden de inserción
+        desplazamientos = [0]
+        for texto in textos:
+            desplazamientos.append(desplazamientos[-1] + len(texto))
+        _alinear(f)
+        inicio_desplazamientos = f.tell()
+        f.write(struct.pack(f"<{len(desplazamientos)}Q", *desplazamientos))
+        inicio_textos = f.tell()
+        f.write(b"".join(textos))
+
+        _alinear(f)
+        inicio_indice = f.tell()
+        f.write(struct.pack(f"<{len(orden)}I", *orden))
+
+        encabezado = {
+            "version": VERSION,
+            "filas": len(pedidos),
+            "origen": origen,
+            "columnas": posiciones,
+            "cadenas": [len(textos), inicio_desplazamientos, inicio_textos],
+            "indice": inicio_indice,
+        }
+        datos_encabezado = json.dumps(encabezado).encode("utf-8")
+        f.write(datos_encabezado + struct.pack("<I", len(datos_encabezado)) + MAGIA)
+    os.replace(temporal, ruta)
+
+
+class InstantaneaPedidos:
+    """Lectura por columnas (mmap) de una instantánea escrita con escribir_instantanea."""
+
+    def __init__(self, ruta: Path):
+        with open(ruta, "rb") as f:
+            self._mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        fin = len(self._mapa) - len(MAGIA)
+        if self._mapa[:len(MAGIA)] != MAGIA or self._mapa[fin:] != MAGIA:
+            self._mapa.close()
+            raise ValueError(f"{ruta} no es una instantánea de pedidos")
+        (largo,) = struct.unpack_from("<I", self._mapa, fin - 4)
+        self.encabezado = json.loads(self._mapa[fin - 4 - largo:fin - 4])
+        self.filas = self.encabezado["filas"]
+        self.origen = self.encabezado["origen"]
+        self.nombres_columnas = list(self.encabezado["columnas"])
+
+        vista = memoryview(self._mapa)
+        n_cadenas, inicio_desplazamientos, self._inicio_textos = self.encabezado["cadenas"]
+        self._desplazamientos = vista[inicio_desplazamientos:inicio_desplazamientos + 8 * (n_cadenas + 1)].cast("Q")
+        inicio_indice = self.encabezado["indice"]
+        self._indice = vista[inicio_indice:inicio_indice + 4 * self.filas].cast("I")
+        self._tipos = {}
+        self._enteros = {}
+        self._decimales = {}
+        for nombre, (inicio_tipos, inicio_valores) in self.encabezado["columnas"].items():
+            valores = vista[inicio_valores:inicio_valores + 8 * self.filas]
+            self._tipos[nombre] = vista[inicio_tipos:inicio_tipos + self.filas]
+            self._enteros[nombre] = valores.cast("Q")
+            self._decimales[nombre] = valores.cast("d")
+        self._cache_cadenas: dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return self.filas
+
+    def cerrar(self):
+        for vistas in (self._tipos, self._enteros, self._decimales):
+            for vista in vistas.values():
+                vista.release()
+        self._desplazamientos.release()
+        self._indice.release()
+        self._mapa.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.cerrar()
+
+    def _cadena(self, numero: int) -> str:
+        texto = self._cache_cadenas.get(numero)
+        if texto is None:
+            inicio = self._inicio_textos + self._desplazamientos[numero]
+            fin = self._inicio_textos + self._desplazamientos[numero + 1]
+            texto = self._cache_cadenas[numero] = self._mapa[inicio:fin].decode("utf-8")
+        return texto
+
+    def _valor(self, nombre: str, fila: int, tipo: int):
+        if tipo == TEXTO:
+            return self._cadena(self._enteros[nombre][fila])
+        if tipo == ENTERO:
+            return int(self._decimales[nombre][fila])
+        if tipo == DECIMAL:
+            return self._decimales[nombre][fila]
+        if tipo == JSON_OTRO:
+            return json.loads(self._cadena(self._enteros[nombre][fila]))
+        return None
+
+    def tiene(self, nombre: str, fila: int) -> bool:
+        """True si el pedido de la fila tiene el campo (aunque sea null)."""
+        return nombre in self._tipos and self._tipos[nombre][fila] != AUSENTE
+
+    def columna(self, nombre: str, defecto=None) -> list:
+        """Valores de una columna completa (`defecto` donde el campo no existe)."""
+        if nombre not in self._tipos:
+            return [defecto] * self.filas
+        tipos = self._tipos[nombre]
+        return [defecto if tipo == AUSENTE else self._valor(nombre, fila, tipo) for fila, tipo in enumerate(tipos)]
+
+    def fila(self, fila: int) -> dict:
+        """El pedido completo de la fila, igual al registro original."""
+        return {
+            nombre: self._valor(nombre, fila, self._tipos[nombre][fila])
+            for nombre in self.nombres_columnas
+            if self._tipos[nombre][fila] != AUSENTE
+        }
+
+    def buscar_fila(self, id_pedido: str) -> int | None:
+        """Fila del pedido (búsqueda binaria en el índice ordenado por id_pedido)."""
+        if "id_pedido" not in self._tipos:
+            return None
+        bajo, alto = 0, self.filas
+        while bajo < alto:
+            medio = (bajo + alto) // 2
+            fila = self._indice[medio]
+            actual = self._valor("id_pedido", fila, self._tipos["id_pedido"][fila]) or ""
+            if actual < id_pedido:
+                bajo = medio + 1
+            else:
+                alto = medio
+        if bajo < self.filas:
+            fila = self._indice[bajo]
+            if self._valor("id_pedido", fila, self._tipos["id_pedido"][fila]) == id_pedido:
+                return fila
+        return None
+
+    def buscar(self, id_pedido: str) -> dict | None:
+        fila = self.buscar_fila(id_pedido)
+        return None if fila is None else self.fila(fila)
+
+
+def abrir_instantanea(ruta: Path) -> InstantaneaPedidos | None:
+    """La instantánea de `ruta`, o None si no existe o no se puede leer."""
+    if not ruta.exists():
+        return None
+    try:
+        return InstantaneaPedidos(ruta)
+    except (OSError, ValueError, KeyError):
+        return None
@@ -0,0 +1,286 @@
+# scripts/metricas.py
+
+"""
+Métricas de las ejecuciones en formato de texto de Prometheus.
+
+    import metricas
+    metricas.LLM_LLAMADAS.inc(modelo="qwen2.5:7b", resultado="ok")
+    metricas.PASO_DURACION.observar(12.3, paso="3")
+
+Contadores, medidores e histogramas con etiquetas, sin dependencias externas.
+Cada proceso lleva su propio registro; los parsers que lanza cerebro.py (con
+CEREBRO_METRICAS apuntando a la carpeta de la ejecución) vuelcan el suyo a
+`<carpeta>/<pid>.json`, y cerebro.py combina todos. Las series del LLM llevan la
+etiqueta `script` que pasa cada parser (en modo vigilancia corren dentro de cerebro.py).
+
+Salidas:
+  - archivo para el textfile collector de node_exporter (por defecto
+    reportes/cerebro.prom, o CEREBRO_METRICAS_TEXTFILE). Los contadores e
+    histogramas se acumulan entre ejecuciones (reportes/metricas_acumuladas.json),
+    los medidores describen la última ejecución.
+  - endpoint HTTP en 127.0.0.1 mientras dura la ejecución, sólo si se define
+    CEREBRO_METRICAS_PUERTO (p. ej. 9464): http://127.0.0.1:9464/metrics
+
+Uso:
+    python scripts/metricas.py   # imprime las métricas acumuladas
+"""
+
+import os
+import json
+import time
+import atexit
+import threading
+from pathlib import Path
+
+# === CONFIGURACIÓN ===
+BASE_DIR = Path(__file__).resolve().parent.parent
+REPORTES_DIR = BASE_DIR / "reportes"
+ACUMULADAS = REPORTES_DIR / "metricas_acumuladas.json"
+TEXTFILE = Path(os.environ.get("CEREBRO_METRICAS_TEXTFILE", REPORTES_DIR / "cerebro.prom"))
+ENV_DIRECTORIO = "CEREBRO_METRICAS"
+ENV_PUERTO = "CEREBRO_METRICAS_PUERTO"
+PREFIJO = "cerebro_"
+# Segundos entre volcados de un subproceso (para que el endpoint vea el avance)
+INTERVALO_VOLCADO = 5
+
+LIMITES_LLM = [0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120]
+LIMITES_PASO = [1, 5, 15, 30, 60, 300, 900, 1800, 3600]
+LIMITES_CHEQUEO = [0.01, 0.05, 0.1, 0.25, 0.5, 1, 5]
+
+
+class Metrica:
+    """Una familia de series (mismo nombre, distintas etiquetas)."""
+
+    def __init__(self, registro: "Registro", tipo: str, nombre: str, ayuda: str, limites: list[float] | None = None):
+        self.registro = registro
+        self.tipo = tipo
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.limites = limites
+        # {etiquetas ordenadas: valor}; en histogramas el valor es [conteos por límite..., +Inf, suma]
+        self.valores: dict[tuple, float | list[float]] = {}
+
+    def _clave(self, etiquetas: dict) -> tuple:
+        return tuple(sorted((k, str(v)) for k, v in etiquetas.items()))
+
+    def inc(self, valor: float = 1, **etiquetas):
+        clave = self._clave(etiquetas)
+        with self.registro.bloqueo:
+            self.valores[clave] = self.valores.get(clave, 0) + valor
+        self.registro.cambio()
+
+    def fijar(self, valor: float, **etiquetas):
+        with self.registro.bloqueo:
+            self.valores[self._clave(etiquetas)] = valor
+        self.registro.cambio()
+
+    def observar(self, valor: float, **etiquetas):
+        clave = self._clave(etiquetas)
+        with self.registro.bloqueo:
+            serie = self.valores.setdefault(clave, [0] * (len(self.limites) + 2))
+            for i, limite in enumerate(self.limites):
+                if valor <= limite:
+                    serie[i] += 1
+                    break
+            else:
+                serie[len(self.limites)] += 1
+            serie[-1] += valor
+        self.registro.cambio()
+
+    def combinar(self, valores: dict):
+        """Suma contadores e histogramas; en medidores gana el valor recibido."""
+        for clave, valor in valores.items():
+            if self.tipo == "gauge":
+                self.valores[clave] = valor
+            elif self.tipo == "histogram":
+                serie = self.valores.setdefault(clave, [0] * len(valor))
+                for i, v in enumerate(valor):
+                    serie[i] += v
+            else:
+                self.valores[clave] = self.valores.get(clave, 0) + valor
+
+
+class Registro:
+    def __init__(self):
+        self.metricas: dict[str, Metrica] = {}
+        self.bloqueo = threading.RLock()
+        self._ultimo_volcado = 0.0
+        # True en el proceso que combina los volcados (cerebro.py): no vuelca el suyo
+        self.agregador = False
+
+    def _metrica(self, tipo: str, nombre: str, ayuda: str, limites=None) -> Metrica:
+        if nombre not in self.metricas:
+            self.metricas[nombre] = Metrica(self, tipo, nombre, ayuda, limites)
+        return self.metricas[nombre]
+
+    def contador(self, nombre: str, ayuda: str) -> Metrica:
+        return self._metrica("counter", PREFIJO + nombre, ayuda)
+
+    def medidor(self, nombre: str, ayuda: str) -> Metrica:
+        return self._metrica("gauge", PREFIJO + nombre, ayuda)
+
+    def histograma(self, nombre: str, ayuda: str, limites: list[float]) -> Metrica:
+        return self._metrica("histogram", PREFIJO + nombre, ayuda, limites)
+
+    def cambio(self):
+        """En un subproceso de cerebro, vuelca el registro como mucho cada INTERVALO_VOLCADO segundos."""
+        if os.environ.get(ENV_DIRECTORIO) and not self.agregador and time.monotonic() - self._ultimo_volcado >= INTERVALO_VOLCADO:
+            self.volcar()
+
+    def volcar(self):
+        directorio = os.environ.get(ENV_DIRECTORIO)
+        if not directorio or self.agregador or not any(m.valores for m in self.metricas.values()):
+            return
+        self._ultimo_volcado = time.monotonic()
+        ruta = Path(directorio) / f"{os.getpid()}.json"
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        temporal = ruta.with_name(ruta.name + ".tmp")
+        temporal.write_text(json.dumps(self.a_json()), encoding="utf-8")
+        os.replace(temporal, ruta)
+
+    def a_json(self) -> dict:
+        with self.bloqueo:
+            return {
+                nombre: [[list(map(list, clave)), valor] for clave, valor in metrica.valores.items()]
+                for nombre, metrica in self.metricas.items() if metrica.valores
+            }
+
+    def combinar_json(self, datos: dict):
+        with self.bloqueo:
+            for nombre, series in datos.items():
+                if nombre in self.metricas:
+                    self.metricas[nombre].combinar({tuple(map(tuple, clave)): valor for clave, valor in series})
+
+    def reiniciar(self):
+        """Vuelve a cero todas las series (el modo vigilancia, tras sumar un ciclo a las acumuladas)."""
+        with self.bloqueo:
+            for metrica in self.metricas.values():
+                metrica.valores.clear()
+
+    def copia(self) -> "Registro":
+        """Registro con las mismas métricas y los valores actuales."""
+        nuevo = Registro()
+        for metrica in self.metricas.values():
+            nuevo._metrica(metrica.tipo, metrica.nombre, metrica.ayuda, metrica.limites)
+        nuevo.combinar_json(self.a_json())
+        return nuevo
+
+    def exposicion(self) -> str:
+        """Formato de texto de Prometheus (version 0.0.4)."""
+        lineas = []
+        with self.bloqueo:
+            for metrica in self.metricas.values():
+                if not metrica.valores:
+                    continue
+                lineas.append(f"# HELP {metrica.nombre} {metrica.ayuda}")
+                lineas.append(f"# TYPE {metrica.nombre} {metrica.tipo}")
+                for clave, valor in sorted(metrica.valores.items()):
+                    if metrica.tipo != "histogram":
+                        lineas.append(f"{metrica.nombre}{_etiquetas(clave)} {_numero(valor)}")
+                        continue
+                    acumulado = 0
+                    for limite, conteo in zip(metrica.limites + ["+Inf"], valor):
+                        acumulado += conteo
+                        lineas.append(f"{metrica.nombre}_bucket{_etiquetas(clave + (('le', str(limite)),))} {_numero(acumulado)}")
+                    lineas.append(f"{metrica.nombre}_sum{_etiquetas(clave)} {_numero(valor[-1])}")
+                    lineas.append(f"{metrica.nombre}_count{_etiquetas(clave)} {_numero(acumulado)}")
+        return "\n".join(lineas) + "\n"
+
+
+def _etiquetas(clave: tuple) -> str:
+    if not clave:
+        return ""
+    escapar = lambda v: v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{escapar(v)}"' for k, v in clave) + "}"
+
+
+def _numero(valor: float) -> str:
+    return str(int(valor)) if float(valor).is_integer() else repr(float(valor))
+
+
+registro = Registro()
+atexit.register(registro.volcar)
+
+# --- Métricas del proyecto ---
+PEDIDOS_EXTRAIDOS = registro.contador("pedidos_extraidos_total", "Pedidos extraídos y guardados, por paso")
+LLM_LLAMADAS = registro.contador("llm_llamadas_total", "Llamadas al LLM por script, modelo y resultado")
+LLM_TOKENS = registro.contador("llm_tokens_total", "Tokens procesados por el LLM (tipo=prompt|respuesta)")
+LLM_DURACION = registro.histograma("llm_duracion_segundos", "Duración de cada llamada al LLM", LIMITES_LLM)
+CACHE = registro.contador("cache_total", "Consultas a cachés por resultado (acierto|fallo)")
+PASO_EJECUCIONES = registro.contador("paso_ejecuciones_total", "Pasos ejecutados")
+PASO_FALLOS = registro.contador("paso_fallos_total", "Pasos que terminaron con error")
+PASO_DURACION = registro.histograma("paso_duracion_segundos", "Duración de cada paso", LIMITES_PASO)
+CHEQUEO_DURACION = registro.histograma("chequeo_duracion_segundos", "Duración de cada chequeo de salud", LIMITES_CHEQUEO)
+VIGILANCIA_LATENCIA = registro.histograma("vigilancia_latencia_segundos",
+                                          "Desde que se escribe una página hasta que se procesa (cerebro.py --vigilar)",
+                                          LIMITES_PASO)
+PASO_EN_CURSO = registro.medidor("paso_en_curso", "Número del paso en ejecución (0 si ninguno)")
+ULTIMA_EJECUCION = registro.medidor("ultima_ejecucion_timestamp_segundos", "Fin de la última ejecución (epoch)")
+ULTIMA_EXITO = registro.medidor("ultima_ejecucion_exito", "1 si la última ejecución terminó bien")
+ULTIMA_DURACION = registro.medidor("ultima_ejecucion_duracion_segundos", "Duración de la última ejecución")
+PEDIDOS_ALMACEN = registro.medidor("pedidos_almacen", "Pedidos en el almacén consolidado")
+
+
+def combinar_ejecucion(directorio: Path) -> Registro:
+    """Registro de este proceso más los volcados de los subprocesos en `directorio`."""
+    combinado = registro.copia()
+    if directorio.is_dir():
+        for ruta in sorted(directorio.glob("*.json")):
+            try:
+                combinado.combinar_json(json.loads(ruta.read_text(encoding="utf-8")))
+            except (OSError, ValueError):
+                continue  # volcado a medio escribir
+    return combinado
+
+
+def escribir_textfile(directorio: Path, ruta: Path = TEXTFILE) -> Registro:
+    """Suma la ejecución a las métricas acumuladas y escribe el archivo .prom (atómico)."""
+    total = registro.copia()
+    for metrica in total.metricas.values():
+        metrica.valores.clear()
+    if ACUMULADAS.exists():
+        total.combinar_json(json.loads(ACUMULADAS.read_text(encoding="utf-8")))
+    total.combinar_json(combinar_ejecucion(directorio).a_json())
+
+    for destino, contenido in ((ACUMULADAS, json.dumps(total.a_json())), (ruta, total.exposicion())):
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        temporal = destino.with_name(destino.name + ".tmp")
+        temporal.write_text(contenido, encoding="utf-8")
+        os.replace(temporal, destino)
+    return total
+
+
+def iniciar_servidor(directorio: Path, puerto: int):
+    """Sirve /metrics en 127.0.0.1:puerto (métricas acumuladas + ejecución en curso) en un hilo aparte."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # sólo con CEREBRO_METRICAS_PUERTO
+
+    class Manejador(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            total = combinar_ejecucion(directorio)
+            if ACUMULADAS.exists():
+                anteriores = json.loads(ACUMULADAS.read_text(encoding="utf-8"))
+                # Los medidores de la ejecución en curso tienen prioridad sobre los de la anterior
+                total.combinar_json({n: s for n, s in anteriores.items()
+                                     if n in total.metricas and total.metricas[n].tipo != "gauge"})
+            cuerpo = total.exposicion().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", puerto), Manejador)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+if __name__ == "__main__":
+    if ACUMULADAS.exists():
+        registro.combinar_json(json.loads(ACUMULADAS.read_text(encoding="utf-8")))
+    print(registro.exposicion(), end="")
@@ -1,23 +1,22 @@
 # scripts/parser_detalles_llm.py
 
-import re
 import json
-import csv
-from datetime import datetime
-from openai import OpenAI
-from pathlib import Path
-from bs4 import BeautifulSoup
+import time
+
+from esquemas_llm import ESQUEMA_DETALLES, validar_esquema, calcular_num_predict
+from cliente_ollama import chat_ollama
+from archivo_html import leer_html, archivar, imprimir_archivado
+from trazas import span
+from progreso import Progreso
+import metricas
+from perfilado import desde_argumentos
+from almacen_pedidos import ids_sin_campo, registrar_deltas, necesita_compactacion, compactar, NDJSON_CONSOLIDADO
 
 # === CONFIGURACIÓN ===
+# Nombre con el que se etiquetan el progreso, el consumo del LLM y las métricas
+# (en modo vigilancia este módulo corre dentro de cerebro.py)
+SCRIPT = "parser_detalles_llm"
 LLM = "llama3.1:8b"
-client = OpenAI(base_url="http://localhost:11434/v1", api_key="ollama")
-
-BASE_DIR = Path(__file__).resolve().parent.parent
-HTML_PEDIDOS_DIR = BASE_DIR / "html_pedidos"
-CSV_DIR = BASE_DIR / "csv"
-
-OUTPUT_JSON_CONSOLIDADO = CSV_DIR / "pedidos_consolidados.json"
-OUTPUT_CSV_CONSOLIDADO = CSV_DIR / "pedidos_consolidados.csv"
 
 # --- PROMPT MEJORADO PARA DETALLES ---
 PROMPT = """
@@ -45,98 +44,105 @@ Reglas:
 - Devuelve solo el JSON y nada más.
 """
 
-def limpiar_html(ruta_html: Path) -> str:
+# Tope de tokens para la respuesta de PROMPT, derivado de su esquema
+NUM_PREDICT_DETALLES = calcular_num_predict(ESQUEMA_DETALLES)
+
+def limpiar_html(html: str) -> str:
     """Limpia el HTML de scripts y estilos, devolviendo el texto plano."""
-    with open(ruta_html, "r", encoding="utf-8") as f:
-        soup = BeautifulSoup(f, "html.parser")
+    from bs4 import BeautifulSoup  # sólo si hay pedidos que procesar
+    soup = BeautifulSoup(html, "html.parser")
     for tag in soup(["script", "style", "noscript", "header", "footer"]):
         tag.decompose()
     return soup.get_text(separator="\n", strip=True)
 
 def pedir_llm(texto: str, id_pedido: str) -> dict | None:
     """Envía un bloque de texto al LLM para extraer detalles."""
-    try:
-        print(f"\n🤖 Procesando detalles del pedido {id_pedido} con LLM...")
-        response = client.chat.completions.create(
-            model=LLM,
-            messages=[
-                {"role": "system", "content": PROMPT.strip()},
-                {"role": "user", "content": texto}
-            ],
-            response_format={"type": "json_object"},
-            temperature=0,
-        )
-        content = response.choices[0].message.content.strip()
-        return json.loads(content)
-    except Exception as e:
-        print(f"❌ Error al procesar detalles de {id_pedido} con LLM: {e}")
-        return None
-
-def guardar_datos(datos: list[dict]):
-    """Guarda la lista de datos en los archivos JSON y CSV."""
-    if not datos:
-        return
-    
-    # Guardar JSON
-    with open(OUTPUT_JSON_CONSOLIDADO, "w", encoding="utf-8") as f:
-        json.dump(datos, f, indent=2, ensure_ascii=False)
-    print(f"💾 Archivo JSON actualizado en: {OUTPUT_JSON_CONSOLIDADO.resolve()}")
-    
-    # Guardar CSV
-    headers = datos[0].keys()
-    with open(OUTPUT_CSV_CONSOLIDADO, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=headers)
-        writer.writeheader()
-        writer.writerows(datos)
-    print(f"🧾 Archivo CSV guardado en: {OUTPUT_CSV_CONSOLIDADO.resolve()}")
+    with span("pedir_llm", pedido=id_pedido, modelo=LLM) as atributos:
+        try:
+            print(f"\n🤖 Procesando detalles del pedido {id_pedido} con LLM...")
+            respuesta = chat_ollama(
+                LLM,
+                PROMPT.strip(),
+                texto,
+                formato=ESQUEMA_DETALLES,
+                num_predict=NUM_PREDICT_DETALLES,
+                prompt="detalles",
+                script=SCRIPT,
+            )
+            detalles = json.loads(respuesta["contenido"])
+            problemas = validar_esquema(detalles, ESQUEMA_DETALLES)
+            if problemas:
+                atributos["error"] = "esquema"
+                print(f"❌ Respuesta inválida para {id_pedido}: {'; '.join(problemas)}")
+                return None
+            return detalles
+        except Exception as e:
+            atributos["error"] = type(e).__name__
+            print(f"❌ Error al procesar detalles de {id_pedido} con LLM: {e}")
+            return None
 
 def main():
-    if not OUTPUT_JSON_CONSOLIDADO.exists():
-        print(f"❌ No se encuentra el archivo base {OUTPUT_JSON_CONSOLIDADO}. Ejecuta primero el parser principal.")
-        return
-
-    with open(OUTPUT_JSON_CONSOLIDADO, "r", encoding="utf-8") as f:
-        pedidos = json.load(f)
-
-    # Convertir a diccionario para fácil acceso y actualización
-    pedidos_dict = {p["id_pedido"]: p for p in pedidos}
-    
     # Identificar pedidos a los que les faltan detalles (usando 'direccion_envio' como indicador)
-    pedidos_a_procesar = [p for p in pedidos if "direccion_envio" not in p]
+    ids_a_procesar = ids_sin_campo("direccion_envio")
+    if not NDJSON_CONSOLIDADO.exists():
+        print(f"❌ No se encuentra el archivo base {NDJSON_CONSOLIDADO}. Ejecuta primero el parser principal.")
+        return
 
-    if not pedidos_a_procesar:
+    if not ids_a_procesar:
         print("✅ ¡Excelente! Todos los pedidos en la base de datos ya tienen sus detalles completos.")
         return
 
-    print(f"🔍 Se encontraron {len(pedidos_a_procesar)} pedidos que necesitan ser enriquecidos con detalles.")
-    
-    pedidos_actualizados = 0
-    for pedido_base in pedidos_a_procesar:
-        id_pedido = pedido_base["id_pedido"]
-        html_path = HTML_PEDIDOS_DIR / f"{id_pedido}.html"
-        
-        if not html_path.exists():
-            print(f"⚠️ No se encontró el archivo HTML para el pedido {id_pedido}. Ejecuta primero el script de descarga.")
-            continue
+    print(f"🔍 Se encontraron {len(ids_a_procesar)} pedidos que necesitan ser enriquecidos con detalles.")
+    enriquecer(ids_a_procesar)
+
+def enriquecer(ids_a_procesar: list[str]) -> dict[str, dict]:
+    """
+    Extrae con el LLM los detalles de los pedidos indicados, los registra como
+    deltas y archiva sus páginas. Devuelve {id_pedido: detalles} de los que se
+    pudieron extraer (cerebro.py --vigilar la llama con los pedidos recién llegados).
+    """
+    actualizaciones = {}
+    progreso = Progreso("detalles", total=len(ids_a_procesar), script=SCRIPT)
+    for id_pedido in ids_a_procesar:
+        inicio = time.perf_counter()
+        with span("pedido", pedido=id_pedido):
+            html = leer_html(id_pedido)
             
-        texto_limpio = limpiar_html(html_path)
-        detalles_extraidos = pedir_llm(texto_limpio, id_pedido)
+            if html is None:
+                print(f"⚠️ No se encontró el archivo HTML para el pedido {id_pedido}. Ejecuta primero el script de descarga.")
+                progreso.avanzar(fallido=True)
+                continue
+                
+            with span("limpiar_html", pedido=id_pedido, bytes_html=len(html)):
+                texto_limpio = limpiar_html(html)
+            detalles_extraidos = pedir_llm(texto_limpio, id_pedido)
+        progreso.avanzar(time.perf_counter() - inicio, fallido=detalles_extraidos is None)
 
         if detalles_extraidos:
-            # Actualizar el diccionario del pedido con los nuevos datos
-            pedidos_dict[id_pedido].update(detalles_extraidos)
-            pedidos_actualizados += 1
+            actualizaciones[id_pedido] = detalles_extraidos
             print(f"✨ Detalles de {id_pedido} extraídos y añadidos.")
 
-    if pedidos_actualizados > 0:
-        print(f"\n🔄 Se actualizaron {pedidos_actualizados} pedidos. Guardando archivos...")
-        # Convertir el diccionario de nuevo a una lista para guardar
-        lista_final_pedidos = list(pedidos_dict.values())
-        guardar_datos(lista_final_pedidos)
+    progreso.terminar()
+
+    if actualizaciones:
+        print(f"\n🔄 Se actualizaron {len(actualizaciones)} pedidos. Guardando archivos...")
+        # Sólo se agregan los campos nuevos; la compactación los integra al CSV/JSON
+        with span("registrar_deltas", pedidos=len(actualizaciones)):
+            registrar_deltas(actualizaciones)
+        metricas.PEDIDOS_EXTRAIDOS.inc(len(actualizaciones), paso="5")
+        if necesita_compactacion():
+            with span("compactar"):
+                compactar()
+        # Las páginas ya procesadas pasan al archivo comprimido
+        with span("archivar", pedidos=len(actualizaciones)):
+            imprimir_archivado(*archivar(list(actualizaciones)))
     else:
         print("\n🏁 No se actualizaron pedidos en esta ejecución.")
         
     print("\n✅ Proceso de enriquecimiento de datos finalizado.")
+    return actualizaciones
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # --profile [--profile-muestreo] [--profile-top N]: ver scripts/perfilado.py
+    with desde_argumentos(SCRIPT):
+        main()
\ No newline at end of file
@@ -3,7 +3,7 @@
 import json
 import csv
 from datetime import datetime
-from openai import OpenAI
+from consumo_llm import chat_openai, cliente_openai
 from pathlib import Path
 import re
 
@@ -18,7 +18,6 @@ import re
 MODO_DEPURACION = True
 
 LLM = "llama3.1:8b"
-client = OpenAI(base_url="http://localhost:11434/v1", api_key="ollama")
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 HTML_DIR = BASE_DIR / "html"
@@ -73,7 +72,10 @@ def encontrar_html_mas_reciente(directorio: Path) -> Path | None:
 def llm_limpiar_html(html_crudo: str) -> str | None:
     print("🤖 Paso 1: Pidiendo al LLM que aísle el HTML de la tabla de pedidos...")
     try:
-        response = client.chat.completions.create(
+        response = chat_openai(
+            cliente_openai(),
+            "limpieza",
+            script="parser_html_llm_v2",
             model=LLM,
             messages=[
                 {"role": "system", "content": PROMPT_LIMPIEZA.strip()},
@@ -100,7 +102,10 @@ def llm_limpiar_html(html_crudo: str) -> str | None:
 def llm_extraer_datos(html_limpio: str) -> list[dict] | None:
     print("🤖 Paso 2: Pidiendo al LLM que extraiga los datos estructurados del HTML limpio...")
     try:
-        response = client.chat.completions.create(
+        response = chat_openai(
+            cliente_openai(),
+            "extraccion",
+            script="parser_html_llm_v2",
             model=LLM,
             messages=[
                 {"role": "system", "content": PROMPT_EXTRACCION.strip()},
@@ -3,7 +3,7 @@
 import json
 import csv
 from datetime import datetime
-from openai import OpenAI
+from consumo_llm import chat_openai, cliente_openai
 from pathlib import Path
 import re
 from bs4 import BeautifulSoup
@@ -13,7 +13,6 @@ from bs4 import BeautifulSoup
 MODO_DEPURACION = True
 
 LLM = "llama3.1:8b"
-client = OpenAI(base_url="http://localhost:11434/v1", api_key="ollama")
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 HTML_DIR = BASE_DIR / "html"
@@ -125,7 +124,10 @@ def encontrar_seccion_pedidos(html_crudo: str) -> str | None:
 def llm_extraer_datos(html_limpio: str) -> list[dict] | None:
     print("🤖 Pidiendo al LLM que extraiga los datos estructurados del HTML...")
     try:
-        response = client.chat.completions.create(
+        response = chat_openai(
+            cliente_openai(),
+            "extraccion",
+            script="parser_html_llm_v2_optimizado",
             model=LLM,
             messages=[
                 {"role": "system", "content": PROMPT_EXTRACCION.strip()},
@@ -2,19 +2,33 @@
 
 import re
 import json
-import csv
-from datetime import datetime
-from openai import OpenAI
+import time
+from datetime import datetime, date
 from pathlib import Path
 from bs4 import BeautifulSoup
 
+from cascada_llm import CascadaModelos, MODELOS_CASCADA
+from esquemas_llm import ESQUEMA_EXTRACCION, validar_esquema, calcular_num_predict
+from cliente_ollama import chat_ollama
+from almacen_pedidos import cargar_ids, agregar_pedidos
+from indice_directorios import IndiceDirectorios
+from trazas import span
+from progreso import Progreso
+import metricas
+from perfilado import desde_argumentos
+
 # === CONFIGURACIÓN ===
 # --- MODO DEPURACIÓN ---
 # Se desactiva para que el script guarde los archivos JSON y CSV.
 MODO_DEPURACION = False
 
+# Nombre con el que se etiquetan el progreso, el consumo del LLM y las métricas
+# (en modo vigilancia este módulo corre dentro de cerebro.py)
+SCRIPT = "parser_tabla_llm"
+
+# Modelo de referencia. Los bloques pasan primero por los modelos pequeños de
+# MODELOS_CASCADA y sólo escalan al siguiente si la respuesta no es válida.
 LLM = "llama3.1:8b"
-client = OpenAI(base_url="http://localhost:11434/v1", api_key="ollama")
 
 # --- Rutas de directorios ---
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -22,9 +36,7 @@ HTML_DIR = BASE_DIR / "html"
 CLEAN_TXT_DIR = BASE_DIR / "html"
 CSV_DIR = BASE_DIR / "csv"
 
-# --- Nombres de los archivos de salida consolidados ---
-OUTPUT_JSON_CONSOLIDADO = CSV_DIR / "pedidos_consolidados.json"
-OUTPUT_CSV_CONSOLIDADO = CSV_DIR / "pedidos_consolidados.csv"
+# Los archivos consolidados los gestiona almacen_pedidos.py (escritura incremental)
 
 # --- Prompts ---
 PROMPT_EXTRACCION = """
@@ -58,28 +70,54 @@ PROMPT_DEPURACION = """
 Eres un experto en extracción de datos. Analiza el siguiente bloque de texto de un pedido de Amazon y describe en detalle las diferentes secciones de información que contiene. Sé muy específico sobre las fechas que encuentres y a qué crees que se refieren. Estructura tu respuesta claramente.
 """
 
+PROMPT_REPARACION = """
+Del siguiente fragmento de un pedido de Amazon extrae únicamente los campos que se indican en la primera línea.
+
+Reglas:
+- La "fecha_pedido" es la fecha en formato dd/mm/yyyy que aparece justo después de la línea que dice "hace X tiempo".
+- Usa formato de fecha ISO (aaaa-mm-dd).
+- Si falta un dato, colócalo como null.
+- No inventes nada.
+- Devuelve solo el JSON con esos campos y nada más.
+"""
+
 REGEX_ID_PEDIDO = re.compile(r"^\d{3}-\d{7}-\d{7}$")
 
+# Líneas del bloque donde suele estar cada campo (para los prompts de reparación)
+REGEX_FECHA = re.compile(r"^hace |\b\d{1,2}/\d{1,2}/\d{4}\b")
+PATRONES_LINEAS_CAMPO = {
+    "fecha_pedido": REGEX_FECHA,
+    "fecha_limite_envio": REGEX_FECHA,
+    "asin": re.compile(r"\bASIN\b|\bB0[A-Z0-9]{8}\b"),
+    "sku": re.compile(r"\bSKU\b"),
+    "cantidad": re.compile(r"[Cc]antidad"),
+    "costo_unitario": re.compile(r"\$|MXN"),
+    "subtotal": re.compile(r"\$|MXN|[Ss]ubtotal"),
+}
+
+# Tope de tokens para la respuesta de PROMPT_EXTRACCION, derivado de su esquema
+NUM_PREDICT_EXTRACCION = calcular_num_predict(ESQUEMA_EXTRACCION)
+
 
 def encontrar_html_mas_reciente(directorio: Path) -> Path | None:
     print(f"Buscando archivos HTML en: {directorio}")
-    archivos_html = list(directorio.glob("pedidos_*.html"))
-    if not archivos_html:
+    archivo_mas_reciente = IndiceDirectorios(html_dir=directorio).pagina_lista_mas_reciente()
+    if archivo_mas_reciente is None:
         return None
-    archivo_mas_reciente = max(archivos_html, key=lambda p: p.name)
     print(f"Se usara el archivo mas reciente: {archivo_mas_reciente.name}")
     return archivo_mas_reciente
 
 def limpiar_html_y_guardar(ruta_html: Path, destino_txt: Path) -> str:
     if not ruta_html.exists():
-        print(f"❌ No se encuentra el archivo HTML original: {ruta_html}")
-        exit(1)
-    with open(ruta_html, "r", encoding="utf-8") as f:
-        soup = BeautifulSoup(f, "html.parser")
-    for tag in soup(["script", "style", "noscript"]):
-        tag.decompose()
-    texto_limpio = soup.get_text(separator="\n", strip=True)
-    destino_txt.write_text(texto_limpio, encoding="utf-8")
+        # Una excepción y no exit(): en modo vigilancia esto corre dentro del proceso de cerebro.py
+        raise FileNotFoundError(f"No se encuentra el archivo HTML original: {ruta_html}")
+    with span("limpiar_html_y_guardar", bytes_html=ruta_html.stat().st_size):
+        with open(ruta_html, "r", encoding="utf-8") as f:
+            soup = BeautifulSoup(f, "html.parser")
+        for tag in soup(["script", "style", "noscript"]):
+            tag.decompose()
+        texto_limpio = soup.get_text(separator="\n", strip=True)
+        destino_txt.write_text(texto_limpio, encoding="utf-8")
     print(f"HTML limpio guardado en: {destino_txt}")
     return texto_limpio
 
@@ -114,47 +152,133 @@ def extraer_id_del_bloque(bloque: str) -> str | None:
             return linea
     return None
 
-def pedir_llm_extraccion(texto: str, id_pedido: str) -> dict | None:
+def diagnosticar_campos(pedido: dict, id_candidato: str) -> dict[str, str]:
+    """Devuelve {campo: motivo} con los campos ausentes o inconsistentes del pedido."""
+    propiedades = ESQUEMA_EXTRACCION["properties"]
+    diagnostico = {}
+    for campo in ESQUEMA_EXTRACCION["required"]:
+        if campo not in pedido:
+            diagnostico[campo] = "ausente"
+        elif validar_esquema(pedido[campo], propiedades[campo], campo):
+            diagnostico[campo] = "con tipo o longitud inválida"
+
+    id_pedido = pedido.get("id_pedido")
+    if "id_pedido" not in diagnostico:
+        if not REGEX_ID_PEDIDO.match(id_pedido):
+            diagnostico["id_pedido"] = f"con formato inválido ({id_pedido})"
+        elif id_pedido != id_candidato:
+            diagnostico["id_pedido"] = f"distinto al del bloque ({id_pedido})"
+
+    fecha = pedido.get("fecha_pedido")
+    if "fecha_pedido" not in diagnostico:
+        if fecha is None:
+            diagnostico["fecha_pedido"] = "vacía"
+        else:
+            try:
+                date.fromisoformat(fecha)
+            except ValueError:
+                diagnostico["fecha_pedido"] = f"no interpretable ({fecha})"
+
+    return diagnostico
+
+def validar_pedido_extraido(pedido: dict, id_candidato: str) -> list[str]:
+    """Devuelve la lista de problemas del pedido extraído (vacía si es válido)."""
+    if not isinstance(pedido, dict):
+        return validar_esquema(pedido, ESQUEMA_EXTRACCION)
+
+    problemas = [f"{campo} {motivo}" for campo, motivo in diagnosticar_campos(pedido, id_candidato).items()]
+    problemas.extend(
+        f"campo no esperado '{campo}'" for campo in pedido if campo not in ESQUEMA_EXTRACCION["properties"]
+    )
+    return problemas
+
+def lineas_relevantes(bloque: str, campos: list[str], contexto: int = 1) -> str:
+    """Selecciona del bloque sólo las líneas donde suelen aparecer los campos pedidos."""
+    lineas = bloque.splitlines()
+    patrones = [PATRONES_LINEAS_CAMPO[c] for c in campos if c in PATRONES_LINEAS_CAMPO]
+    if len(patrones) < len(campos):
+        # Hay algún campo sin patrón conocido: se envía el bloque completo
+        return bloque.strip()
+
+    seleccion = set()
+    for i, linea in enumerate(lineas):
+        if any(p.search(linea) for p in patrones):
+            seleccion.update(range(max(0, i - contexto), min(len(lineas), i + contexto + 1)))
+    if not seleccion:
+        return bloque.strip()
+    return "\n".join(lineas[i] for i in sorted(seleccion))
+
+def reparar_pedido(pedido: dict, bloque: str, id_candidato: str, modelo: str = LLM) -> dict | None:
+    """
+    Corrige sólo los campos ausentes o inconsistentes del pedido en lugar de
+    volver a extraerlo completo. El id se toma directamente del bloque; el resto
+    de campos se piden al LLM con un prompt mínimo y las líneas relevantes.
+    """
+    if not isinstance(pedido, dict):
+        return None
+
+    diagnostico = diagnosticar_campos(pedido, id_candidato)
+    reparado = {k: v for k, v in pedido.items() if k in ESQUEMA_EXTRACCION["properties"]}
+    if "id_pedido" in diagnostico:
+        reparado["id_pedido"] = id_candidato
+        del diagnostico["id_pedido"]
+    if not diagnostico:
+        return reparado
+
+    campos = list(diagnostico)
+    print(f"🩹 Pedido {id_candidato}: se solicitan sólo los campos "
+          + ", ".join(f"{c} ({m})" for c, m in diagnostico.items()))
+    esquema = {
+        "type": "object",
+        "properties": {c: ESQUEMA_EXTRACCION["properties"][c] for c in campos},
+        "required": campos,
+        "additionalProperties": False,
+    }
     try:
-        response = client.chat.completions.create(
-            model=LLM,
-            messages=[
-                {"role": "system", "content": PROMPT_EXTRACCION.strip()},
-                {"role": "user", "content": texto.strip()}
-            ],
-            response_format={"type": "json_object"},
-            temperature=0,
+        respuesta = chat_ollama(
+            modelo,
+            PROMPT_REPARACION.strip(),
+            f"Campos: {', '.join(campos)}\n\n{lineas_relevantes(bloque, campos)}",
+            formato=esquema,
+            num_predict=calcular_num_predict(esquema),
+            prompt="reparacion",
+            script=SCRIPT,
         )
-        content = response.choices[0].message.content.strip()
-        return json.loads(content)
+        campos_reparados = json.loads(respuesta["contenido"])
     except Exception as e:
-        print(f"❌ Error al procesar el pedido {id_pedido} con LLM: {e}")
+        print(f"❌ Error al reparar el pedido {id_candidato} con LLM: {e}")
+        return None
+
+    if validar_esquema(campos_reparados, esquema):
         return None
+    reparado.update(campos_reparados)
+    return reparado
+
+def pedir_llm_extraccion(texto: str, id_pedido: str, modelo: str = LLM) -> dict | None:
+    with span("pedir_llm_extraccion", pedido=id_pedido, modelo=modelo) as atributos:
+        try:
+            respuesta = chat_ollama(
+                modelo,
+                PROMPT_EXTRACCION.strip(),
+                texto.strip(),
+                formato=ESQUEMA_EXTRACCION,
+                num_predict=NUM_PREDICT_EXTRACCION,
+                prompt="extraccion",
+                script=SCRIPT,
+            )
+            return json.loads(respuesta["contenido"])
+        except Exception as e:
+            atributos["error"] = type(e).__name__
+            print(f"❌ Error al procesar el pedido {id_pedido} con LLM: {e}")
+            return None
 
 def depurar_bloque_con_llm(texto: str) -> str:
     try:
-        response = client.chat.completions.create(
-            model=LLM,
-            messages=[
-                {"role": "system", "content": PROMPT_DEPURACION.strip()},
-                {"role": "user", "content": texto.strip()}
-            ],
-            temperature=0,
-        )
-        return response.choices[0].message.content.strip()
+        return chat_ollama(LLM, PROMPT_DEPURACION.strip(), texto.strip(), prompt="depuracion", script=SCRIPT)["contenido"]
     except Exception as e:
         return f"❌ Error durante la depuración con LLM: {e}"
 
 
-def guardar_csv(ruta_csv: Path, datos: list[dict]):
-    if not datos: return
-    headers = datos[0].keys()
-    with open(ruta_csv, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=headers)
-        writer.writeheader()
-        writer.writerows(datos)
-    print(f"🧾 Archivo CSV guardado en: {ruta_csv.resolve()}")
-
 def main():
     if MODO_DEPURACION:
         print("="*50)
@@ -167,41 +291,48 @@ def main():
         print("❌ No se encontraron archivos 'pedidos_*.html'. Saliendo.")
         return
 
+    try:
+        procesar_pagina(html_original, cargar_ids())
+    except FileNotFoundError as e:
+        print(f"❌ {e}")
+        exit(1)
+
+
+def procesar_pagina(html_original: Path, ids_existentes: set[str]) -> list[dict]:
+    """
+    Extrae con el LLM los pedidos de la página que no están en `ids_existentes` y
+    los agrega al almacén. Devuelve los pedidos agregados; `ids_existentes` queda
+    actualizado con ellos (cerebro.py --vigilar lo conserva en memoria entre páginas).
+    """
     match = re.search(r"pedidos_(\d{8})", html_original.name)
-    if not match: return
+    if not match: return []
     fecha_archivo = match.group(1)
     
     html_limpio_path = CLEAN_TXT_DIR / f"pedidos_limpio_{fecha_archivo}.txt"
     texto_limpio = limpiar_html_y_guardar(html_original, html_limpio_path)
     
     print("\n📦 Dividiendo el texto en pedidos...")
-    bloques = dividir_en_pedidos(texto_limpio)
+    with span("dividir_en_pedidos") as atributos:
+        bloques = dividir_en_pedidos(texto_limpio)
+        atributos["bloques"] = len(bloques)
     
     if not bloques:
         print("🛑 No se procesarán pedidos.")
-        return
+        return []
 
     print(f"📦 Detectados {len(bloques)} bloques de pedidos en el archivo HTML.\n")
 
-    pedidos_existentes = []
-    ids_existentes = set()
-    if OUTPUT_JSON_CONSOLIDADO.exists():
-        print(f"📂 Leyendo archivo JSON existente: {OUTPUT_JSON_CONSOLIDADO}")
-        try:
-            with open(OUTPUT_JSON_CONSOLIDADO, "r", encoding="utf-8") as f:
-                contenido = f.read()
-                if contenido:
-                    pedidos_existentes = json.loads(contenido)
-                    ids_existentes = {p.get("id_pedido") for p in pedidos_existentes if p.get("id_pedido")}
-            print(f"🔍 Encontrados {len(pedidos_existentes)} pedidos existentes.")
-        except json.JSONDecodeError:
-             print("ADVERTENCIA: El archivo JSON existe pero esta vacio o corrupto.")
-             pedidos_existentes = []
-             ids_existentes = set()
+    if ids_existentes:
+        print(f"🔍 Encontrados {len(ids_existentes)} pedidos existentes.")
     else:
-        print("📋 No se encontró un archivo JSON previo.")
+        print("📋 No se encontraron pedidos previos.")
 
     nuevos_pedidos = []
+    cascada = CascadaModelos(MODELOS_CASCADA)
+    candidatos = {extraer_id_del_bloque(bloque) for bloque in bloques} - ids_existentes - {None}
+    # Cada ID se intenta una sola vez por página, así el progreso avanza una vez por candidato
+    intentados = set()
+    progreso = Progreso("extraccion", total=len(candidatos), script=SCRIPT)
     for i, bloque in enumerate(bloques, 1):
         id_candidato = extraer_id_del_bloque(bloque)
         
@@ -212,6 +343,11 @@ def main():
         if id_candidato in ids_existentes:
             print(f"🔄 Pedido {id_candidato} ya existe en el JSON. Se omite.")
             continue
+
+        if id_candidato in intentados:
+            print(f"🔁 Pedido {id_candidato} repetido en la página. Se omite.")
+            continue
+        intentados.add(id_candidato)
         
         if MODO_DEPURACION:
             print(f"\n--- 🕵️ Analizando bloque para el pedido: {id_candidato} 🕵️ ---")
@@ -226,7 +362,16 @@ def main():
             continue
         else:
             print(f"🤖 Procesando pedido potencial nuevo ({id_candidato})...")
-            pedido_extraido = pedir_llm_extraccion(bloque, id_candidato)
+            inicio = time.perf_counter()
+            with span("pedido", pedido=id_candidato) as atributos:
+                pedido_extraido = cascada.ejecutar(
+                    lambda modelo: pedir_llm_extraccion(bloque, id_candidato, modelo),
+                    lambda pedido: validar_pedido_extraido(pedido, id_candidato),
+                    id_candidato,
+                    reparar=lambda pedido, modelo: reparar_pedido(pedido, bloque, id_candidato, modelo),
+                )
+                atributos["valido"] = pedido_extraido is not None
+            progreso.avanzar(time.perf_counter() - inicio, fallido=pedido_extraido is None)
             if pedido_extraido:
                 id_actual = pedido_extraido.get("id_pedido")
                 if id_actual:
@@ -235,25 +380,25 @@ def main():
                     nuevos_pedidos.append(pedido_extraido)
                     ids_existentes.add(id_actual)
     
+    progreso.terminar()
     if MODO_DEPURACION:
         print("\n🏁 Proceso de depuración completado.")
-        return
+        return []
+
+    cascada.imprimir_resumen()
 
     if not nuevos_pedidos:
         print("\n🏁 No se encontraron pedidos nuevos para agregar. Los archivos están actualizados.")
     else:
         print(f"\n➕ Se agregarán {len(nuevos_pedidos)} pedidos nuevos a los archivos.")
-        lista_final = sorted(pedidos_existentes + nuevos_pedidos, key=lambda p: p.get("fecha_procesado", ""))
-        
-        CSV_DIR.mkdir(parents=True, exist_ok=True)
-        
-        with open(OUTPUT_JSON_CONSOLIDADO, "w", encoding="utf-8") as f:
-            json.dump(lista_final, f, indent=2, ensure_ascii=False)
-        print(f"💾 Archivo JSON actualizado en: {OUTPUT_JSON_CONSOLIDADO.resolve()}")
-        
-        guardar_csv(OUTPUT_CSV_CONSOLIDADO, lista_final)
+        with span("agregar_pedidos", pedidos=len(nuevos_pedidos)):
+            agregar_pedidos(nuevos_pedidos)
+        metricas.PEDIDOS_EXTRAIDOS.inc(len(nuevos_pedidos), paso="3")
 
     print("\nProceso completado exitosamente.")
+    return nuevos_pedidos
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # --profile [--profile-muestreo] [--profile-top N]: ver scripts/perfilado.py
+    with desde_argumentos(SCRIPT):
+        main()
\ No newline at end of file
@@ -0,0 +1,184 @@
+# scripts/perfilado.py
+
+"""
+Perfilado de cerebro.py y de los parsers sin tocar su código.
+
+Por cada bloque perfilado (un paso de cerebro o la ejecución de un script) se guardan:
+
+    <nombre>.pstats        cProfile (abrir con `python -m pstats` o snakeviz)
+    <nombre>.memoria.txt   tracemalloc: las N líneas que más memoria tenían asignada al final
+    <nombre>.muestras.txt  (opcional) muestreo del reloj de pared en formato de pilas
+                           plegadas, compatible con flamegraph.pl y speedscope; a
+                           diferencia de cProfile incluye el tiempo esperando al LLM o al disco
+
+Uso:
+    python cerebro.py --profile [--profile-muestreo] [--profile-top N]
+    python scripts/parser_tabla_llm.py --profile [--profile-muestreo] [--profile-top N]
+    python scripts/perfilado.py [--muestreo] [--top N] [--nombre X] [--salida carpeta] script.py [args...]
+"""
+
+import os
+import sys
+import time
+import threading
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+
+# === CONFIGURACIÓN ===
+BASE_DIR = Path(__file__).resolve().parent.parent
+PERFILES_DIR = BASE_DIR / "reportes" / "perfiles"
+INTERVALO_MUESTREO = 0.005  # segundos entre muestras
+TOP_MEMORIA = 15
+TOP_FUNCIONES = 10
+
+
+class Muestreador(threading.Thread):
+    """Toma la pila del hilo indicado cada INTERVALO_MUESTREO segundos y cuenta las pilas repetidas."""
+
+    def __init__(self, id_hilo: int):
+        super().__init__(daemon=True)
+        self.id_hilo = id_hilo
+        self.pilas = Counter()
+        self._detener = threading.Event()
+
+    def run(self):
+        while not self._detener.wait(INTERVALO_MUESTREO):
+            marco = sys._current_frames().get(self.id_hilo)
+            pila = []
+            while marco is not None:
+                codigo = marco.f_code
+                pila.append(f"{Path(codigo.co_filename).name}:{codigo.co_name}")
+                marco = marco.f_back
+            if pila:
+                self.pilas[";".join(reversed(pila))] += 1
+
+    def detener(self):
+        self._detener.set()
+        self.join()
+
+    def guardar(self, ruta: Path):
+        with open(ruta, "w", encoding="utf-8") as f:
+            for pila, cuenta in self.pilas.most_common():
+                f.write(f"{pila} {cuenta}\n")
+
+    def funciones_mas_vistas(self, limite: int) -> list[tuple[str, int]]:
+        """Funciones en la cima de la pila con más muestras (dónde se pasó el tiempo)."""
+        cimas = Counter()
+        for pila, cuenta in self.pilas.items():
+            cimas[pila.rsplit(";", 1)[-1]] += cuenta
+        return cimas.most_common(limite)
+
+
+@contextmanager
+def perfilar(nombre: str, directorio: Path = PERFILES_DIR, muestreo: bool = False, top: int = TOP_MEMORIA):
+    """Perfila el bloque con cProfile y tracemalloc (y muestreo si se pide) y guarda los resultados."""
+    # Se importan aquí: sin --profile los scripts no pagan su carga al arrancar
+    import cProfile
+    import tracemalloc
+    directorio.mkdir(parents=True, exist_ok=True)
+    iniciado_tracemalloc = not tracemalloc.is_tracing()
+    if iniciado_tracemalloc:
+        tracemalloc.start()
+    muestreador = Muestreador(threading.get_ident()) if muestreo else None
+    if muestreador:
+        muestreador.start()
+    perfil = cProfile.Profile()
+    inicio = time.perf_counter()
+    perfil.enable()
+    try:
+        yield
+    finally:
+        perfil.disable()
+        duracion = time.perf_counter() - inicio
+        if muestreador:
+            muestreador.detener()
+        instantanea = tracemalloc.take_snapshot()
+        _, pico = tracemalloc.get_traced_memory()
+        if iniciado_tracemalloc:
+            tracemalloc.stop()
+
+        base = directorio / nombre
+        perfil.dump_stats(base.with_suffix(".pstats"))
+        with open(base.with_suffix(".memoria.txt"), "w", encoding="utf-8") as f:
+            f.write(f"Pico de memoria trazada: {pico / (1024 * 1024):.2f} MB\n")
+            for estadistica in instantanea.statistics("lineno")[:top]:
+                f.write(f"{estadistica}\n")
+        if muestreador:
+            muestreador.guardar(base.with_suffix(".muestras.txt"))
+        _imprimir_resumen(nombre, base, perfil, duracion, pico, muestreador)
+
+
+def _imprimir_resumen(nombre: str, base: Path, perfil, duracion: float,
+                      pico: int, muestreador: Muestreador | None):
+    import pstats
+    print(f"\n🔬 Perfil de {nombre}: {duracion:.2f}s, pico de memoria {pico / (1024 * 1024):.1f} MB → {base}.*")
+    estadisticas = pstats.Stats(perfil)
+    filas = sorted(estadisticas.stats.items(), key=lambda item: -item[1][3])[:TOP_FUNCIONES]
+    for (archivo, linea, funcion), (_, llamadas, _, acumulado, _) in filas:
+        print(f"   {acumulado:>8.3f}s  x{llamadas:<7} {Path(archivo).name}:{linea}({funcion})")
+    if muestreador:
+        total = sum(muestreador.pilas.values()) or 1
+        print("   Reloj de pared (muestreo):")
+        for funcion, cuenta in muestreador.funciones_mas_vistas(5):
+            print(f"   {cuenta / total:>7.1%}  {funcion}")
+
+
+def opciones(argumentos: list[str]) -> dict | None:
+    """Lee --profile, --profile-muestreo y --profile-top N. None si no se pidió perfilado."""
+    if "--profile" not in argumentos:
+        return None
+    top = TOP_MEMORIA
+    if "--profile-top" in argumentos:
+        top = int(argumentos[argumentos.index("--profile-top") + 1])
+    return {"muestreo": "--profile-muestreo" in argumentos, "top": top}
+
+
+def desde_argumentos(nombre: str):
+    """Context manager para el main de un script: perfila si se pasó --profile."""
+    configuracion = opciones(sys.argv)
+    if configuracion is None:
+        return nullcontext()
+    directorio = PERFILES_DIR / datetime.now().strftime("%Y%m%d_%H%M%S")
+    return perfilar(nombre, directorio, **configuracion)
+
+
+def comando_perfilado(comando: list[str], nombre: str, directorio: Path, muestreo: bool, top: int) -> list[str]:
+    """Reescribe `python script.py args` para que el script corra bajo este módulo."""
+    extra = ["--muestreo"] if muestreo else []
+    return [comando[0], str(Path(__file__)), "--salida", str(directorio), "--nombre", nombre,
+            "--top", str(top), *extra, *comando[1:]]
+
+
+def main():
+    import runpy
+    argumentos = sys.argv[1:]
+    nombre = directorio = None
+    muestreo = False
+    top = TOP_MEMORIA
+    while argumentos and argumentos[0].startswith("--"):
+        opcion = argumentos.pop(0)
+        if opcion == "--muestreo":
+            muestreo = True
+        elif opcion == "--top":
+            top = int(argumentos.pop(0))
+        elif opcion == "--nombre":
+            nombre = argumentos.pop(0)
+        elif opcion == "--salida":
+            directorio = Path(argumentos.pop(0))
+    if not argumentos:
+        print("Uso: python scripts/perfilado.py [--muestreo] [--top N] [--nombre X] [--salida carpeta] script.py [args...]")
+        sys.exit(1)
+
+    script = Path(argumentos[0])
+    sys.argv = argumentos
+    sys.path.insert(0, str(script.resolve().parent))
+    with perfilar(nombre or script.stem,
+                  directorio or PERFILES_DIR / datetime.now().strftime("%Y%m%d_%H%M%S"),
+                  muestreo=muestreo, top=top):
+        runpy.run_path(str(script), run_name="__main__")
+
+
+if __name__ == "__main__":
+    main()
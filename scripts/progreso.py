@@ -0,0 +1,164 @@
+# scripts/progreso.py
+
+"""
+Canal de progreso de los parsers hacia cerebro.py.
+
+    from progreso import Progreso
+
+    progreso = Progreso("extraccion", total=len(pendientes), script="parser_tabla_llm")
+    for pedido in pendientes:
+        inicio = time.perf_counter()
+        ...
+        progreso.avanzar(time.perf_counter() - inicio, fallido=resultado is None)
+    progreso.terminar()
+
+Cada avance se agrega como una línea JSON al archivo que indica CEREBRO_PROGRESO
+(cerebro.py lo fija en reportes/progreso_<id>.ndjson para toda la ejecución):
+
+    {"t": ..., "script": "parser_tabla_llm", "etapa": "extraccion", "tipo": "avance",
+     "hecho": 12, "total": 240, "fallidos": 1, "transcurrido": 61.2,
+     "por_segundo": 0.196, "latencia_media": 4.87, "eta": 1163.4}
+
+  - por_segundo:    pedidos terminados por segundo desde el inicio de la etapa
+  - latencia_media: media móvil de los últimos VENTANA_LATENCIA pedidos
+  - eta:            segundos restantes estimados con la media móvil
+
+cerebro.py lee el archivo mientras corre el paso y lo muestra en una sola línea de
+estado; el último evento de cada script se guarda en el reporte de la ejecución.
+Sin CEREBRO_PROGRESO (script ejecutado a mano) no se escribe nada. El nombre del script
+se pasa explícitamente: en modo vigilancia los parsers corren dentro de cerebro.py y
+sys.argv[0] no los identifica.
+
+Uso:
+    python scripts/progreso.py reportes/progreso_<id>.ndjson   # estado final de cada script
+"""
+
+import os
+import sys
+import json
+import time
+from collections import deque
+from pathlib import Path
+
+# === CONFIGURACIÓN ===
+ENV_PROGRESO = "CEREBRO_PROGRESO"
+VENTANA_LATENCIA = 10  # pedidos en la media móvil de latencia
+
+
+class Progreso:
+    """Cuenta los pedidos terminados de una etapa y publica cada avance en el canal de progreso."""
+
+    def __init__(self, etapa: str, total: int, script: str):
+        self.etapa = etapa
+        self.script = script
+        self.total = total
+        self.hecho = 0
+        self.fallidos = 0
+        self.latencias = deque(maxlen=VENTANA_LATENCIA)
+        self.inicio = time.perf_counter()
+        self.ruta = os.environ.get(ENV_PROGRESO)
+        self._publicar("inicio")
+
+    def avanzar(self, latencia: float | None = None, fallido: bool = False):
+        self.hecho += 1
+        if fallido:
+            self.fallidos += 1
+        if latencia is not None:
+            self.latencias.append(latencia)
+        self._publicar("avance")
+
+    def terminar(self):
+        self._publicar("fin")
+
+    def evento(self, tipo: str) -> dict:
+        transcurrido = time.perf_counter() - self.inicio
+        por_segundo = self.hecho / transcurrido if transcurrido > 0 else 0.0
+        latencia_media = sum(self.latencias) / len(self.latencias) if self.latencias else None
+        restantes = max(self.total - self.hecho, 0)
+        if latencia_media is not None:
+            eta = restantes * latencia_media
+        elif por_segundo:
+            eta = restantes / por_segundo
+        else:
+            eta = None
+        return {
+            "t": round(time.time(), 3),
+            "script": self.script,
+            "etapa": self.etapa,
+            "tipo": tipo,
+            "hecho": self.hecho,
+            "total": self.total,
+            "fallidos": self.fallidos,
+            "transcurrido": round(transcurrido, 3),
+            "por_segundo": round(por_segundo, 4),
+            "latencia_media": round(latencia_media, 3) if latencia_media is not None else None,
+            "eta": round(eta, 1) if eta is not None else None,
+        }
+
+    def _publicar(self, tipo: str):
+        if not self.ruta:
+            return
+        # Una línea corta por escritura en modo append: el lector nunca ve una línea a medias mezclada
+        with open(self.ruta, "a", encoding="utf-8") as f:
+            f.write(json.dumps(self.evento(tipo), ensure_ascii=False) + "\n")
+
+
+class LectorProgreso:
+    """Lee los eventos nuevos del archivo de progreso desde la última posición leída."""
+
+    def __init__(self, ruta: Path):
+        self.ruta = ruta
+        self.posicion = 0
+        self._resto = ""
+
+    def nuevos(self) -> list[dict]:
+        if not self.ruta.exists():
+            return []
+        with open(self.ruta, "r", encoding="utf-8") as f:
+            f.seek(self.posicion)
+            texto = self._resto + f.read()
+            self.posicion = f.tell()
+        lineas = texto.split("\n")
+        self._resto = lineas.pop()  # línea aún incompleta
+        eventos = []
+        for linea in lineas:
+            try:
+                eventos.append(json.loads(linea))
+            except json.JSONDecodeError:
+                continue
+        return eventos
+
+
+def formatear_duracion(segundos: float | None) -> str:
+    if segundos is None:
+        return "--:--"
+    segundos = int(segundos)
+    horas, resto = divmod(segundos, 3600)
+    return f"{horas}:{resto // 60:02d}:{resto % 60:02d}" if horas else f"{resto // 60:02d}:{resto % 60:02d}"
+
+
+def linea_estado(evento: dict) -> str:
+    """Texto de una línea para mostrar el último evento de un script."""
+    total = evento["total"] or 0
+    porcentaje = f" ({evento['hecho'] / total:.0%})" if total else ""
+    latencia = f"{evento['latencia_media']:.1f}s/pedido" if evento["latencia_media"] is not None else "-"
+    fallidos = f" · {evento['fallidos']} fallidos" if evento["fallidos"] else ""
+    return (f"{evento['script']}/{evento['etapa']}: {evento['hecho']}/{total}{porcentaje} · "
+            f"{evento['por_segundo'] * 60:.1f} pedidos/min · {latencia} · "
+            f"ETA {formatear_duracion(evento['eta'])}{fallidos}")
+
+
+def resumen(ruta: Path) -> dict:
+    """Último evento de cada (script, etapa) del archivo de progreso."""
+    ultimos = {}
+    for evento in LectorProgreso(ruta).nuevos():
+        ultimos[f"{evento['script']}/{evento['etapa']}"] = evento
+    return ultimos
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Uso: python scripts/progreso.py <archivo de progreso .ndjson>")
+        sys.exit(1)
+    for evento in resumen(Path(sys.argv[1])).values():
+        print(f"📊 {linea_estado(evento)} · {formatear_duracion(evento['transcurrido'])} transcurrido")
@@ -0,0 +1,142 @@
+# scripts/registro_pedido.py
+
+"""
+Representación compacta en memoria de un pedido.
+
+Un dict por pedido ocupa varias veces lo que sus datos: tabla hash, claves
+repetidas en cada pedido y una copia propia de cada texto. RegistroPedido usa
+`__slots__` con los campos del esquema y comparte (sys.intern) los textos que
+se repiten entre pedidos: estado, SKU, ASIN, producto y fechas.
+
+Se comporta como un Mapping de sólo lectura (`registro["sku"]`, `.get()`,
+`dict(registro)`), así que el código que leía dicts funciona igual. La
+conversión es sin pérdida: los campos ausentes siguen ausentes, los null
+siguen siendo null y los campos fuera del esquema se guardan aparte.
+
+Uso:
+    python scripts/registro_pedido.py --medir   # RSS pico: dicts vs registros
+"""
+
+import sys
+from collections.abc import Mapping
+from operator import attrgetter
+
+# Campos del esquema (almacen_pedidos.COLUMNAS) más la marca de los deltas
+CAMPOS_REGISTRO = (
+    "fecha_pedido", "id_pedido", "producto", "asin", "sku", "cantidad",
+    "costo_unitario", "subtotal", "fecha_limite_envio", "estado_pedido",
+    "fecha_procesado", "direccion_envio", "telefono_comprador", "subtotal_productos",
+    "costo_envio", "total_antes_impuestos", "impuestos", "total_pedido",
+    "fecha_actualizacion",
+)
+# Textos que se repiten entre pedidos y conviene compartir
+CAMPOS_INTERNADOS = frozenset({
+    "fecha_pedido", "producto", "asin", "sku", "fecha_limite_envio",
+    "estado_pedido", "fecha_procesado", "fecha_actualizacion",
+})
+
+_CAMPOS = frozenset(CAMPOS_REGISTRO)
+_AUSENTE = object()
+_leer_campos = attrgetter(*CAMPOS_REGISTRO)
+
+
+class RegistroPedido(Mapping):
+    """Pedido con campos fijos en slots; los campos fuera del esquema van en `_extras`."""
+
+    __slots__ = CAMPOS_REGISTRO + ("_extras",)
+
+    def __init__(self, datos: dict):
+        for campo in CAMPOS_REGISTRO:
+            setattr(self, campo, _AUSENTE)
+        self._extras = None
+        self.actualizar(datos)
+
+    def actualizar(self, datos: dict):
+        """Equivalente a dict.update (se usa para aplicar deltas)."""
+        for campo, valor in datos.items():
+            if campo in _CAMPOS:
+                if campo in CAMPOS_INTERNADOS and type(valor) is str:
+                    valor = sys.intern(valor)
+                setattr(self, campo, valor)
+            else:
+                if self._extras is None:
+                    self._extras = {}
+                self._extras[campo] = valor
+
+    def a_dict(self) -> dict:
+        """El pedido como dict, con los campos del esquema en su orden."""
+        datos = {campo: valor for campo, valor in zip(CAMPOS_REGISTRO, _leer_campos(self)) if valor is not _AUSENTE}
+        if self._extras:
+            datos.update(self._extras)
+        return datos
+
+    def __getitem__(self, campo):
+        if campo in _CAMPOS:
+            valor = getattr(self, campo)
+            if valor is _AUSENTE:
+                raise KeyError(campo)
+            return valor
+        if self._extras is None:
+            raise KeyError(campo)
+        return self._extras[campo]
+
+    def __contains__(self, campo) -> bool:
+        if campo in _CAMPOS:
+            return getattr(self, campo) is not _AUSENTE
+        return self._extras is not None and campo in self._extras
+
+    def __iter__(self):
+        for campo in CAMPOS_REGISTRO:
+            if getattr(self, campo) is not _AUSENTE:
+                yield campo
+        if self._extras:
+            yield from self._extras
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"RegistroPedido({self.a_dict()!r})"
+
+
+def como_dict(pedido: Mapping) -> dict:
+    """dict del pedido, sea RegistroPedido o dict."""
+    return pedido.a_dict() if isinstance(pedido, RegistroPedido) else pedido
+
+
+def _medir(compacto: bool) -> int:
+    """RSS pico (KB) de cargar el almacén como dicts o como RegistroPedido."""
+    import json
+    import resource
+    from almacen_pedidos import NDJSON_CONSOLIDADO
+
+    pedidos = []
+    with open(NDJSON_CONSOLIDADO, "rb") as f:
+        for linea in f:
+            if linea.strip():
+                pedido = json.loads(linea)
+                pedidos.append(RegistroPedido(pedido) if compacto else pedido)
+    print(f"   {len(pedidos)} pedidos cargados como {'RegistroPedido' if compacto else 'dict'}")
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+if __name__ == "__main__":
+    if "--medir" in sys.argv:
+        if "--modo" in sys.argv:
+            # Proceso hijo: una sola medición por proceso (el pico de RSS no baja)
+            print(_medir(sys.argv[sys.argv.index("--modo") + 1] == "registro"))
+        else:
+            import subprocess
+            resultados = {}
+            for modo in ("dict", "registro"):
+                salida = subprocess.run(
+                    [sys.executable, __file__, "--medir", "--modo", modo],
+                    capture_output=True, text=True, check=True,
+                ).stdout.splitlines()
+                print(salida[0])
+                resultados[modo] = int(salida[-1])
+            ahorro = 1 - resultados["registro"] / resultados["dict"]
+            print(f"📏 RSS pico: dict {resultados['dict'] / 1024:.1f} MB | "
+                  f"RegistroPedido {resultados['registro'] / 1024:.1f} MB | ahorro {ahorro:.0%}")
+    else:
+        print("Uso: python scripts/registro_pedido.py --medir")
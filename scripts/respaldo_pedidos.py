@@ -0,0 +1,283 @@
+# scripts/respaldo_pedidos.py
+
+"""
+Respaldos deduplicados y comprimidos de los archivos consolidados.
+
+Cada archivo se divide en trozos que terminan en un salto de línea elegido por
+el contenido (crc32 de la línea), así una línea agregada o modificada sólo
+cambia el trozo que la contiene. Cada trozo se guarda comprimido (zlib) una
+sola vez, con su SHA-256 como nombre:
+
+    csv/backup/objetos/ab/abcdef...       trozos comprimidos
+    csv/backup/instantaneas/<id>.json     manifiesto de cada respaldo
+
+El manifiesto lista, por archivo, su tamaño, su SHA-256 y sus trozos en orden.
+Un archivo que no cambió desde el respaldo anterior (mismo tamaño y fecha de
+modificación) reutiliza la lista de trozos sin volver a leerse.
+
+Retención: se conservan el respaldo más reciente de cada hora, de cada día y de
+cada mes, hasta RETENCION[...] de cada tipo; los trozos que ya no usa ningún
+manifiesto se eliminan.
+
+Uso:
+    python scripts/respaldo_pedidos.py                    # crea respaldo y aplica retención
+    python scripts/respaldo_pedidos.py --listar
+    python scripts/respaldo_pedidos.py --verificar [id]   # todos si no se indica id
+    python scripts/respaldo_pedidos.py --restaurar <id> [--destino carpeta]
+"""
+
+import os
+import sys
+import json
+import zlib
+import hashlib
+from datetime import datetime
+from pathlib import Path
+
+from almacen_pedidos import (
+    CSV_DIR, NDJSON_CONSOLIDADO, NDJSON_DELTAS, INDICE_CAMBIOS, GENERACION_INDICE,
+    OUTPUT_CSV_CONSOLIDADO, OUTPUT_JSON_CONSOLIDADO,
+)
+import metricas
+
+# === CONFIGURACIÓN ===
+BACKUP_DIR = CSV_DIR / "backup"
+OBJETOS_DIR = BACKUP_DIR / "objetos"
+INSTANTANEAS_DIR = BACKUP_DIR / "instantaneas"
+RESTAURADOS_DIR = BACKUP_DIR / "restaurados"
+
+# Archivos respaldados (la instantánea binaria y la caché de analítica se regeneran)
+ARCHIVOS_RESPALDO = [
+    NDJSON_CONSOLIDADO, NDJSON_DELTAS, INDICE_CAMBIOS, GENERACION_INDICE,
+    OUTPUT_CSV_CONSOLIDADO, OUTPUT_JSON_CONSOLIDADO,
+]
+
+# Corte de trozos: al final de una línea cuyo crc32 cumple la máscara (≈1 de cada 128 líneas)
+MASCARA_CORTE = 0x7F
+TAMANO_MINIMO_TROZO = 8 * 1024
+TAMANO_MAXIMO_TROZO = 1024 * 1024
+NIVEL_COMPRESION = 6
+
+# Cuántos respaldos conservar por tipo de periodo
+RETENCION = {"horario": 24, "diario": 30, "mensual": 12}
+FORMATO_PERIODO = {"horario": "%Y%m%d%H", "diario": "%Y%m%d", "mensual": "%Y%m"}
+FORMATO_ID = "%Y%m%d_%H%M%S"
+
+
+def _ruta_objeto(huella: str) -> Path:
+    return OBJETOS_DIR / huella[:2] / huella
+
+
+def _trozos(f):
+    """Divide el archivo en trozos terminados en línea, con cortes definidos por el contenido."""
+    trozo = bytearray()
+    for linea in f:
+        trozo += linea
+        if len(trozo) >= TAMANO_MAXIMO_TROZO or (
+            len(trozo) >= TAMANO_MINIMO_TROZO and zlib.crc32(linea) & MASCARA_CORTE == 0
+        ):
+            yield bytes(trozo)
+            trozo.clear()
+    if trozo:
+        yield bytes(trozo)
+
+
+def _guardar_objeto(datos: bytes) -> tuple[str, bool]:
+    """Guarda el trozo si no existe. Devuelve (huella, si era nuevo)."""
+    huella = hashlib.sha256(datos).hexdigest()
+    ruta = _ruta_objeto(huella)
+    if ruta.exists():
+        return huella, False
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    temporal = ruta.with_name(ruta.name + ".tmp")
+    temporal.write_bytes(zlib.compress(datos, NIVEL_COMPRESION))
+    os.replace(temporal, ruta)
+    return huella, True
+
+
+def _leer_objeto(huella: str) -> bytes:
+    datos = zlib.decompress(_ruta_objeto(huella).read_bytes())
+    if hashlib.sha256(datos).hexdigest() != huella:
+        raise ValueError(f"trozo {huella[:12]} dañado")
+    return datos
+
+
+def listar_instantaneas() -> list[str]:
+    """IDs de los respaldos, del más antiguo al más reciente."""
+    if not INSTANTANEAS_DIR.exists():
+        return []
+    return sorted(ruta.stem for ruta in INSTANTANEAS_DIR.glob("*.json"))
+
+
+def cargar_manifiesto(id_instantanea: str) -> dict:
+    with open(INSTANTANEAS_DIR / f"{id_instantanea}.json", "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def crear_respaldo() -> dict:
+    """Respalda ARCHIVOS_RESPALDO y devuelve el manifiesto con estadísticas."""
+    anteriores = listar_instantaneas()
+    previo = cargar_manifiesto(anteriores[-1])["archivos"] if anteriores else {}
+
+    ahora = datetime.now()
+    id_instantanea = ahora.strftime(FORMATO_ID)
+    if id_instantanea in anteriores:
+        id_instantanea += f"_{len(anteriores)}"
+
+    archivos = {}
+    nuevos = bytes_nuevos = 0
+    for ruta in ARCHIVOS_RESPALDO:
+        if not ruta.exists():
+            continue
+        estado = ruta.stat()
+        anterior = previo.get(ruta.name)
+        if anterior and anterior["tamano"] == estado.st_size and anterior["mtime_ns"] == estado.st_mtime_ns:
+            archivos[ruta.name] = anterior
+            metricas.CACHE.inc(cache="respaldo_archivos", resultado="acierto")
+            continue
+        metricas.CACHE.inc(cache="respaldo_archivos", resultado="fallo")
+        huella_archivo = hashlib.sha256()
+        trozos = []
+        with open(ruta, "rb") as f:
+            for datos in _trozos(f):
+                huella_archivo.update(datos)
+                huella, es_nuevo = _guardar_objeto(datos)
+                trozos.append(huella)
+                if es_nuevo:
+                    nuevos += 1
+                    bytes_nuevos += len(datos)
+        archivos[ruta.name] = {
+            "tamano": estado.st_size,
+            "mtime_ns": estado.st_mtime_ns,
+            "sha256": huella_archivo.hexdigest(),
+            "trozos": trozos,
+        }
+
+    manifiesto = {"id": id_instantanea, "fecha": ahora.isoformat(), "archivos": archivos}
+    INSTANTANEAS_DIR.mkdir(parents=True, exist_ok=True)
+    ruta_manifiesto = INSTANTANEAS_DIR / f"{id_instantanea}.json"
+    temporal = ruta_manifiesto.with_name(ruta_manifiesto.name + ".tmp")
+    temporal.write_text(json.dumps(manifiesto, indent=2), encoding="utf-8")
+    os.replace(temporal, ruta_manifiesto)
+
+    manifiesto["estadisticas"] = {"trozos_nuevos": nuevos, "bytes_nuevos": bytes_nuevos}
+    return manifiesto
+
+
+def instantaneas_a_conservar(ids: list[str]) -> set[str]:
+    """IDs que la política RETENCION conserva (siempre incluye el más reciente)."""
+    conservar = set(ids[-1:])
+    for tipo, cantidad in RETENCION.items():
+        periodos = set()
+        for id_instantanea in reversed(ids):
+            if len(periodos) >= cantidad:
+                break
+            fecha = datetime.strptime(id_instantanea[:15], FORMATO_ID)
+            periodo = fecha.strftime(FORMATO_PERIODO[tipo])
+            if periodo not in periodos:
+                periodos.add(periodo)
+                conservar.add(id_instantanea)
+    return conservar
+
+
+def aplicar_retencion() -> tuple[int, int]:
+    """Borra los manifiestos fuera de la política y los trozos sin referencias. Devuelve (manifiestos, trozos) borrados."""
+    ids = listar_instantaneas()
+    conservar = instantaneas_a_conservar(ids)
+    borrados = 0
+    for id_instantanea in ids:
+        if id_instantanea not in conservar:
+            (INSTANTANEAS_DIR / f"{id_instantanea}.json").unlink()
+            borrados += 1
+
+    en_uso = set()
+    for id_instantanea in conservar:
+        for archivo in cargar_manifiesto(id_instantanea)["archivos"].values():
+            en_uso.update(archivo["trozos"])
+    trozos_borrados = 0
+    if OBJETOS_DIR.exists():
+        for ruta in OBJETOS_DIR.glob("*/*"):
+            if ruta.name not in en_uso:
+                ruta.unlink()
+                trozos_borrados += 1
+    return borrados, trozos_borrados
+
+
+def verificar(id_instantanea: str) -> list[str]:
+    """Comprueba que todos los trozos existan, no estén dañados y reconstruyan cada archivo."""
+    problemas = []
+    for nombre, archivo in cargar_manifiesto(id_instantanea)["archivos"].items():
+        huella_archivo = hashlib.sha256()
+        try:
+            for huella in archivo["trozos"]:
+                huella_archivo.update(_leer_objeto(huella))
+        except (OSError, ValueError, zlib.error) as e:
+            problemas.append(f"{nombre}: {e}")
+            continue
+        if huella_archivo.hexdigest() != archivo["sha256"]:
+            problemas.append(f"{nombre}: el contenido reconstruido no coincide")
+    return problemas
+
+
+def restaurar(id_instantanea: str, destino: Path | None = None) -> Path:
+    """Reconstruye los archivos del respaldo en `destino` (por defecto csv/backup/restaurados/<id>)."""
+    destino = destino or RESTAURADOS_DIR / id_instantanea
+    destino.mkdir(parents=True, exist_ok=True)
+    for nombre, archivo in cargar_manifiesto(id_instantanea)["archivos"].items():
+        ruta = destino / nombre
+        temporal = ruta.with_name(ruta.name + ".tmp")
+        huella_archivo = hashlib.sha256()
+        with open(temporal, "wb") as f:
+            for huella in archivo["trozos"]:
+                datos = _leer_objeto(huella)
+                huella_archivo.update(datos)
+                f.write(datos)
+        if huella_archivo.hexdigest() != archivo["sha256"]:
+            temporal.unlink()
+            raise ValueError(f"{nombre}: el contenido reconstruido no coincide")
+        os.replace(temporal, ruta)
+    return destino
+
+
+def uso_disco() -> int:
+    """Bytes ocupados por los trozos comprimidos."""
+    if not OBJETOS_DIR.exists():
+        return 0
+    return sum(ruta.stat().st_size for ruta in OBJETOS_DIR.glob("*/*"))
+
+
+def main():
+    argumentos = sys.argv[1:]
+    if "--listar" in argumentos:
+        for id_instantanea in listar_instantaneas():
+            archivos = cargar_manifiesto(id_instantanea)["archivos"]
+            tamano = sum(a["tamano"] for a in archivos.values()) / (1024 * 1024)
+            print(f"   {id_instantanea}  {len(archivos)} archivos  {tamano:.2f} MB")
+        print(f"💾 Espacio usado por los trozos: {uso_disco() / (1024 * 1024):.2f} MB")
+    elif "--verificar" in argumentos:
+        posicion = argumentos.index("--verificar") + 1
+        ids = argumentos[posicion:posicion + 1] or listar_instantaneas()
+        errores = 0
+        for id_instantanea in ids:
+            problemas = verificar(id_instantanea)
+            errores += len(problemas)
+            print(f"{'✅' if not problemas else '❌'} {id_instantanea}")
+            for problema in problemas:
+                print(f"   - {problema}")
+        sys.exit(1 if errores else 0)
+    elif "--restaurar" in argumentos:
+        id_instantanea = argumentos[argumentos.index("--restaurar") + 1]
+        destino = Path(argumentos[argumentos.index("--destino") + 1]) if "--destino" in argumentos else None
+        print(f"♻️  Respaldo {id_instantanea} restaurado en: {restaurar(id_instantanea, destino).resolve()}")
+    else:
+        manifiesto = crear_respaldo()
+        estadisticas = manifiesto["estadisticas"]
+        print(f"💾 Respaldo {manifiesto['id']}: {len(manifiesto['archivos'])} archivos, "
+              f"{estadisticas['trozos_nuevos']} trozos nuevos ({estadisticas['bytes_nuevos'] / 1024:.1f} KB sin comprimir)")
+        borrados, trozos_borrados = aplicar_retencion()
+        if borrados:
+            print(f"🧹 Retención: {borrados} respaldos y {trozos_borrados} trozos eliminados")
+
+
+if __name__ == "__main__":
+    main()
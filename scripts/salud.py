@@ -0,0 +1,128 @@
+# scripts/salud.py
+
+"""
+Chequeos de salud con caché para cerebro.py.
+
+    salud = Salud()
+    salud.registrar("ollama", verificar_ollama, ttl=120)
+    salud.registrar("dependencias", verificar_dependencias)        # ttl=None: toda la ejecución
+    if not salud.verificar("directorios", "dependencias", "ollama"):
+        ...
+
+  - Los chequeos pedidos juntos corren en paralelo (hilos: son E/S, subprocesos y HTTP).
+  - Un resultado correcto se reutiliza hasta que vence su TTL; un fallo no se guarda,
+    así que el siguiente verificar() lo vuelve a comprobar.
+  - La latencia de cada chequeo se mide aparte de la del paso que lo pide: queda en
+    la métrica cerebro_chequeo_duracion_segundos, en el span "salud" de las trazas y en
+    instantanea(), que cerebro.py agrega al reporte de la ejecución.
+"""
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+
+import metricas
+from trazas import span
+
+# === CONFIGURACIÓN ===
+MAXIMO_HILOS = 4
+
+
+class Chequeo:
+    """Un chequeo registrado, su último resultado y sus estadísticas de la ejecución."""
+
+    def __init__(self, nombre: str, funcion, ttl: float | None):
+        self.nombre = nombre
+        self.funcion = funcion
+        self.ttl = ttl
+        self.ok: bool | None = None
+        self.momento = 0.0          # time.monotonic() del último resultado
+        self.ejecuciones = 0
+        self.aciertos_cache = 0
+        self.fallos = 0
+        self.latencia_total = 0.0
+        self.latencia_max = 0.0
+        self.error: str | None = None
+
+    def vigente(self) -> bool:
+        if not self.ok:
+            return False
+        return self.ttl is None or time.monotonic() - self.momento < self.ttl
+
+    def ejecutar(self) -> bool:
+        inicio = time.perf_counter()
+        try:
+            ok = bool(self.funcion())
+            self.error = None
+        except Exception as e:
+            ok = False
+            self.error = f"{type(e).__name__}: {e}"
+        latencia = time.perf_counter() - inicio
+        self.ok = ok
+        self.momento = time.monotonic()
+        self.ejecuciones += 1
+        self.fallos += 0 if ok else 1
+        self.latencia_total += latencia
+        self.latencia_max = max(self.latencia_max, latencia)
+        metricas.CHEQUEO_DURACION.observar(latencia, chequeo=self.nombre)
+        return ok
+
+    def resumen(self) -> dict:
+        return {
+            "ok": self.ok,
+            "ejecuciones": self.ejecuciones,
+            "aciertos_cache": self.aciertos_cache,
+            "fallos": self.fallos,
+            "latencia_total": round(self.latencia_total, 4),
+            "latencia_max": round(self.latencia_max, 4),
+            "latencia_media": round(self.latencia_total / self.ejecuciones, 4) if self.ejecuciones else 0.0,
+            "ttl": self.ttl,
+            **({"error": self.error} if self.error else {}),
+        }
+
+
+class Salud:
+    """Registro de chequeos; verificar() corre en paralelo los que no tienen un resultado vigente."""
+
+    def __init__(self):
+        self.chequeos: dict[str, Chequeo] = {}
+        self._bloqueo = threading.Lock()
+
+    def registrar(self, nombre: str, funcion, ttl: float | None = None):
+        self.chequeos[nombre] = Chequeo(nombre, funcion, ttl)
+
+    def verificar(self, *nombres: str) -> bool:
+        """True si todos los chequeos pedidos están bien (desde la caché o comprobados ahora)."""
+        # El bloqueo evita que dos hilos comprueben lo mismo a la vez
+        with self._bloqueo, span("salud", chequeos=",".join(nombres)) as atributos:
+            pendientes = []
+            for nombre in nombres:
+                chequeo = self.chequeos[nombre]
+                if chequeo.vigente():
+                    chequeo.aciertos_cache += 1
+                    metricas.CACHE.inc(cache="salud", resultado="acierto")
+                else:
+                    metricas.CACHE.inc(cache="salud", resultado="fallo")
+                    pendientes.append(chequeo)
+            atributos["comprobados"] = len(pendientes)
+            if len(pendientes) == 1:
+                pendientes[0].ejecutar()
+            elif pendientes:
+                # Cada hilo con su copia del contexto actual: lo que registre el chequeo cuelga de este span
+                contextos = [copy_context() for _ in pendientes]
+                with ThreadPoolExecutor(max_workers=min(MAXIMO_HILOS, len(pendientes))) as hilos:
+                    list(hilos.map(lambda par: par[0].run(par[1].ejecutar), zip(contextos, pendientes)))
+            atributos["ok"] = all(self.chequeos[nombre].ok for nombre in nombres)
+            return atributos["ok"]
+
+    def invalidar(self, *nombres: str):
+        """Descarta los resultados guardados (todos si no se indica ninguno)."""
+        with self._bloqueo:
+            for nombre in nombres or list(self.chequeos):
+                self.chequeos[nombre].ok = None
+
+    def instantanea(self) -> dict:
+        """Estado y latencias de cada chequeo durante la ejecución."""
+        return {nombre: chequeo.resumen() for nombre, chequeo in self.chequeos.items()
+                if chequeo.ejecuciones or chequeo.aciertos_cache}
@@ -0,0 +1,231 @@
+# scripts/trazas.py
+
+"""
+Trazas de tiempo por etapa y reporte de cada ejecución.
+
+    from trazas import span
+
+    with span("limpiar_html", pedido=id_pedido) as atributos:
+        ...
+        atributos["caracteres"] = len(texto)   # atributos extra, opcional
+
+Cada span registra su ruta (p. ej. "paso_3/pedir_llm_extraccion/llm"), su
+duración y sus atributos. Si la variable de entorno CEREBRO_TRAZAS indica un
+archivo (cerebro.py la fija para toda la ejecución, incluidos los parsers que
+lanza como subprocesos), los spans se agregan a ese archivo NDJSON; si no,
+sólo quedan en memoria. Los spans de un subproceso cuelgan de la ruta indicada
+en CEREBRO_TRAZAS_PADRE.
+
+El campo "proceso" de cada span es el script que hizo el trabajo: se pasa con
+span(..., proceso="parser_tabla_llm") y lo heredan los spans anidados. En un
+subproceso lo fija cerebro.py en CEREBRO_TRAZAS_PROCESO; sin ninguno de los dos
+es "cerebro".
+
+Al terminar, cerebro.py llama a escribir_reporte() para generar el reporte JSON
+con el desglose por etapa y los histogramas de latencia por pedido.
+
+Uso:
+    python scripts/trazas.py reportes/trazas_<id>.ndjson   # genera e imprime el reporte
+"""
+
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+# === CONFIGURACIÓN ===
+ENV_TRAZAS = "CEREBRO_TRAZAS"
+# Ruta del span que lanzó el subproceso (los spans del parser cuelgan del paso de cerebro)
+ENV_RUTA_PADRE = "CEREBRO_TRAZAS_PADRE"
+# Script que lanzó cerebro.py como subproceso (campo "proceso" de sus spans)
+ENV_PROCESO = "CEREBRO_TRAZAS_PROCESO"
+PROCESO_DEFECTO = "cerebro"
+# Límites (segundos) de los histogramas de latencia por pedido
+LIMITES_HISTOGRAMA = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120]
+# Spans en memoria antes de escribirlos al archivo
+TAMANO_BUFFER = 50
+
+_pila: ContextVar[tuple[str, ...]] = ContextVar("pila_trazas", default=())
+_proceso: ContextVar[str | None] = ContextVar("proceso_trazas", default=None)
+_registros: list[dict] = []
+_pendientes: list[dict] = []
+_bloqueo = threading.Lock()
+_raiz = tuple(parte for parte in os.environ.get(ENV_RUTA_PADRE, "").split("/") if parte)
+
+
+def _volcar():
+    """Escribe los spans pendientes en el archivo de trazas de la ejecución."""
+    ruta = os.environ.get(ENV_TRAZAS)
+    with _bloqueo:
+        pendientes = _pendientes[:]
+        _pendientes.clear()
+    if not ruta or not pendientes:
+        return
+    with open(ruta, "a", encoding="utf-8") as f:
+        f.write("".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in pendientes))
+
+
+atexit.register(_volcar)
+
+
+def registrar(registro: dict):
+    with _bloqueo:
+        _registros.append(registro)
+        _pendientes.append(registro)
+        lleno = len(_pendientes) >= TAMANO_BUFFER
+    if lleno:
+        _volcar()
+
+
+@contextmanager
+def span(nombre: str, proceso: str | None = None, **atributos):
+    """Mide el bloque; los atributos (y los que se agreguen al dict devuelto) se guardan con el span.
+    `proceso` vale para este span y los anidados; sin él se hereda del span padre."""
+    padre = _pila.get() or _raiz
+    proceso = proceso or _proceso.get() or os.environ.get(ENV_PROCESO) or PROCESO_DEFECTO
+    token = _pila.set(padre + (nombre,))
+    token_proceso = _proceso.set(proceso)
+    inicio_reloj = time.time()
+    inicio = time.perf_counter()
+    error = None
+    try:
+        yield atributos
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        duracion = time.perf_counter() - inicio
+        _pila.reset(token)
+        _proceso.reset(token_proceso)
+        registro = {
+            "nombre": nombre,
+            "ruta": "/".join(padre + (nombre,)),
+            "proceso": proceso,
+            "inicio": round(inicio_reloj, 6),
+            "duracion": round(duracion, 6),
+            **atributos,
+        }
+        if error:
+            registro["error"] = error
+        registrar(registro)
+
+
+def ruta_actual() -> str:
+    """Ruta del span activo, para pasarla a un subproceso en ENV_RUTA_PADRE."""
+    return "/".join(_pila.get() or _raiz)
+
+
+def registros_en_memoria() -> list[dict]:
+    with _bloqueo:
+        return list(_registros)
+
+
+def olvidar_registros():
+    """Escribe los spans pendientes y libera los que había en memoria (procesos de larga duración)."""
+    _volcar()
+    with _bloqueo:
+        _registros.clear()
+
+
+def leer_trazas(ruta: Path) -> list[dict]:
+    if not ruta.exists():
+        return []
+    with open(ruta, "r", encoding="utf-8") as f:
+        return [json.loads(linea) for linea in f if linea.strip()]
+
+
+def _percentil(valores_ordenados: list[float], p: float) -> float:
+    if not valores_ordenados:
+        return 0.0
+    posicion = min(len(valores_ordenados) - 1, int(round(p * (len(valores_ordenados) - 1))))
+    return valores_ordenados[posicion]
+
+
+def histograma(duraciones: list[float]) -> dict:
+    """Conteo por intervalo (`<=límite`) más percentiles."""
+    cubetas = {f"<={limite}": 0 for limite in LIMITES_HISTOGRAMA}
+    cubetas[f">{LIMITES_HISTOGRAMA[-1]}"] = 0
+    for duracion in duraciones:
+        for limite in LIMITES_HISTOGRAMA:
+            if duracion <= limite:
+                cubetas[f"<={limite}"] += 1
+                break
+        else:
+            cubetas[f">{LIMITES_HISTOGRAMA[-1]}"] += 1
+    ordenadas = sorted(duraciones)
+    return {
+        "n": len(ordenadas),
+        "p50": round(_percentil(ordenadas, 0.50), 4),
+        "p90": round(_percentil(ordenadas, 0.90), 4),
+        "p99": round(_percentil(ordenadas, 0.99), 4),
+        "max": round(ordenadas[-1], 4) if ordenadas else 0.0,
+        "cubetas": cubetas,
+    }
+
+
+def generar_reporte(registros: list[dict]) -> dict:
+    """Desglose por etapa (ruta del span) e histogramas de latencia de los spans por pedido."""
+    etapas = {}
+    por_pedido = {}
+    for registro in registros:
+        etapa = etapas.setdefault(registro["ruta"], {"llamadas": 0, "total": 0.0, "max": 0.0, "errores": 0})
+        etapa["llamadas"] += 1
+        etapa["total"] += registro["duracion"]
+        etapa["max"] = max(etapa["max"], registro["duracion"])
+        if registro.get("error"):
+            etapa["errores"] += 1
+        # Atributos numéricos (p. ej. ttft de la llamada al LLM) se suman por etapa
+        for clave, valor in registro.items():
+            if clave not in ("inicio", "duracion") and isinstance(valor, (int, float)) and not isinstance(valor, bool):
+                etapa[f"suma_{clave}"] = etapa.get(f"suma_{clave}", 0) + valor
+        if registro.get("pedido"):
+            por_pedido.setdefault(registro["ruta"], []).append(registro["duracion"])
+
+    for etapa in etapas.values():
+        etapa["media"] = etapa["total"] / etapa["llamadas"]
+        for clave in list(etapa):
+            if isinstance(etapa[clave], float):
+                etapa[clave] = round(etapa[clave], 4)
+
+    inicio = min((r["inicio"] for r in registros), default=0)
+    fin = max((r["inicio"] + r["duracion"] for r in registros), default=0)
+    return {
+        "inicio": inicio,
+        "fin": fin,
+        "duracion_total": round(fin - inicio, 3),
+        "spans": len(registros),
+        "etapas": dict(sorted(etapas.items(), key=lambda item: -item[1]["total"])),
+        "latencia_por_pedido": {nombre: histograma(d) for nombre, d in por_pedido.items()},
+    }
+
+
+def escribir_reporte(ruta_trazas: Path, destino: Path, extra: dict | None = None) -> dict:
+    """Genera el reporte a partir del archivo de trazas (más las secciones de `extra`) y lo guarda como JSON."""
+    _volcar()
+    reporte = generar_reporte(leer_trazas(ruta_trazas))
+    reporte.update(extra or {})
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    temporal = destino.with_name(destino.name + ".tmp")
+    temporal.write_text(json.dumps(reporte, indent=2, ensure_ascii=False), encoding="utf-8")
+    os.replace(temporal, destino)
+    return reporte
+
+
+def imprimir_reporte(reporte: dict, limite: int = 10):
+    print(f"⏱️  Duración total: {reporte['duracion_total']:.1f}s ({reporte['spans']} spans)")
+    for ruta, etapa in list(reporte["etapas"].items())[:limite]:
+        print(f"   {ruta:<55} {etapa['total']:>9.2f}s  x{etapa['llamadas']:<5} media {etapa['media']:.3f}s")
+    for nombre, datos in reporte["latencia_por_pedido"].items():
+        print(f"   📈 {nombre}: n={datos['n']} p50={datos['p50']}s p90={datos['p90']}s p99={datos['p99']}s")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Uso: python scripts/trazas.py <archivo de trazas .ndjson>")
+        sys.exit(1)
+    imprimir_reporte(generar_reporte(leer_trazas(Path(sys.argv[1]))))
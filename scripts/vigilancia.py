@@ -0,0 +1,141 @@
+# scripts/vigilancia.py
+
+"""
+Vigilancia por sondeo de html/ y html_pedidos/ para el modo vigilancia de cerebro.py.
+
+    vigilante = Vigilante([HTML_DIR, HTML_PEDIDOS_DIR])
+    while True:
+        for ruta, llegada in vigilante.revisar():   # páginas nuevas o reescritas, ya completas
+            ...
+        time.sleep(INTERVALO_SONDEO)
+
+  - Cada revisión hace un solo stat() por directorio. El directorio sólo se recorre
+    (os.scandir) si cambió su fecha de modificación (se creó, borró o renombró algún
+    archivo), si esa fecha es de hace menos de MARGEN_RECIENTE segundos (un archivo
+    creado en el mismo instante que el recorrido anterior no la cambia otra vez) o
+    cada REESCANEO_COMPLETO segundos, para ver también las páginas reescritas en su lugar.
+  - Una página se entrega cuando su tamaño y su fecha no cambiaron durante
+    ESPERA_ESTABLE segundos: el navegador puede estar todavía escribiéndola.
+  - Las páginas que ya estaban al crear el vigilante no se entregan.
+
+Sin dependencias: inotify necesitaría un paquete externo y sólo existe en Linux; con
+las pocas páginas sueltas que hay en cada directorio el sondeo cuesta microsegundos.
+
+Uso:
+    python scripts/vigilancia.py   # muestra las páginas que van llegando (Ctrl+C para salir)
+"""
+
+import os
+import time
+from pathlib import Path
+
+from indice_directorios import HTML_DIR, HTML_PEDIDOS_DIR, EXTENSION
+
+# === CONFIGURACIÓN ===
+INTERVALO_SONDEO = 1.0      # segundos entre revisiones
+ESPERA_ESTABLE = 1.0        # segundos sin cambios antes de entregar una página
+MARGEN_RECIENTE = 2.0       # segundos en los que se vuelve a recorrer un directorio recién modificado
+REESCANEO_COMPLETO = 60.0   # segundos entre recorridos completos aunque el directorio no cambie
+
+
+def _firma(estado: os.stat_result) -> tuple[int, int]:
+    return estado.st_size, estado.st_mtime_ns
+
+
+def _escanear(directorio: Path) -> dict[Path, tuple[int, int]]:
+    """{ruta: (tamaño, mtime)} de las páginas .html del directorio."""
+    firmas = {}
+    try:
+        with os.scandir(directorio) as iterador:
+            for entrada in iterador:
+                if entrada.name.endswith(EXTENSION) and entrada.is_file():
+                    try:
+                        firmas[Path(entrada.path)] = _firma(entrada.stat())
+                    except FileNotFoundError:
+                        continue  # se borró durante el recorrido
+    except FileNotFoundError:
+        pass
+    return firmas
+
+
+class Vigilante:
+    """Detecta las páginas nuevas o reescritas de varios directorios comparando recorridos."""
+
+    def __init__(self, directorios: list[Path], espera_estable: float = ESPERA_ESTABLE):
+        self.directorios = directorios
+        self.espera_estable = espera_estable
+        self.revisiones = 0
+        self.recorridos = 0
+        self._mtime_dir: dict[Path, int | None] = {}
+        self._conocidas: dict[Path, dict[Path, tuple[int, int]]] = {}
+        # ruta → (firma observada, instante desde el que no cambia)
+        self._pendientes: dict[Path, tuple[tuple[int, int], float]] = {}
+        self._ultimo_completo = time.monotonic()
+        for directorio in directorios:
+            self._mtime_dir[directorio] = self._mtime(directorio)
+            self._conocidas[directorio] = _escanear(directorio)
+
+    @staticmethod
+    def _mtime(directorio: Path) -> int | None:
+        try:
+            return directorio.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _recorrer(self, directorio: Path, ahora: float):
+        self.recorridos += 1
+        actuales = _escanear(directorio)
+        conocidas = self._conocidas[directorio]
+        for ruta, firma in actuales.items():
+            if conocidas.get(ruta) != firma and ruta not in self._pendientes:
+                self._pendientes[ruta] = (firma, ahora)
+        for ruta in conocidas.keys() - actuales.keys():
+            self._pendientes.pop(ruta, None)
+        # Las pendientes se guardan como conocidas recién al entregarlas
+        self._conocidas[directorio] = {ruta: firma for ruta, firma in actuales.items()
+                                       if ruta not in self._pendientes or conocidas.get(ruta) == firma}
+
+    def revisar(self) -> list[tuple[Path, float]]:
+        """Páginas listas para procesar, con la fecha (epoch) de su última escritura."""
+        self.revisiones += 1
+        ahora = time.monotonic()
+        completo = ahora - self._ultimo_completo >= REESCANEO_COMPLETO
+        if completo:
+            self._ultimo_completo = ahora
+        for directorio in self.directorios:
+            mtime = self._mtime(directorio)
+            reciente = mtime is not None and time.time() - mtime / 1e9 < MARGEN_RECIENTE
+            if completo or reciente or mtime != self._mtime_dir[directorio]:
+                self._mtime_dir[directorio] = mtime
+                self._recorrer(directorio, ahora)
+
+        listas = []
+        for ruta, (firma, desde) in list(self._pendientes.items()):
+            try:
+                actual = _firma(ruta.stat())
+            except FileNotFoundError:
+                del self._pendientes[ruta]
+                continue
+            if actual != firma:
+                self._pendientes[ruta] = (actual, ahora)  # sigue escribiéndose
+            elif ahora - desde >= self.espera_estable:
+                del self._pendientes[ruta]
+                self._conocidas[ruta.parent][ruta] = actual
+                listas.append((ruta, actual[1] / 1e9))
+        return sorted(listas)
+
+    def pendientes(self) -> int:
+        """Páginas vistas que todavía se están escribiendo."""
+        return len(self._pendientes)
+
+
+if __name__ == "__main__":
+    vigilante = Vigilante([HTML_DIR, HTML_PEDIDOS_DIR])
+    print(f"👀 Vigilando {HTML_DIR} y {HTML_PEDIDOS_DIR} (Ctrl+C para salir)")
+    try:
+        while True:
+            for ruta, llegada in vigilante.revisar():
+                print(f"📄 {ruta.relative_to(ruta.parent.parent)} lista {time.time() - llegada:.1f}s después de escribirse")
+            time.sleep(INTERVALO_SONDEO)
+    except KeyboardInterrupt:
+        print(f"\n{vigilante.revisiones} revisiones, {vigilante.recorridos} recorridos de directorio")
@@ -0,0 +1,56 @@
+# tests/conftest.py
+
+"""
+Configuración común de las pruebas.
+
+Los módulos de scripts/ se importan entre sí por nombre (se ejecutan como
+`python scripts/<modulo>.py`), así que la carpeta se agrega a sys.path.
+Ninguna prueba toca csv/ ni html_pedidos/ del proyecto: las rutas de los
+módulos se redirigen a tmp_path.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+
+@pytest.fixture
+def almacen(tmp_path, monkeypatch):
+    """almacen_pedidos con todos sus archivos en tmp_path/csv."""
+    import almacen_pedidos
+    import consulta_cambios
+
+    csv_dir = tmp_path / "csv"
+    csv_dir.mkdir()
+    rutas = {
+        "CSV_DIR": csv_dir,
+        "OUTPUT_JSON_CONSOLIDADO": csv_dir / "pedidos_consolidados.json",
+        "OUTPUT_CSV_CONSOLIDADO": csv_dir / "pedidos_consolidados.csv",
+        "NDJSON_CONSOLIDADO": csv_dir / "pedidos_consolidados.ndjson",
+        "NDJSON_DELTAS": csv_dir / "pedidos_deltas.ndjson",
+        "INDICE_CAMBIOS": csv_dir / "pedidos_cambios.idx",
+        "GENERACION_INDICE": csv_dir / "pedidos_cambios.gen",
+        "INSTANTANEA": csv_dir / "pedidos_instantanea.bin",
+    }
+    for nombre, ruta in rutas.items():
+        monkeypatch.setattr(almacen_pedidos, nombre, ruta)
+    # consulta_cambios importa la ruta del índice por nombre
+    monkeypatch.setattr(consulta_cambios, "INDICE_CAMBIOS", rutas["INDICE_CAMBIOS"])
+    return almacen_pedidos
+
+
+def pedido(numero: int, **campos) -> dict:
+    """Pedido mínimo con un id válido (701-0000001-0000001, ...)."""
+    return {
+        "id_pedido": f"701-{numero:07d}-{numero:07d}",
+        "fecha_pedido": "2025-07-17",
+        "producto": f"Producto {numero}",
+        "cantidad": 1,
+        "subtotal": 100.0 * numero,
+        "fecha_procesado": f"2025-07-17T10:00:{numero:02d}",
+        **campos,
+    }
@@ -0,0 +1,69 @@
+# tests/test_almacen_pedidos.py
+
+import csv
+import json
+
+from conftest import pedido
+
+
+def _lineas(ruta) -> list[dict]:
+    return [json.loads(linea) for linea in ruta.read_text(encoding="utf-8").splitlines() if linea.strip()]
+
+
+def test_agregar_y_registrar_deltas_sin_reescribir(almacen):
+    almacen.agregar_pedidos([pedido(1), pedido(2)])
+    almacen.agregar_pedidos([pedido(3)])
+    almacen.registrar_deltas({pedido(2)["id_pedido"]: {"total_pedido": 250.0}})
+
+    assert [p["id_pedido"] for p in _lineas(almacen.NDJSON_CONSOLIDADO)] == [pedido(n)["id_pedido"] for n in (1, 2, 3)]
+    (delta,) = _lineas(almacen.NDJSON_DELTAS)
+    assert delta["id_pedido"] == pedido(2)["id_pedido"] and delta["total_pedido"] == 250.0
+    with open(almacen.OUTPUT_CSV_CONSOLIDADO, newline="", encoding="utf-8") as f:
+        filas = list(csv.DictReader(f))
+    assert len(filas) == 3 and list(filas[0]) == almacen.COLUMNAS
+
+    pedidos = {p["id_pedido"]: dict(p) for p in almacen.cargar_pedidos()}
+    assert pedidos[pedido(2)["id_pedido"]]["total_pedido"] == 250.0
+    assert "total_pedido" not in pedidos[pedido(1)["id_pedido"]]
+    assert almacen.contar_pedidos() == 3
+    assert almacen.deltas_pendientes() == 1
+
+
+def test_ids_sin_campo_tiene_en_cuenta_los_deltas(almacen):
+    almacen.agregar_pedidos([pedido(1), pedido(2, total_pedido=10.0), pedido(3)])
+    almacen.registrar_deltas({pedido(3)["id_pedido"]: {"total_pedido": 30.0}})
+    assert almacen.ids_sin_campo("total_pedido") == [pedido(1)["id_pedido"]]
+
+
+def test_compactar_aplica_los_deltas_y_regenera_las_vistas(almacen):
+    almacen.agregar_pedidos([pedido(1), pedido(2)])
+    almacen.registrar_deltas({pedido(1)["id_pedido"]: {"direccion_envio": "Calle 1"}})
+    antes = [dict(p) for p in almacen.cargar_pedidos()]
+
+    almacen.compactar()
+
+    assert almacen.deltas_pendientes() == 0
+    assert _lineas(almacen.NDJSON_CONSOLIDADO) == antes
+    assert json.loads(almacen.OUTPUT_JSON_CONSOLIDADO.read_text(encoding="utf-8")) == antes
+    assert not almacen.instantanea_desactualizada()
+
+    # Lo agregado después de compactar se lee de la instantánea más la cola del NDJSON
+    almacen.agregar_pedidos([pedido(3)])
+    assert almacen.instantanea_desactualizada()
+    assert almacen.cargar_ids() == {pedido(n)["id_pedido"] for n in (1, 2, 3)}
+    assert almacen.contar_pedidos() == 3
+    assert almacen.ids_sin_campo("direccion_envio") == [pedido(2)["id_pedido"], pedido(3)["id_pedido"]]
+
+
+def test_conservar_cola_mantiene_lo_escrito_durante_la_compactacion(almacen):
+    ruta = almacen.CSV_DIR / "archivo.ndjson"
+    ruta.write_bytes(b"viejo 1\nviejo 2\nnuevo\n")
+    tamano_base = almacen._conservar_cola(ruta, len(b"viejo 1\nviejo 2\n"), ["compactado\n"])
+    assert ruta.read_bytes() == b"compactado\nnuevo\n"
+    assert tamano_base == len(b"compactado\n")
+
+
+def test_migra_el_json_consolidado_antiguo(almacen):
+    almacen.OUTPUT_JSON_CONSOLIDADO.write_text(json.dumps([pedido(1), pedido(2)]), encoding="utf-8")
+    assert almacen.cargar_ids() == {pedido(1)["id_pedido"], pedido(2)["id_pedido"]}
+    assert almacen.NDJSON_CONSOLIDADO.exists()
@@ -0,0 +1,98 @@
+# tests/test_archivo_html.py
+
+import pytest
+
+from indice_directorios import IndiceDirectorios
+
+
+@pytest.fixture
+def archivo(tmp_path, monkeypatch):
+    """archivo_html sobre un html_pedidos/ temporal con cinco páginas de detalle."""
+    import archivo_html
+
+    html_pedidos = tmp_path / "html_pedidos"
+    html_pedidos.mkdir()
+    for n in range(5):
+        (html_pedidos / f"{_id(n)}.html").write_text(_pagina(n), encoding="utf-8")
+
+    monkeypatch.setattr(archivo_html, "ARCHIVO_DIR", html_pedidos / "archivo")
+    monkeypatch.setattr(archivo_html, "INDICE_ARCHIVO", html_pedidos / "archivo" / "indice.tsv")
+    monkeypatch.setattr(archivo_html, "indice_directorios", IndiceDirectorios(html_pedidos_dir=html_pedidos))
+    monkeypatch.setattr(archivo_html, "_indice_cache", None)
+    return archivo_html
+
+
+def _id(n: int) -> str:
+    return f"701-{n:07d}-{n:07d}"
+
+
+def _pagina(n: int) -> str:
+    return f"<html><body>Pedido {_id(n)} " + "dirección de envío ñ " * (50 + n) + "</body></html>"
+
+
+def _recargar_indice(archivo):
+    archivo._indice_cache = None
+    return archivo.cargar_indice()
+
+
+def test_archivar_y_leer(archivo):
+    ids = [_id(n) for n in range(5)]
+    archivadas, originales, comprimidos = archivo.archivar(ids + ["701-9999999-9999999"])
+
+    assert archivadas == 5
+    assert originales == sum(len(_pagina(n).encode("utf-8")) for n in range(5))
+    assert 0 < comprimidos < originales
+    assert archivo.contar_paginas() == (0, 5)
+    assert not list(archivo.ARCHIVO_DIR.parent.glob("*.html"))
+
+    assert set(_recargar_indice(archivo)) == set(ids)
+    for n in range(5):
+        assert archivo.leer_html(_id(n)) == _pagina(n)
+    assert archivo.leer_html("701-9999999-9999999") is None
+
+
+def test_segmentos_nuevos_al_superar_el_tamano_maximo(archivo, monkeypatch):
+    monkeypatch.setattr(archivo, "TAMANO_MAXIMO_SEGMENTO", 1)
+    archivo.archivar([_id(n) for n in range(3)])
+    archivo.indice_directorios.invalidar()
+    archivo.archivar([_id(n) for n in range(3, 5)])
+
+    ubicaciones = _recargar_indice(archivo)
+    assert sorted(segmento for segmento, _, _ in ubicaciones.values()) == [1, 2, 3, 4, 5]
+    assert all(desplazamiento == 0 for _, desplazamiento, _ in ubicaciones.values())
+    assert [archivo.leer_html(_id(n)) for n in range(5)] == [_pagina(n) for n in range(5)]
+
+
+def test_la_pagina_suelta_y_la_ultima_entrada_tienen_prioridad(archivo):
+    archivo.archivar([_id(0)])
+    suelta = archivo.ARCHIVO_DIR.parent / f"{_id(0)}.html"
+    suelta.write_text("versión nueva", encoding="utf-8")
+    archivo.indice_directorios.invalidar()
+    assert archivo.leer_html(_id(0)) == "versión nueva"
+
+    archivo.archivar([_id(0)])
+    assert not suelta.exists()
+    assert archivo.leer_html(_id(0)) == "versión nueva"
+    assert _recargar_indice(archivo)[_id(0)][1] > 0
+
+
+def test_linea_a_medio_escribir_del_indice_se_ignora(archivo):
+    archivo.archivar([_id(0), _id(1)])
+    with open(archivo.INDICE_ARCHIVO, "a", encoding="ascii") as f:
+        f.write(f"{_id(2)}\t1\t")
+    assert set(_recargar_indice(archivo)) == {_id(0), _id(1)}
+
+
+def test_las_paginas_se_borran_despues_de_sincronizar(archivo, monkeypatch):
+    monkeypatch.setattr(archivo, "LOTE_SINCRONIZACION", 2)
+    eventos = []
+    fsync = archivo.os.fsync
+    monkeypatch.setattr(archivo.os, "fsync", lambda fd: (eventos.append("fsync"), fsync(fd)))
+    olvidar = archivo.indice_directorios.olvidar_detalle
+    monkeypatch.setattr(archivo.indice_directorios, "olvidar_detalle",
+                        lambda id_pedido: (eventos.append("borrar"), olvidar(id_pedido)))
+
+    archivo.archivar([_id(n) for n in range(5)])
+
+    # Segmento, índice y directorio antes de cada lote de borrados (2 + 2 + 1 páginas)
+    assert eventos == ["fsync"] * 3 + ["borrar"] * 2 + ["fsync"] * 3 + ["borrar"] * 2 + ["fsync"] * 3 + ["borrar"]
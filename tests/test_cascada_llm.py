@@ -0,0 +1,100 @@
+# tests/test_cascada_llm.py
+
+from cascada_llm import CascadaModelos
+
+MODELOS = ["pequeno", "mediano", "grande"]
+
+
+def _sin_problemas(resultado):
+    return []
+
+
+def _valido_si_ok(resultado):
+    return [] if resultado.get("ok") else ["no ok"]
+
+
+def test_devuelve_el_primer_nivel_valido_sin_escalar():
+    cascada = CascadaModelos(MODELOS)
+    llamados = []
+
+    def llamar(modelo):
+        llamados.append(modelo)
+        return {"modelo": modelo}
+
+    assert cascada.ejecutar(llamar, _sin_problemas) == {"modelo": "pequeno"}
+    assert llamados == ["pequeno"]
+    assert [n.intentos for n in cascada.niveles] == [1, 0, 0]
+    assert cascada.niveles[0].aciertos == 1
+
+
+def test_escala_solo_cuando_la_validacion_falla():
+    cascada = CascadaModelos(MODELOS)
+    llamados = []
+
+    def llamar(modelo):
+        llamados.append(modelo)
+        return {"modelo": modelo, "ok": modelo == "mediano"}
+
+    assert cascada.ejecutar(llamar, _valido_si_ok, "bloque 1")["modelo"] == "mediano"
+    assert llamados == ["pequeno", "mediano"]
+    assert [(n.intentos, n.aciertos) for n in cascada.niveles] == [(1, 0), (1, 1), (0, 0)]
+
+
+def test_sin_respuesta_cuenta_como_error_y_escala():
+    cascada = CascadaModelos(MODELOS)
+
+    def llamar(modelo):
+        return None if modelo == "pequeno" else {"ok": True}
+
+    assert cascada.ejecutar(llamar, _valido_si_ok) == {"ok": True}
+    assert cascada.niveles[0].errores == 1
+    assert cascada.niveles[1].aciertos == 1
+
+
+def test_si_ninguno_es_valido_devuelve_el_ultimo_resultado_no_nulo():
+    cascada = CascadaModelos(MODELOS)
+
+    def llamar(modelo):
+        return None if modelo == "grande" else {"modelo": modelo}
+
+    assert cascada.ejecutar(llamar, lambda r: ["mal"]) == {"modelo": "mediano"}
+    assert [n.intentos for n in cascada.niveles] == [1, 1, 1]
+    assert not any(n.aciertos for n in cascada.niveles)
+
+
+def test_reparacion_valida_evita_reextraer_con_el_modelo_mayor():
+    cascada = CascadaModelos(MODELOS)
+    llamados, reparaciones = [], []
+
+    def reparar(resultado, modelo):
+        reparaciones.append(modelo)
+        return {**resultado, "ok": True}
+
+    resultado = cascada.ejecutar(lambda m: llamados.append(m) or {"ok": False}, _valido_si_ok, reparar=reparar)
+    assert resultado == {"ok": True}
+    assert llamados == ["pequeno"]
+    # Se repara con el modelo del nivel siguiente
+    assert reparaciones == ["mediano"]
+    assert cascada.niveles[0].reparaciones == 1
+
+
+def test_reparacion_invalida_escala_y_el_ultimo_nivel_repara_con_su_propio_modelo():
+    cascada = CascadaModelos(MODELOS)
+    reparaciones = []
+
+    def reparar(resultado, modelo):
+        reparaciones.append(modelo)
+        return {"ok": len(reparaciones) == 3}
+
+    resultado = cascada.ejecutar(lambda m: {"ok": False}, _valido_si_ok, reparar=reparar)
+    assert resultado == {"ok": True}
+    assert reparaciones == ["mediano", "grande", "grande"]
+    assert [n.reparaciones for n in cascada.niveles] == [0, 0, 1]
+
+
+def test_sin_resultado_no_se_intenta_reparar():
+    cascada = CascadaModelos(["unico"])
+    reparaciones = []
+    resultado = cascada.ejecutar(lambda m: None, _valido_si_ok, reparar=lambda r, m: reparaciones.append(m))
+    assert resultado is None
+    assert reparaciones == []
@@ -0,0 +1,78 @@
+# tests/test_consulta_cambios.py
+
+import consulta_cambios
+from conftest import pedido
+
+
+def _escribir_indice(almacen, entradas: list[tuple[str, str]]):
+    with open(almacen.INDICE_CAMBIOS, "w", encoding="ascii", newline="\n") as f:
+        f.writelines(almacen._entrada_indice(fecha, id_pedido) for fecha, id_pedido in entradas)
+
+
+def test_cambios_desde_una_secuencia(almacen):
+    almacen.agregar_pedidos([pedido(1), pedido(2), pedido(3)])
+    almacen.registrar_deltas({pedido(1)["id_pedido"]: {"total_pedido": 100.0}})
+    assert consulta_cambios.secuencia_actual() == 4
+
+    cambios = list(consulta_cambios.cambios_desde(2))
+    # El pedido 1 aparece una vez, con la secuencia de su último cambio y el delta aplicado
+    assert [(c["id_pedido"], c["_seq"]) for c in cambios] == [(pedido(3)["id_pedido"], 3), (pedido(1)["id_pedido"], 4)]
+    assert cambios[1]["total_pedido"] == 100.0
+
+    assert [c["_seq"] for c in consulta_cambios.cambios_desde(0, hasta=2)] == [1, 2]
+    assert list(consulta_cambios.cambios_desde("4")) == []
+
+
+def test_busqueda_por_fecha(almacen):
+    _escribir_indice(almacen, [
+        ("2025-01-01T00:00:00", "a"),
+        ("2025-01-02T00:00:00", "b"),
+        ("2025-01-02T00:00:00", "c"),
+        ("2025-01-03T00:00:00", "d"),
+    ])
+    assert consulta_cambios.secuencia_desde_fecha("2024-12-31") == 0
+    assert consulta_cambios.secuencia_desde_fecha("2025-01-02T00:00:00") == 3
+    assert consulta_cambios.secuencia_desde_fecha("2025-01-02T12:00:00") == 3
+    assert consulta_cambios.secuencia_desde_fecha("2026") == 4
+    assert consulta_cambios.resolver_marca("2025-01-01T00:00:00") == 1
+    assert consulta_cambios.resolver_marca(7) == 7
+    assert consulta_cambios.resolver_marca("") == 0
+
+
+def test_las_fechas_del_indice_no_retroceden(almacen):
+    almacen.agregar_pedidos([pedido(1)])
+    futuro = "2999-01-01T00:00:00.000000"
+    _escribir_indice(almacen, [(futuro, pedido(1)["id_pedido"])])
+
+    almacen.agregar_pedidos([pedido(2)])
+    assert almacen.INDICE_CAMBIOS.read_text(encoding="ascii").splitlines()[1].startswith(futuro)
+
+
+def test_reparar_indice_conserva_las_secuencias(almacen):
+    entradas = [
+        ("2025-01-01T00:00:00", "a"),
+        ("2025-01-03T00:00:00", "b"),
+        ("2025-01-02T00:00:00", "c"),
+        ("2025-01-04T00:00:00", "d"),
+    ]
+    _escribir_indice(almacen, entradas)
+
+    assert almacen.reparar_indice() == 1
+    lineas = almacen.INDICE_CAMBIOS.read_text(encoding="ascii").splitlines()
+    assert [linea.split()[1] for linea in lineas] == ["a", "b", "c", "d"]
+    assert lineas[2].startswith("2025-01-03T00:00:00")
+    assert almacen.reparar_indice() == 0
+
+
+def test_reconstruir_el_indice_cambia_la_generacion(almacen):
+    almacen.agregar_pedidos([pedido(1), pedido(2)])
+    almacen.registrar_deltas({pedido(1)["id_pedido"]: {"total_pedido": 1.0}})
+    generacion = almacen.generacion_indice()
+
+    almacen.INDICE_CAMBIOS.unlink()
+    assert consulta_cambios.secuencia_actual() == 2
+    assert almacen.generacion_indice() != generacion
+    # Una entrada por pedido, ordenada por su último cambio
+    lineas = almacen.INDICE_CAMBIOS.read_text(encoding="ascii").splitlines()
+    assert [linea.split()[1] for linea in lineas] == [pedido(2)["id_pedido"], pedido(1)["id_pedido"]]
+    assert all(len(linea) + 1 == almacen.ANCHO_ENTRADA_INDICE for linea in lineas)
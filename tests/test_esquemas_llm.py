@@ -0,0 +1,54 @@
+# tests/test_esquemas_llm.py
+
+from esquemas_llm import ESQUEMA_DETALLES, ESQUEMA_EXTRACCION, calcular_num_predict, validar_esquema
+
+EXTRACCION_VALIDA = {
+    "fecha_pedido": "2025-07-17",
+    "id_pedido": "701-1234567-8901234",
+    "producto": "Nombre del producto",
+    "asin": "B0XXX12345",
+    "sku": "SKU-1",
+    "cantidad": 1,
+    "costo_unitario": None,
+    "subtotal": 599.0,
+    "fecha_limite_envio": "2025-07-20",
+    "estado_pedido": "Pendiente",
+}
+
+
+def test_respuesta_valida_no_tiene_problemas():
+    assert validar_esquema(EXTRACCION_VALIDA, ESQUEMA_EXTRACCION) == []
+
+
+def test_campos_faltantes_y_no_esperados():
+    datos = {k: v for k, v in EXTRACCION_VALIDA.items() if k != "sku"}
+    datos["comentario"] = "extra"
+    assert validar_esquema(datos, ESQUEMA_EXTRACCION) == ["falta 'sku'", "campo no esperado 'comentario'"]
+
+
+def test_tipos_y_longitudes():
+    datos = {**EXTRACCION_VALIDA, "cantidad": "dos", "asin": "B0XXX123456789", "subtotal": 10}
+    assert validar_esquema(datos, ESQUEMA_EXTRACCION) == [
+        "'asin' excede 10 caracteres",
+        "tipo inválido en 'cantidad'",
+    ]
+
+
+def test_booleanos_no_pasan_por_numeros_y_enteros_aceptan_float_exacto():
+    assert validar_esquema(True, {"type": "number"}) == ["tipo inválido en 'respuesta'"]
+    assert validar_esquema(2.0, {"type": "integer"}) == []
+    assert validar_esquema(2.5, {"type": "integer"}) == ["tipo inválido en 'respuesta'"]
+
+
+def test_respuesta_que_no_es_objeto():
+    assert validar_esquema([EXTRACCION_VALIDA], ESQUEMA_EXTRACCION) == ["tipo inválido en 'respuesta'"]
+
+
+def test_num_predict_alcanza_para_la_respuesta_mas_larga_permitida():
+    for esquema in (ESQUEMA_EXTRACCION, ESQUEMA_DETALLES):
+        cadenas = sum(p.get("maxLength", 0) for p in esquema["properties"].values())
+        assert calcular_num_predict(esquema) > cadenas * 0.5
+
+    corto = {"properties": {"a": {"type": "string", "maxLength": 10}}}
+    largo = {"properties": {"a": {"type": "string", "maxLength": 100}}}
+    assert calcular_num_predict(largo) > calcular_num_predict(corto)
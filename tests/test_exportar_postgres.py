@@ -0,0 +1,148 @@
+# tests/test_exportar_postgres.py
+
+import sys
+import types
+
+import pytest
+
+from conftest import pedido
+
+
+class FalsoPsycopg(types.ModuleType):
+    """Sustituto de psycopg: guarda las filas enviadas por COPY en lugar de conectarse."""
+
+    def __init__(self):
+        super().__init__("psycopg")
+        self.conexiones = 0
+        self.envios: list[list[tuple]] = []
+        self.fallar = False
+
+    def connect(self, **config):
+        if self.fallar:
+            raise ConnectionError("sin conexión")
+        self.conexiones += 1
+        filas = []
+        self.envios.append(filas)
+        return _Conexion(filas)
+
+
+class _Conexion:
+    def __init__(self, filas):
+        self.filas = filas
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        return False
+
+    def cursor(self):
+        return _Cursor(self.filas)
+
+    def commit(self):
+        pass
+
+
+class _Cursor(_Conexion):
+    def execute(self, sql):
+        pass
+
+    def copy(self, sql):
+        return _Copia(self.filas)
+
+    def fetchall(self):
+        return [(True,) for _ in self.filas]
+
+
+class _Copia(_Conexion):
+    def write_row(self, fila):
+        self.filas.append(fila)
+
+
+@pytest.fixture
+def exportador(almacen, tmp_path, monkeypatch):
+    import exportar_postgres
+
+    monkeypatch.setattr(exportar_postgres, "MARCA_EXPORTACION", almacen.CSV_DIR / "export_postgres_marca.json")
+    monkeypatch.setattr(exportar_postgres, "ARCHIVO_CONEXION", tmp_path / "config_postgres.json")
+    for variable, valor in {"PGHOST": "localhost", "PGDATABASE": "ventas", "PGUSER": "prueba"}.items():
+        monkeypatch.setenv(variable, valor)
+    monkeypatch.setitem(sys.modules, "psycopg", FalsoPsycopg())
+    return exportar_postgres
+
+
+def _ids_enviados(psycopg) -> list[str]:
+    return [fila[0] for fila in psycopg.envios[-1]]
+
+
+def test_exporta_solo_lo_que_cambio_desde_la_marca(almacen, exportador):
+    psycopg = sys.modules["psycopg"]
+    almacen.agregar_pedidos([pedido(1), pedido(2)])
+
+    assert exportador.exportar()
+    assert _ids_enviados(psycopg) == [pedido(1)["id_pedido"], pedido(2)["id_pedido"]]
+    assert exportador.leer_marca()["seq"] == 2
+
+    # Sin cambios no se abre conexión
+    assert exportador.exportar()
+    assert psycopg.conexiones == 1
+
+    almacen.registrar_deltas({pedido(1)["id_pedido"]: {"total_pedido": 100.0}})
+    almacen.agregar_pedidos([pedido(3)])
+    assert exportador.exportar()
+    assert _ids_enviados(psycopg) == [pedido(1)["id_pedido"], pedido(3)["id_pedido"]]
+    marca = exportador.leer_marca()
+    assert marca["seq"] == 4
+    assert marca["fecha"] == max(almacen.fecha_cambio(p) for p in almacen.cargar_pedidos())
+
+
+def test_error_de_conexion_no_mueve_la_marca(almacen, exportador):
+    almacen.agregar_pedidos([pedido(1)])
+    sys.modules["psycopg"].fallar = True
+    assert not exportador.exportar()
+    assert exportador.leer_marca() == {}
+
+
+def test_marca_de_otra_generacion_exporta_todo(almacen, exportador):
+    psycopg = sys.modules["psycopg"]
+    almacen.agregar_pedidos([pedido(1), pedido(2)])
+    assert exportador.exportar()
+
+    # El índice se pierde y se reconstruye: la secuencia 2 ya no significa lo mismo
+    almacen.INDICE_CAMBIOS.unlink()
+    almacen.asegurar_indice()
+    assert exportador.leer_marca()["generacion"] != almacen.generacion_indice()
+
+    assert exportador.exportar()
+    assert len(_ids_enviados(psycopg)) == 2
+    assert exportador.leer_marca()["generacion"] == almacen.generacion_indice()
+
+
+def test_marca_antigua_por_fecha(almacen, exportador):
+    psycopg = sys.modules["psycopg"]
+    almacen.agregar_pedidos([pedido(1)])
+    fecha = almacen.INDICE_CAMBIOS.read_text(encoding="ascii")[:almacen.ANCHO_FECHA_INDICE].rstrip()
+    exportador.guardar_marca({"fecha": fecha, "generacion": almacen.generacion_indice()})
+    almacen.agregar_pedidos([pedido(2)])
+
+    assert exportador.exportar()
+    assert _ids_enviados(psycopg) == [pedido(2)["id_pedido"]]
+
+
+def test_configuracion_bd(exportador, monkeypatch):
+    monkeypatch.setenv("PGPASSWORD", "secreto")
+    assert exportador.configuracion_bd() == {
+        "host": "localhost", "dbname": "ventas", "user": "prueba", "password": "secreto",
+    }
+    monkeypatch.delenv("PGUSER")
+    with pytest.raises(ValueError, match="PGUSER"):
+        exportador.configuracion_bd()
+
+
+def test_fila_ventas_normaliza_tipos(exportador):
+    fila = dict(zip(exportador.COLUMNAS_VENTAS, exportador.fila_ventas(
+        {**pedido(1), "cantidad": "0", "subtotal": "12.5", "fecha_limite_envio": "no"})))
+    assert fila["cantidad"] == 1
+    assert fila["subtotal"] == 12.5
+    assert fila["fecha_limite_envio"] is None
+    assert str(fila["fecha_pedido"]) == "2025-07-17"
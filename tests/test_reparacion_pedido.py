@@ -0,0 +1,96 @@
+# tests/test_reparacion_pedido.py
+
+import json
+
+import pytest
+
+import parser_tabla_llm
+from parser_tabla_llm import diagnosticar_campos, lineas_relevantes, reparar_pedido, validar_pedido_extraido
+
+ID = "701-1234567-8901234"
+BLOQUE = "\n".join([
+    "hace 2 días",
+    "17/07/2025",
+    ID,
+    "Nombre del producto",
+    "ASIN: B0ABCDEFGH",
+    "SKU: SKU-1",
+    "Cantidad: 1",
+    "Subtotal: $599.00",
+    "Enviar antes de 20/07/2025",
+    "Pendiente",
+])
+PEDIDO_VALIDO = {
+    "fecha_pedido": "2025-07-17",
+    "id_pedido": ID,
+    "producto": "Nombre del producto",
+    "asin": "B0ABCDEFGH",
+    "sku": "SKU-1",
+    "cantidad": 1,
+    "costo_unitario": None,
+    "subtotal": 599.0,
+    "fecha_limite_envio": "2025-07-20",
+    "estado_pedido": "Pendiente",
+}
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """Sustituye chat_ollama: responde con `llm.respuesta` y guarda las peticiones en `llm.peticiones`."""
+    class FalsoLLM:
+        respuesta: dict = {}
+        peticiones: list = []
+
+        def __call__(self, modelo, sistema, usuario, **opciones):
+            self.peticiones.append({"modelo": modelo, "usuario": usuario, **opciones})
+            return {"contenido": json.dumps(self.respuesta)}
+
+    falso = FalsoLLM()
+    falso.peticiones = []
+    monkeypatch.setattr(parser_tabla_llm, "chat_ollama", falso)
+    return falso
+
+
+def test_diagnostico_de_campos():
+    pedido = {**PEDIDO_VALIDO, "fecha_pedido": "17/07/2025", "asin": "B0ABCDEFGHIJ"}
+    del pedido["sku"]
+    assert diagnosticar_campos(pedido, ID) == {
+        "asin": "con tipo o longitud inválida",
+        "sku": "ausente",
+        "fecha_pedido": "no interpretable (17/07/2025)",
+    }
+    assert validar_pedido_extraido(PEDIDO_VALIDO, ID) == []
+    assert diagnosticar_campos({**PEDIDO_VALIDO, "id_pedido": "701-0000000-0000000"}, ID) == {
+        "id_pedido": "distinto al del bloque (701-0000000-0000000)",
+    }
+
+
+def test_solo_se_piden_los_campos_con_problemas(llm):
+    llm.respuesta = {"fecha_pedido": "2025-07-17", "subtotal": 599.0}
+    pedido = {**PEDIDO_VALIDO, "fecha_pedido": None, "subtotal": "599"}
+
+    reparado = reparar_pedido(pedido, BLOQUE, ID, modelo="grande")
+
+    assert reparado == PEDIDO_VALIDO
+    (peticion,) = llm.peticiones
+    assert peticion["modelo"] == "grande"
+    campos = peticion["usuario"].split("\n", 1)[0].removeprefix("Campos: ").split(", ")
+    assert sorted(campos) == sorted(peticion["formato"]["required"]) == ["fecha_pedido", "subtotal"]
+    # Sólo las líneas relevantes (con su contexto), no el bloque completo
+    assert "Nombre del producto" not in peticion["usuario"] and "SKU" not in peticion["usuario"]
+
+
+def test_id_distinto_se_corrige_sin_llamar_al_llm(llm):
+    reparado = reparar_pedido({**PEDIDO_VALIDO, "id_pedido": "701-0000000-0000000", "extra": 1}, BLOQUE, ID)
+    assert reparado == PEDIDO_VALIDO
+    assert llm.peticiones == []
+
+
+def test_reparacion_invalida_devuelve_none(llm):
+    llm.respuesta = {"fecha_pedido": 20250717}
+    assert reparar_pedido({**PEDIDO_VALIDO, "fecha_pedido": None}, BLOQUE, ID) is None
+
+
+def test_lineas_relevantes_usa_el_bloque_completo_si_un_campo_no_tiene_patron():
+    assert lineas_relevantes(BLOQUE, ["asin"], contexto=0) == "ASIN: B0ABCDEFGH"
+    assert lineas_relevantes(BLOQUE, ["estado_pedido"]) == BLOQUE
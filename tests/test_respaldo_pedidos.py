@@ -0,0 +1,97 @@
+# tests/test_respaldo_pedidos.py
+
+from datetime import datetime, timedelta
+
+import pytest
+
+
+@pytest.fixture
+def respaldo(tmp_path, monkeypatch):
+    """respaldo_pedidos respaldando dos archivos de tmp_path, con trozos pequeños."""
+    import respaldo_pedidos
+
+    backup = tmp_path / "backup"
+    monkeypatch.setattr(respaldo_pedidos, "OBJETOS_DIR", backup / "objetos")
+    monkeypatch.setattr(respaldo_pedidos, "INSTANTANEAS_DIR", backup / "instantaneas")
+    monkeypatch.setattr(respaldo_pedidos, "RESTAURADOS_DIR", backup / "restaurados")
+    monkeypatch.setattr(respaldo_pedidos, "ARCHIVOS_RESPALDO", [tmp_path / "pedidos.ndjson", tmp_path / "deltas.ndjson"])
+    monkeypatch.setattr(respaldo_pedidos, "TAMANO_MINIMO_TROZO", 256)
+    monkeypatch.setattr(respaldo_pedidos, "MASCARA_CORTE", 0x7)
+
+    pedidos, deltas = respaldo_pedidos.ARCHIVOS_RESPALDO
+    pedidos.write_text("".join(f'{{"id_pedido": "{n:07d}", "producto": "Producto {n}"}}\n' for n in range(2000)))
+    deltas.write_text('{"id_pedido": "0000001", "total_pedido": 1.0}\n')
+    return respaldo_pedidos
+
+
+def _ids_por_hora(horas: int) -> list[str]:
+    inicio = datetime(2025, 1, 1)
+    return [(inicio + timedelta(hours=h)).strftime("%Y%m%d_%H%M%S") for h in range(horas)]
+
+
+def test_segundo_respaldo_solo_guarda_los_trozos_que_cambiaron(respaldo):
+    primero = respaldo.crear_respaldo()
+    trozos = primero["archivos"]["pedidos.ndjson"]["trozos"]
+    assert len(trozos) > 10
+    assert primero["estadisticas"]["trozos_nuevos"] == len(set(trozos)) + 1
+
+    pedidos, deltas = respaldo.ARCHIVOS_RESPALDO
+    with open(pedidos, "a") as f:
+        f.write('{"id_pedido": "9999999", "producto": "Nuevo"}\n')
+    segundo = respaldo.crear_respaldo()
+
+    assert segundo["id"] != primero["id"]
+    assert segundo["estadisticas"]["trozos_nuevos"] <= 2
+    assert segundo["archivos"]["pedidos.ndjson"]["trozos"][:-2] == trozos[:-2]
+    # Un archivo sin cambios reutiliza su entrada sin volver a leerse
+    assert segundo["archivos"]["deltas.ndjson"] == primero["archivos"]["deltas.ndjson"]
+
+    destino = respaldo.restaurar(segundo["id"])
+    assert (destino / "pedidos.ndjson").read_bytes() == pedidos.read_bytes()
+    assert (destino / "deltas.ndjson").read_bytes() == deltas.read_bytes()
+    assert respaldo.verificar(primero["id"]) == []
+
+
+def test_verificar_detecta_un_trozo_danado(respaldo):
+    manifiesto = respaldo.crear_respaldo()
+    huella = manifiesto["archivos"]["deltas.ndjson"]["trozos"][0]
+    respaldo._ruta_objeto(huella).write_bytes(respaldo.zlib.compress(b"otro contenido\n"))
+
+    assert respaldo.verificar(manifiesto["id"]) == [f"deltas.ndjson: trozo {huella[:12]} dañado"]
+    with pytest.raises(ValueError):
+        respaldo.restaurar(manifiesto["id"])
+
+
+def test_retencion_conserva_uno_por_periodo(respaldo, monkeypatch):
+    monkeypatch.setattr(respaldo, "RETENCION", {"horario": 3, "diario": 2, "mensual": 1})
+    ids = _ids_por_hora(72)  # 1, 2 y 3 de enero, una por hora
+
+    assert respaldo.instantaneas_a_conservar(ids) == {
+        "20250103_230000", "20250103_220000", "20250103_210000",  # últimas 3 horas
+        "20250102_230000",                                        # último del día anterior
+    }
+    assert respaldo.instantaneas_a_conservar([]) == set()
+
+
+def test_aplicar_retencion_borra_manifiestos_y_trozos_huerfanos(respaldo, monkeypatch):
+    monkeypatch.setattr(respaldo, "RETENCION", {"horario": 1, "diario": 0, "mensual": 0})
+    ahora = [datetime(2025, 1, 1, 10)]
+
+    class Reloj(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return ahora[0]
+
+    monkeypatch.setattr(respaldo, "datetime", Reloj)
+    pedidos, _ = respaldo.ARCHIVOS_RESPALDO
+    viejo = respaldo.crear_respaldo()
+    pedidos.write_text('{"id_pedido": "reemplazado"}\n')
+    ahora[0] += timedelta(hours=1)
+    nuevo = respaldo.crear_respaldo()
+
+    borrados, trozos_borrados = respaldo.aplicar_retencion()
+
+    assert respaldo.listar_instantaneas() == [nuevo["id"]] == ["20250101_110000"]
+    assert borrados == 1
+    assert trozos_borrados == len(set(viejo["archivos"]["pedidos.ndjson"]["trozos"]))
+    assert respaldo.verificar(nuevo["id"]) == []